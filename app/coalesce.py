@@ -0,0 +1,56 @@
+"""Single-flight coalescing of identical concurrent work.
+
+When many identical requests arrive together (a popular product page, or every
+hot query missing the cache right after a reload), ``SingleFlight`` runs the
+work once per key and hands the same result to every caller waiting on it.
+Nothing is remembered once the call finishes; that is the cache's job.
+
+The work is any coroutine function, so heavier engines (a batch scorer, top-k
+search) can be coalesced behind their own keys without changing how endpoints
+call them.
+"""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Share one in-flight call per key among concurrent callers.
+
+    The call runs as its own task, so a caller that is cancelled (a client
+    disconnect) doesn't cancel it for the others. An exception raised by the
+    call is raised to every caller that shared it. ``leaders`` counts calls
+    actually run and ``followers`` counts callers that joined one instead.
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Task] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    async def do(self, key: Hashable, fn: Callable[..., Awaitable[T]], *args: Any) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(fn(*args))
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        else:
+            self.followers += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark the exception retrieved even if every caller was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def stats(self) -> dict:
+        return {"in_flight": len(self._calls), "leaders": self.leaders, "followers": self.followers}
@@ -0,0 +1,262 @@
+"""Write-behind store of recommendation events, for correlating answers with returns.
+
+``EventSink.record`` appends one event (time, tenant, product type,
+measurements, recommended size, confidence, data version) to a bounded
+in-memory buffer and returns; it does no I/O. A background task flushes the
+buffer to a local SQLite database in batches, in a worker thread. When the
+buffer is full the oldest unwritten events are dropped and counted, so a slow
+disk never slows requests down, and a batch that fails to write is dropped
+and counted the same way.
+
+``summarize_events`` aggregates the stored events per product and time window
+(counts by confidence and by recommended size), and backs the CLI::
+
+    python -m app.events events.db --window 86400 --product socks
+
+Events hold customers' body measurements; keep the database on the instance's
+private disk and prune it with ``delete_events_before``.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS recommendation_events (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    endpoint TEXT NOT NULL,
+    tenant TEXT,
+    product_type TEXT NOT NULL,
+    measurements TEXT NOT NULL,
+    recommended_size TEXT NOT NULL,
+    confidence TEXT NOT NULL,
+    data_version TEXT
+);
+CREATE INDEX IF NOT EXISTS recommendation_events_product_ts
+    ON recommendation_events (product_type, ts);
+"""
+
+_INSERT = (
+    "INSERT INTO recommendation_events (ts, endpoint, tenant, product_type, measurements,"
+    " recommended_size, confidence, data_version) VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+Event = tuple[float, str, str | None, str, str, str, str, str | None]
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """Open (creating if needed) an event database."""
+    connection = sqlite3.connect(path, check_same_thread=False)
+    with connection:
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(_SCHEMA)
+    return connection
+
+
+class EventSink:
+    """Bounded buffer of recommendation events, flushed to SQLite by ``run``.
+
+    ``written``, ``dropped`` and ``write_failures`` count events stored, events
+    discarded (buffer overflow or a failed write) and failed batch writes.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_buffered: int = 10_000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+    ):
+        if max_buffered < 1 or batch_size < 1:
+            raise ValueError("max_buffered and batch_size must be >= 1")
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer: deque[Event] = deque(maxlen=max_buffered)
+        self._connection: sqlite3.Connection | None = None
+        self._write_lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+        self.write_failures = 0
+
+    def record(
+        self,
+        endpoint: str,
+        product_type: str,
+        measurements: dict[str, float],
+        result: dict,
+        tenant: str | None = None,
+        data_version: str | None = None,
+    ) -> None:
+        """Queue one event; the oldest queued event is dropped if the buffer is full."""
+        buffer = self._buffer
+        if len(buffer) == buffer.maxlen:
+            self.dropped += 1
+        buffer.append(
+            (
+                time.time(),
+                endpoint,
+                tenant,
+                product_type,
+                json.dumps(measurements, separators=(",", ":"), sort_keys=True),
+                result["recommended_size"],
+                result["confidence"],
+                data_version,
+            )
+        )
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def _take_batch(self) -> list[Event]:
+        buffer = self._buffer
+        batch = []
+        # popleft is atomic, so record() can keep appending meanwhile
+        with contextlib.suppress(IndexError):
+            for _ in range(self.batch_size):
+                batch.append(buffer.popleft())
+        return batch
+
+    def _write(self, batch: list[Event]) -> None:
+        with self._write_lock:
+            try:
+                if self._connection is None:
+                    self._connection = connect(self.path)
+                with self._connection:
+                    self._connection.executemany(_INSERT, batch)
+            except sqlite3.Error:
+                self.write_failures += 1
+                self.dropped += len(batch)
+                logger.exception("Could not write %d recommendation events", len(batch))
+            else:
+                self.written += len(batch)
+
+    def flush(self) -> None:
+        """Write everything buffered now, in the calling thread."""
+        while batch := self._take_batch():
+            self._write(batch)
+
+    async def run(self) -> None:
+        """Flush in batches every ``flush_interval`` seconds; on cancel, flush the rest."""
+        try:
+            while True:
+                await asyncio.sleep(self.flush_interval)
+                while batch := self._take_batch():
+                    await asyncio.to_thread(self._write, batch)
+        finally:
+            await asyncio.to_thread(self.close)
+
+    def close(self) -> None:
+        self.flush()
+        with self._write_lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def stats(self) -> dict:
+        return {
+            "buffered": len(self._buffer),
+            "written": self.written,
+            "dropped": self.dropped,
+            "write_failures": self.write_failures,
+        }
+
+
+def summarize_events(
+    connection: sqlite3.Connection,
+    window_seconds: float = 86_400,
+    product_type: str | None = None,
+    since: float | None = None,
+    until: float | None = None,
+    tenant: str | None = None,
+) -> list[dict]:
+    """Count events per product and time window, by confidence and by recommended size.
+
+    Windows are aligned to multiples of ``window_seconds`` since the epoch (so
+    daily windows are UTC days), and ``since``/``until`` bound event times in
+    seconds. Returns one dict per (product, window), ordered by product then
+    window start.
+    """
+    if window_seconds <= 0:
+        raise ValueError("window_seconds must be > 0")
+    conditions, params = [], []
+    for column, op, value in (
+        ("product_type", "=", product_type),
+        ("tenant", "=", tenant),
+        ("ts", ">=", since),
+        ("ts", "<", until),
+    ):
+        if value is not None:
+            conditions.append(f"{column} {op} ?")
+            params.append(value)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    rows = connection.execute(
+        f"""
+        SELECT product_type, CAST(ts / ? AS INTEGER) AS bucket, confidence, recommended_size,
+               COUNT(*)
+        FROM recommendation_events {where}
+        GROUP BY product_type, bucket, confidence, recommended_size
+        ORDER BY product_type, bucket
+        """,
+        [window_seconds, *params],
+    ).fetchall()
+
+    summaries: dict[tuple[str, int], dict] = {}
+    for product, bucket, confidence, size, count in rows:
+        summary = summaries.get((product, bucket))
+        if summary is None:
+            summary = summaries[(product, bucket)] = {
+                "product_type": product,
+                "window_start": bucket * window_seconds,
+                "total": 0,
+                "confidence": {},
+                "sizes": {},
+            }
+        summary["total"] += count
+        summary["confidence"][confidence] = summary["confidence"].get(confidence, 0) + count
+        summary["sizes"][size] = summary["sizes"].get(size, 0) + count
+    return list(summaries.values())
+
+
+def delete_events_before(connection: sqlite3.Connection, before: float) -> int:
+    """Delete events older than ``before`` (epoch seconds); returns how many."""
+    with connection:
+        return connection.execute(
+            "DELETE FROM recommendation_events WHERE ts < ?", (before,)
+        ).rowcount
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Summarize stored recommendation events.")
+    parser.add_argument("database", help="SQLite file written by the event sink")
+    parser.add_argument("--window", type=float, default=86_400, help="window length in seconds")
+    parser.add_argument("--product", help="only this product type")
+    parser.add_argument("--tenant", help="only this tenant")
+    parser.add_argument("--since", type=float, help="only events at or after this epoch time")
+    parser.add_argument("--until", type=float, help="only events before this epoch time")
+    args = parser.parse_args(argv)
+
+    connection = sqlite3.connect(f"file:{args.database}?mode=ro", uri=True)
+    try:
+        summaries = summarize_events(
+            connection, args.window, args.product, args.since, args.until, args.tenant
+        )
+    finally:
+        connection.close()
+    for summary in summaries:
+        print(json.dumps(summary))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
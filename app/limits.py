@@ -0,0 +1,202 @@
+"""Per-client rate limiting and load shedding for the ASGI app.
+
+``LoadShedder``, applied by ``LoadSheddingMiddleware``, rejects work early
+instead of letting a burst queue up behind the event loop:
+
+- Each client gets a token bucket (``rate`` requests/second, up to ``burst``
+  at once). A client that runs dry gets 429 with ``Retry-After``.
+- At most ``max_concurrent`` requests run at once. Up to ``max_queued`` more
+  wait for a slot, for at most ``queue_timeout`` seconds; beyond that the
+  request gets 503 straight away.
+
+Exempt paths (``/health`` by default) bypass both, so platform health checks
+keep passing while the instance sheds load.
+"""
+
+import asyncio
+import json
+import math
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+
+from app.metrics import Counter
+
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, now: float):
+        self.tokens = tokens
+        self.updated = now
+
+
+class RateLimiter:
+    """Token buckets keyed by client, keeping at most ``max_clients`` (least recent dropped).
+
+    A dropped bucket would have refilled by the time its client returns in most
+    cases, so forgetting idle clients costs little.
+    """
+
+    def __init__(self, rate: float, burst: float, max_clients: int = 10_000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: OrderedDict[str, TokenBucket] = OrderedDict()
+
+    def acquire(self, key: str, now: float | None = None) -> float:
+        """Take a token for ``key``; return 0 if allowed, else seconds until one is available."""
+        now = time.monotonic() if now is None else now
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self.burst, now)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * self.rate)
+            bucket.updated = now
+
+        if bucket.tokens >= 1:
+            bucket.tokens -= 1
+            return 0.0
+        return (1 - bucket.tokens) / self.rate
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+def _client_key(scope, key_by: str, trust_proxy: bool, proxy_hops: int = 1) -> str:
+    headers = dict(scope.get("headers") or [])
+    if key_by == "origin":
+        origin = headers.get(b"origin")
+        if origin:
+            return origin.decode("latin-1")
+    if trust_proxy:
+        forwarded = headers.get(b"x-forwarded-for")
+        if forwarded:
+            # Each trusted proxy appends the address it saw; anything further left
+            # came from the client and can be anything
+            hops = [hop.strip() for hop in forwarded.decode("latin-1").split(",")]
+            if len(hops) >= proxy_hops:
+                return hops[-proxy_hops]
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+async def _reject(send, status: int, detail: str, retry_after: float) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+class LoadShedder:
+    """The rate limit and concurrency cap described above, with their live state.
+
+    ``rate`` of 0 disables rate limiting; ``max_concurrent`` of 0 disables the cap.
+    ``key_by`` is ``"client"`` (IP address) or ``"origin"`` (the Origin header,
+    falling back to the IP). With ``trust_proxy`` the IP is the
+    ``X-Forwarded-For`` entry added by the outermost of ``proxy_hops`` trusted
+    proxies, counting from the right.
+    Rejections are counted in ``rejections`` by reason: ``rate_limited``,
+    ``queue_full`` or ``queue_timeout``.
+    """
+
+    def __init__(
+        self,
+        rejections: Counter,
+        rate: float = 0,
+        burst: float = 20,
+        max_concurrent: int = 0,
+        max_queued: int = 0,
+        queue_timeout: float = 5.0,
+        key_by: str = "client",
+        trust_proxy: bool = False,
+        proxy_hops: int = 1,
+        exempt_paths: Iterable[str] = ("/health",),
+    ):
+        if key_by not in ("client", "origin"):
+            raise ValueError(f"key_by must be 'client' or 'origin', not {key_by!r}")
+        if proxy_hops < 1:
+            raise ValueError("proxy_hops must be >= 1")
+        self.rejections = rejections
+        self.limiter = RateLimiter(rate, burst) if rate > 0 else None
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self.key_by = key_by
+        self.trust_proxy = trust_proxy
+        self.proxy_hops = proxy_hops
+        self.exempt_paths = frozenset(exempt_paths)
+        self.in_flight = 0
+        self.queued = 0
+        self._slots = asyncio.Semaphore(max_concurrent) if max_concurrent else None
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "tracked_clients": len(self.limiter) if self.limiter else 0,
+        }
+
+    async def handle(self, app, scope, receive, send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await app(scope, receive, send)
+            return
+
+        if self.limiter is not None:
+            key = _client_key(scope, self.key_by, self.trust_proxy, self.proxy_hops)
+            retry_after = self.limiter.acquire(key)
+            if retry_after:
+                self.rejections.inc("rate_limited")
+                await _reject(send, 429, "Too many requests", retry_after)
+                return
+
+        if self._slots is None:
+            await app(scope, receive, send)
+            return
+
+        if self._slots.locked():
+            if self.queued >= self.max_queued:
+                self.rejections.inc("queue_full")
+                await _reject(send, 503, "Server is busy, try again shortly", 1)
+                return
+            self.queued += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+            except TimeoutError:
+                self.rejections.inc("queue_timeout")
+                await _reject(send, 503, "Server is busy, try again shortly", 1)
+                return
+            finally:
+                self.queued -= 1
+        else:
+            await self._slots.acquire()
+
+        self.in_flight += 1
+        try:
+            await app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+
+
+class LoadSheddingMiddleware:
+    """ASGI middleware that passes every request through a shared ``LoadShedder``."""
+
+    def __init__(self, app, shedder: LoadShedder):
+        self.app = app
+        self.shedder = shedder
+
+    async def __call__(self, scope, receive, send):
+        await self.shedder.handle(self.app, scope, receive, send)
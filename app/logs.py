@@ -0,0 +1,203 @@
+"""Queue-based, structured logging that stays off the request path.
+
+``configure_logging`` routes every log record through a bounded in-memory queue.
+A background thread formats the records and writes them to stdout. A logging
+call on the event loop only copies the record and enqueues it. If the writer
+falls behind and the queue fills up, new records are dropped and counted
+instead of blocking the caller.
+
+``AccessLogMiddleware`` writes one ``access`` record per request: method, route,
+status and latency, plus the tenant, product type, confidence and sizing data
+version when the handler set them. Successful requests are sampled at
+``sample_rate``, and each record carries that rate so counts can be scaled
+back up. Server errors are always logged.
+"""
+
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import time
+from collections.abc import Callable
+
+ACCESS_LOGGER = "app.access"
+
+# Attributes every LogRecord has; anything else on a record came from ``extra``
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {
+    "message",
+    "asctime",
+    "taskName",
+}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and any ``extra`` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records (counting them) when the queue is full."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge the arguments now, since they may change after the call returns,
+        # but leave formatting (including tracebacks) to the writer thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LoggingPipeline:
+    """The queue handler installed on the root logger and the thread draining it."""
+
+    def __init__(self, handler: DroppingQueueHandler, listener: logging.handlers.QueueListener):
+        self.handler = handler
+        self.listener = listener
+
+    @property
+    def dropped(self) -> int:
+        return self.handler.dropped
+
+    def stop(self) -> None:
+        """Write out everything still queued and stop the writer thread."""
+        self.listener.stop()
+
+    def start(self) -> None:
+        """Start the writer thread again after ``stop``; records queued meanwhile are kept."""
+        self.listener.start()
+
+    def restart_after_fork(self) -> None:
+        """Give a forked child process its own queue and writer thread.
+
+        Threads don't survive ``fork``, so without this the child's records
+        would fill a queue nobody drains.
+        """
+        log_queue: queue.Queue = queue.Queue(maxsize=self.handler.queue.maxsize)
+        self.handler.queue = log_queue
+        self.handler.dropped = 0
+        self.listener = logging.handlers.QueueListener(
+            log_queue, *self.listener.handlers, respect_handler_level=True
+        )
+        self.listener.start()
+
+
+def configure_logging(
+    level: str = "info", fmt: str = "json", queue_size: int = 10_000
+) -> LoggingPipeline:
+    """Replace the root logger's handlers with a queue drained by a writer thread.
+
+    ``fmt`` is ``"json"`` (one object per line) or ``"text"``.
+    """
+    if fmt == "json":
+        formatter: logging.Formatter = JsonFormatter()
+    elif fmt == "text":
+        formatter = logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+    else:
+        raise ValueError(f"Unknown log format: {fmt}")
+
+    writer = logging.StreamHandler(sys.stdout)
+    writer.setFormatter(formatter)
+    log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    handler = DroppingQueueHandler(log_queue)
+    listener = logging.handlers.QueueListener(log_queue, writer, respect_handler_level=True)
+
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level.upper())
+    listener.start()
+    return LoggingPipeline(handler, listener)
+
+
+class AccessLogMiddleware:
+    """ASGI middleware writing one structured ``access`` record per request.
+
+    ``data_version`` is called at the end of each request for the version of
+    the sizing data that served it, unless the handler set one in the request
+    state (a tenant's dataset).
+    """
+
+    def __init__(
+        self,
+        app,
+        data_version: Callable[[], str | None],
+        sample_rate: float = 1.0,
+        logger: logging.Logger | None = None,
+    ):
+        if not 0 <= sample_rate <= 1:
+            raise ValueError("sample_rate must be between 0 and 1")
+        self.app = app
+        self.data_version = data_version
+        self.sample_rate = sample_rate
+        self.logger = logger or logging.getLogger(ACCESS_LOGGER)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+        state = scope.setdefault("state", {})
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if status >= 500 or (
+                self.sample_rate > 0
+                and self.logger.isEnabledFor(logging.INFO)
+                and (self.sample_rate >= 1 or random.random() < self.sample_rate)
+            ):
+                self._log(scope, state, status, time.perf_counter() - start)
+
+    def _log(self, scope, state: dict, status: int, elapsed: float) -> None:
+        fields = {
+            "event": "access",
+            "method": scope["method"],
+            "route": getattr(scope.get("route"), "path", None) or "unmatched",
+            "status": status,
+            "latency_ms": round(elapsed * 1000, 3),
+            "data_version": state.get("data_version") or self.data_version(),
+            "sample_rate": 1.0 if status >= 500 else self.sample_rate,
+        }
+        if "tenant" in state:
+            fields["tenant"] = state["tenant"]
+        if "product_type" in state:
+            fields["product_type"] = state["product_type"]
+        if "confidence" in state:
+            fields["confidence"] = state["confidence"]
+        level = logging.ERROR if status >= 500 else logging.INFO
+        self.logger.log(level, "%s %s %s", fields["method"], fields["route"], status, extra=fields)
@@ -1,38 +1,283 @@
 """FastAPI application for the Solidea Sizing Assistant."""
 
+import asyncio
+import atexit
+import contextlib
+import hashlib
+import json
 import logging
+import math
 import os
+import secrets
+import time
+from collections.abc import Mapping
 from contextlib import asynccontextmanager
+from functools import partial
 from pathlib import Path
+from urllib.parse import urlencode
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
+from fastapi.exception_handlers import request_validation_exception_handler
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, RedirectResponse, Response
 from fastapi.staticfiles import StaticFiles
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
 
-from app.models import SizingRequest, SizingResponse
-from app.sizing.engine import recommend_size
-from app.sizing.loader import load_sizing_data
+from app.coalesce import SingleFlight
+from app.events import EventSink
+from app.limits import LoadShedder, LoadSheddingMiddleware
+from app.logs import AccessLogMiddleware, configure_logging
+from app.metrics import (
+    CHART_VALIDATION_FAILURES,
+    CONTENT_TYPE,
+    DATA_RELOADS,
+    ENGINE_DURATION,
+    HTTP_REQUEST_DURATION,
+    RECOMMENDATION_REQUEST_DURATION,
+    REGISTRY,
+    REQUEST_VALIDATION_FAILURES,
+    REQUESTS_REJECTED,
+    MetricsMiddleware,
+)
+from app.models import (
+    BatchSizingItem,
+    BatchSizingRequest,
+    BatchSizingResponse,
+    EmailBatchRequest,
+    EmailBatchResponse,
+    EmailExtraction,
+    EmailInput,
+    EmailRequest,
+    SizingRequest,
+    SizingResponse,
+)
+from app.profiling import Profiler, ProfilingMiddleware, phase
+from app.sizing.cache import RecommendationCache, normalize_measurements
+from app.sizing.chart import CompiledChart
+from app.sizing.engine import SizingResult, recommend_size_batch
+from app.sizing.export import export_chart, export_version
+from app.sizing.extract import extract_request
+from app.sizing.grid import attach_decision_grids
+from app.sizing.loader import compile_sizing_data, load_sizing_data, source_hash
+from app.sizing.snapshot import attach_verified_snapshot
+from app.sizing.store import LazyChartStore
+from app.sizing.watcher import watch_data_dir
+from app.streaming import CONTENT_TYPE as NDJSON_CONTENT_TYPE
+from app.streaming import NDJSONScoringResponse
+from app.tenants import TENANT_HEADER_NAME, TenantRegistry, TenantRoutingMiddleware
 
-logging.basicConfig(
-    level=os.getenv("APP_LOG_LEVEL", "info").upper(),
-    format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+# Records are queued and written by a background thread, never on the event loop
+_logging = configure_logging(
+    level=os.getenv("APP_LOG_LEVEL", "info"),
+    fmt=os.getenv("LOG_FORMAT", "json"),
+    queue_size=int(os.getenv("LOG_QUEUE_SIZE", "10000")),
 )
+atexit.register(_logging.stop)
 logger = logging.getLogger(__name__)
 
-# Module-level storage for sizing data (loaded at startup)
-_sizing_data: dict[str, list[dict]] = {}
+# Module-level storage for sizing data (loaded at startup). Reloads build a complete
+# new mapping and rebind this name in one step, so a request sees either the old or
+# the new dataset, never a mix.
+_sizing_data: Mapping[str, CompiledChart] = {}
+_data_dir = os.getenv("SIZING_DATA_DIR", "data")
+# Short hash of the chart files _sizing_data was loaded from, for the access log
+_data_version: str | None = None
+_reload_lock = asyncio.Lock()
+
+# Poll SIZING_DATA_DIR for changed files every N seconds (0 disables the watcher)
+SIZING_RELOAD_INTERVAL = float(os.getenv("SIZING_RELOAD_INTERVAL", "0"))
+
+# Load each chart on first use instead of all at startup, keeping at most
+# SIZING_MEMORY_BUDGET_MB of compiled charts resident
+SIZING_LAZY_LOADING = os.getenv("SIZING_LAZY_LOADING", "").lower() in ("1", "true", "yes")
+SIZING_MEMORY_BUDGET_MB = float(os.getenv("SIZING_MEMORY_BUDGET_MB", "64"))
+
+# Precompute a verified answer grid for two-field charts (socks, bras) at load time,
+# so lookups on the grid's lattice skip scoring; not used with lazy loading
+SIZING_DECISION_GRIDS = os.getenv("SIZING_DECISION_GRIDS", "").lower() in ("1", "true", "yes")
+
+# Batches larger than this are scored in a worker thread so they don't stall the event loop
+BATCH_OFFLOAD_THRESHOLD = int(os.getenv("BATCH_OFFLOAD_THRESHOLD", "200"))
+# Email batches are parsed with regexes first, so they move off the loop sooner
+EMAIL_OFFLOAD_THRESHOLD = int(os.getenv("EMAIL_OFFLOAD_THRESHOLD", "20"))
+
+# Lines per scoring chunk, and chunks buffered between the body reader and the
+# scorer, for the NDJSON streaming endpoint
+STREAM_CHUNK_LINES = int(os.getenv("STREAM_CHUNK_LINES", "500"))
+STREAM_QUEUE_CHUNKS = int(os.getenv("STREAM_QUEUE_CHUNKS", "4"))
+
+# Encode single recommendations directly from the engine result instead of
+# building a SizingResponse and re-validating it through response_model
+SIZING_FAST_SERIALIZATION = os.getenv("SIZING_FAST_SERIALIZATION", "true").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+_json_encoder = json.JSONEncoder(ensure_ascii=False, allow_nan=False, separators=(",", ":"))
+
+# Concurrent cache misses for the same recommendation share one computation (run
+# off the event loop) and one encoded body. Off by default: a miss takes
+# microseconds inline, far less than the threadpool hop, so this only pays off
+# with an engine slow enough that identical misses actually overlap
+SIZING_COALESCE = os.getenv("SIZING_COALESCE", "false").lower() in ("1", "true", "yes")
+_single_flight = SingleFlight()
+
+# CDN/browser max-age for GET recommendations
+SIZING_GET_MAX_AGE = int(os.getenv("SIZING_GET_MAX_AGE", "300"))
+
+# Memoizes single recommendations; cleared automatically when _sizing_data is replaced
+_cache_settings = {
+    "ttl_seconds": float(os.getenv("SIZING_CACHE_TTL_SECONDS", "0")),
+    "policy": os.getenv("SIZING_CACHE_POLICY", "lru"),
+    "precision": int(os.getenv("SIZING_CACHE_PRECISION", "2")),
+}
+_recommendation_cache = RecommendationCache(
+    maxsize=int(os.getenv("SIZING_CACHE_SIZE", "4096")), **_cache_settings
+)
+
+# Per-storefront chart sets in SIZING_TENANTS_DIR/<tenant_id>/, chosen by a /t/<tenant_id>
+# path prefix or X-Tenant-Id header; unset serves only SIZING_DATA_DIR. Each tenant is
+# loaded on first use, gets its own recommendation cache, and is evicted when idle or
+# when resident tenants' charts exceed the budget.
+SIZING_TENANTS_DIR = os.getenv("SIZING_TENANTS_DIR", "")
+_tenants = TenantRegistry(
+    SIZING_TENANTS_DIR,
+    cache_factory=partial(
+        RecommendationCache,
+        maxsize=int(os.getenv("SIZING_TENANT_CACHE_SIZE", "1024")),
+        **_cache_settings,
+    ),
+    memory_budget_bytes=int(float(os.getenv("SIZING_TENANT_MEMORY_BUDGET_MB", "64")) * 1024 * 1024),
+    idle_seconds=float(os.getenv("SIZING_TENANT_IDLE_SECONDS", "3600")),
+    load_timeout=float(os.getenv("SIZING_TENANT_LOAD_TIMEOUT_SECONDS", "5")),
+    retry_after=float(os.getenv("SIZING_TENANT_RETRY_SECONDS", "30")),
+    decision_grids=SIZING_DECISION_GRIDS,
+)
+
+
+def _load_compiled(data_dir: str) -> Mapping[str, CompiledChart]:
+    """Load every chart eagerly, or index them for lazy loading if SIZING_LAZY_LOADING is set.
+
+    In lazy mode only the manifest/directory index is checked here; each chart
+    file is validated when it is first requested.
+    """
+    if SIZING_LAZY_LOADING:
+        return LazyChartStore(data_dir, int(SIZING_MEMORY_BUDGET_MB * 1024 * 1024))
+    return compile_sizing_data(load_sizing_data(data_dir), decision_grids=SIZING_DECISION_GRIDS)
+
+
+def _dataset_version(data_dir: str) -> str:
+    return source_hash(data_dir)[:12]
+
+
+def _load_versioned(data_dir: str) -> tuple[str, Mapping[str, CompiledChart]]:
+    # Hashed before loading, so an edit made meanwhile shows up as a new version next time
+    version = _dataset_version(data_dir)
+    return version, _load_compiled(data_dir)
+
+
+def _describe(sizing_data: Mapping[str, CompiledChart]) -> str:
+    if isinstance(sizing_data, LazyChartStore):
+        return f"{len(sizing_data)} products indexed for lazy loading"
+    return str(list(sizing_data.keys()))
+
+
+def _load_startup_data(data_dir: str) -> Mapping[str, CompiledChart]:
+    """Attach SIZING_SNAPSHOT_PATH if it was built from the current data, else parse the JSON."""
+    snapshot_path = os.getenv("SIZING_SNAPSHOT_PATH", "")
+    if snapshot_path and Path(snapshot_path).is_file():
+        try:
+            charts = attach_verified_snapshot(snapshot_path, data_dir)
+        except ValueError:
+            logger.exception("Could not attach snapshot %s; loading JSON", snapshot_path)
+        else:
+            if charts is not None:
+                if SIZING_DECISION_GRIDS:
+                    attach_decision_grids(charts)
+                return charts
+    return _load_compiled(data_dir)
+
+
+# Set by preload_sizing_data() in a pre-fork master (app.serve); the lifespan of
+# each forked worker serves it instead of loading its own copy
+_preloaded: tuple[str, Mapping[str, CompiledChart]] | None = None
+
+
+def preload_sizing_data() -> str:
+    """Load and validate the sizing data now, for the lifespan of every process forked
+    afterwards to reuse; returns its version. Raises ValueError like startup would.
+    """
+    global _preloaded  # noqa: PLW0603
+    data_dir = os.getenv("SIZING_DATA_DIR", "data")
+    version = _dataset_version(data_dir)
+    _preloaded = (version, _load_startup_data(data_dir))
+    logger.info("Sizing data preloaded (version %s): %s", version, _describe(_preloaded[1]))
+    return version
+
+
+async def reload_sizing_data() -> Mapping[str, CompiledChart]:
+    """Re-read and re-validate the sizing data, then swap it in atomically.
+
+    Loading runs in a worker thread, off the request path. Raises ValueError and
+    leaves the current data serving if any file is missing, unreadable or invalid.
+    """
+    global _sizing_data, _data_version  # noqa: PLW0603
+    async with _reload_lock:
+        try:
+            new_version, new_data = await asyncio.to_thread(_load_versioned, _data_dir)
+        except (ValueError, OSError) as e:
+            DATA_RELOADS.inc("failure")
+            if isinstance(e, ValueError):
+                CHART_VALIDATION_FAILURES.inc("reload")
+            logger.exception("Sizing data reload failed; keeping previous data")
+            if isinstance(e, OSError):
+                raise ValueError(f"Could not read sizing data: {e}") from e
+            raise
+        _sizing_data, _data_version = new_data, new_version
+        # Tenants are re-read from their directories on their next request
+        _tenants.clear()
+        DATA_RELOADS.inc("success")
+    logger.info("Sizing data reloaded (version %s): %s", new_version, _describe(new_data))
+    return new_data
+
+
+async def _reload_on_change() -> None:
+    with contextlib.suppress(ValueError):
+        await reload_sizing_data()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Load and validate sizing data at startup."""
-    global _sizing_data  # noqa: PLW0603
-    data_dir = os.getenv("SIZING_DATA_DIR", "data")
-    logger.info("Loading sizing data from %s", data_dir)
-    _sizing_data = load_sizing_data(data_dir)
-    logger.info("Sizing data loaded: %s", list(_sizing_data.keys()))
+    global _sizing_data, _data_dir, _data_version  # noqa: PLW0603
+    _data_dir = os.getenv("SIZING_DATA_DIR", "data")
+    if _preloaded is not None:
+        _data_version, _sizing_data = _preloaded
+    else:
+        logger.info("Loading sizing data from %s", _data_dir)
+        _data_version = _dataset_version(_data_dir)
+        _sizing_data = _load_startup_data(_data_dir)
+        logger.info("Sizing data loaded (version %s): %s", _data_version, _describe(_sizing_data))
+
+    background = []
+    if SIZING_RELOAD_INTERVAL > 0:
+        background.append(
+            asyncio.create_task(
+                watch_data_dir(_data_dir, SIZING_RELOAD_INTERVAL, _reload_on_change)
+            )
+        )
+    if _event_sink is not None:
+        background.append(asyncio.create_task(_event_sink.run()))
     yield
+    # Cancelling the event sink writes out whatever it still holds
+    for task in background:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
     _sizing_data = {}
+    _data_version = None
 
 
 app = FastAPI(
@@ -48,12 +293,67 @@ allowed_origins = os.getenv(
     "http://localhost:3000,http://localhost:8000,http://127.0.0.1:8000",
 ).split(",")
 
+# Optional write-behind log of single recommendations to a local SQLite file, for
+# return-rate analysis (python -m app.events); unset records nothing
+SIZING_EVENTS_DB = os.getenv("SIZING_EVENTS_DB", "")
+_event_sink = (
+    EventSink(
+        SIZING_EVENTS_DB,
+        max_buffered=int(os.getenv("SIZING_EVENTS_BUFFER", "10000")),
+        batch_size=int(os.getenv("SIZING_EVENTS_BATCH_SIZE", "500")),
+        flush_interval=float(os.getenv("SIZING_EVENTS_FLUSH_SECONDS", "1")),
+    )
+    if SIZING_EVENTS_DB
+    else None
+)
+
+# Load shedding: per-client token buckets (RATE_LIMIT_PER_SECOND of 0 disables them)
+# and a cap on concurrent requests with a bounded wait queue (0 disables the cap)
+_load_shedder = LoadShedder(
+    REQUESTS_REJECTED,
+    rate=float(os.getenv("RATE_LIMIT_PER_SECOND", "0")),
+    burst=float(os.getenv("RATE_LIMIT_BURST", "20")),
+    max_concurrent=int(os.getenv("MAX_CONCURRENT_REQUESTS", "64")),
+    max_queued=int(os.getenv("MAX_QUEUED_REQUESTS", "256")),
+    queue_timeout=float(os.getenv("QUEUE_TIMEOUT_SECONDS", "5")),
+    key_by=os.getenv("RATE_LIMIT_KEY", "client"),
+    trust_proxy=os.getenv("TRUST_PROXY_HEADERS", "").lower() in ("1", "true", "yes"),
+    proxy_hops=int(os.getenv("TRUST_PROXY_HOPS", "1")),
+    exempt_paths=("/health", "/metrics"),
+)
+
+# Opt-in profiling: a percentage of requests, or any request whose X-Profile-Token
+# header matches PROFILE_TOKEN. Not installed at all when both are off.
+_profiler = Profiler(
+    directory=os.getenv("PROFILE_DIR", "profiles"),
+    sample_percent=float(os.getenv("PROFILE_SAMPLE_PERCENT", "0")),
+    token=os.getenv("PROFILE_TOKEN"),
+)
+if _profiler.enabled:
+    app.add_middleware(ProfilingMiddleware, profiler=_profiler)
+if SIZING_TENANTS_DIR:
+    app.add_middleware(TenantRoutingMiddleware)
+
+# Added before the others so it runs inside them: rejections still get CORS
+# headers and are timed
+app.add_middleware(LoadSheddingMiddleware, shedder=_load_shedder)
+# Structured access log; successful requests sampled at ACCESS_LOG_SAMPLE_RATE
+app.add_middleware(
+    AccessLogMiddleware,
+    data_version=lambda: _data_version,
+    sample_rate=float(os.getenv("ACCESS_LOG_SAMPLE_RATE", "1")),
+)
+app.add_middleware(
+    MetricsMiddleware,
+    http_histogram=HTTP_REQUEST_DURATION,
+    recommendation_histogram=RECOMMENDATION_REQUEST_DURATION,
+)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=allowed_origins,
     allow_credentials=False,
     allow_methods=["GET", "POST"],
-    allow_headers=["Content-Type"],
+    allow_headers=["Content-Type", TENANT_HEADER_NAME],
 )
 
 
@@ -63,16 +363,575 @@ if widget_dir.is_dir():
     app.mount("/static", StaticFiles(directory=str(widget_dir)), name="static")
 
 
+def _runtime_gauges() -> dict[str, tuple[str, float]]:
+    """Cache, chart store and load shedding stats, read at scrape time."""
+    cache = _recommendation_cache.stats()
+    gauges = {
+        "sizing_cache_hits": ("Recommendation cache hits", cache["hits"]),
+        "sizing_cache_misses": ("Recommendation cache misses", cache["misses"]),
+        "sizing_cache_evictions": ("Recommendation cache evictions", cache["evictions"]),
+        "sizing_cache_invalidations": (
+            "Recommendation cache clears after a data reload",
+            cache["invalidations"],
+        ),
+        "sizing_cache_entries": ("Entries currently in the recommendation cache", cache["size"]),
+        "sizing_products": ("Products with a loaded or indexed chart", len(_sizing_data)),
+    }
+    shedding = _load_shedder.stats()
+    gauges["sizing_requests_in_flight"] = (
+        "Requests holding a concurrency slot",
+        shedding["in_flight"],
+    )
+    gauges["sizing_requests_queued"] = (
+        "Requests waiting for a concurrency slot",
+        shedding["queued"],
+    )
+    coalesced = _single_flight.stats()
+    gauges["sizing_coalesced_computations"] = (
+        "Recommendations computed on behalf of concurrent identical requests",
+        coalesced["leaders"],
+    )
+    gauges["sizing_coalesced_requests"] = (
+        "Requests served by joining an identical in-flight computation",
+        coalesced["followers"],
+    )
+    gauges["sizing_log_records_dropped"] = (
+        "Log records dropped because the log queue was full",
+        _logging.dropped,
+    )
+    gauges["sizing_rate_limited_clients"] = (
+        "Clients with a rate limit bucket",
+        shedding["tracked_clients"],
+    )
+    if _event_sink is not None:
+        events = _event_sink.stats()
+        gauges["sizing_events_buffered"] = (
+            "Recommendation events waiting to be written",
+            events["buffered"],
+        )
+        gauges["sizing_events_written"] = ("Recommendation events written", events["written"])
+        gauges["sizing_events_dropped"] = (
+            "Recommendation events dropped on buffer overflow or a failed write",
+            events["dropped"],
+        )
+    if SIZING_TENANTS_DIR:
+        tenants = _tenants.stats()
+        gauges["sizing_tenants_resident"] = ("Tenants with charts resident", tenants["resident"])
+        gauges["sizing_tenants_resident_bytes"] = (
+            "Approximate bytes held by resident tenants' charts",
+            tenants["resident_bytes"],
+        )
+        gauges["sizing_tenant_loads"] = ("Tenant chart sets loaded", tenants["loads"])
+        gauges["sizing_tenant_evictions"] = ("Tenants evicted from memory", tenants["evictions"])
+        gauges["sizing_tenant_load_failures"] = (
+            "Tenant chart sets that failed validation when loaded",
+            tenants["load_failures"],
+        )
+    if isinstance(_sizing_data, LazyChartStore):
+        store = _sizing_data.stats()
+        gauges["sizing_store_resident_charts"] = ("Charts currently resident", store["resident"])
+        gauges["sizing_store_resident_bytes"] = (
+            "Approximate bytes held by resident charts",
+            store["resident_bytes"],
+        )
+        gauges["sizing_store_evictions"] = ("Charts evicted from memory", store["evictions"])
+        gauges["sizing_store_load_failures"] = (
+            "Charts that failed validation when first loaded",
+            store["load_failures"],
+        )
+    return gauges
+
+
+REGISTRY.add_gauge_callback(_runtime_gauges)
+
+
+@app.exception_handler(RequestValidationError)
+async def _count_validation_failures(request: Request, exc: RequestValidationError):
+    route = getattr(request.scope.get("route"), "path", None) or "unmatched"
+    REQUEST_VALIDATION_FAILURES.inc(route)
+    return await request_validation_exception_handler(request, exc)
+
+
 @app.get("/health")
 async def health():
     return {"status": "ok"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+def _require_known_product(product_type: str, sizing_data: Mapping[str, CompiledChart]) -> None:
+    """Reject product types with no loaded chart the same way as other request errors."""
+    if product_type not in sizing_data:
+        raise RequestValidationError(
+            [
+                {
+                    "type": "value_error",
+                    "loc": ("body", "product_type"),
+                    "msg": f"Unknown product type: {product_type}",
+                    "input": product_type,
+                }
+            ]
+        )
+
+
+def _chart_unavailable(product_type: str, exc: ValueError) -> HTTPException:
+    CHART_VALIDATION_FAILURES.inc("lazy_load")
+    logger.error("Sizing chart for %s could not be loaded: %s", product_type, exc)
+    return HTTPException(status_code=503, detail=f"Sizing chart for {product_type} is unavailable")
+
+
+async def _dataset(
+    http_request: Request,
+) -> tuple[Mapping[str, CompiledChart], RecommendationCache]:
+    """The charts and recommendation cache for the request's tenant, or the default ones."""
+    tenant_id = getattr(http_request.state, "tenant", None)
+    if tenant_id is None:
+        return _sizing_data, _recommendation_cache
+    try:
+        tenant = await _tenants.get(tenant_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown tenant: {tenant_id}") from None
+    except TimeoutError:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Sizing data for tenant {tenant_id} is still loading",
+            headers={"Retry-After": "1"},
+        ) from None
+    except ValueError as e:
+        CHART_VALIDATION_FAILURES.inc("tenant_load")
+        raise HTTPException(
+            status_code=503, detail=f"Sizing data for tenant {tenant_id} is unavailable"
+        ) from e
+    http_request.state.data_version = tenant.version
+    return tenant.charts, tenant.cache
+
+
+def _encode_result(result: SizingResult) -> bytes | None:
+    """Encode an engine result straight to JSON bytes, or None on the model path.
+
+    Returning these bytes in a Response makes FastAPI skip ``response_model``
+    validation and serialization; the schema it documents is unchanged. The
+    engine's result already has ``SizingResponse``'s fields in order, and the
+    encoder settings match JSONResponse, so the bytes are identical to the
+    model path.
+    """
+    if not SIZING_FAST_SERIALIZATION:
+        return None
+    with phase("serialize"):
+        return _json_encoder.encode(result).encode()
+
+
+def _compute_recommendation(
+    product_type: str,
+    measurements: dict[str, float],
+    sizing_data: Mapping[str, CompiledChart],
+    cache: RecommendationCache,
+) -> tuple[SizingResult, bytes | None]:
+    with phase("recommend"):
+        start = time.perf_counter()
+        result = cache.recommend(
+            product_type=product_type,
+            measurements=measurements,
+            sizing_data=sizing_data,
+        )
+        ENGINE_DURATION.observe(time.perf_counter() - start, product_type)
+    return result, _encode_result(result)
+
+
+async def _recommend(
+    product_type: str,
+    measurements: dict[str, float],
+    sizing_data: Mapping[str, CompiledChart],
+    cache: RecommendationCache,
+    http_request: Request,
+) -> tuple[SizingResult, bytes | None]:
+    """Recommend a size, returning the result and its encoded body.
+
+    Cache hits are answered inline. With ``SIZING_COALESCE``, misses run in the
+    threadpool and concurrent identical misses (same product, normalized
+    measurements and dataset) share that one computation and body.
+    """
+    try:
+        with phase("cache_lookup"):
+            start = time.perf_counter()
+            result = cache.get(product_type, measurements, sizing_data)
+        if result is not None:
+            ENGINE_DURATION.observe(time.perf_counter() - start, product_type)
+            body = _encode_result(result)
+        elif SIZING_COALESCE:
+            key = (
+                product_type,
+                normalize_measurements(measurements, cache.precision),
+                id(sizing_data),
+            )
+            with phase("coalesced"):
+                result, body = await _single_flight.do(
+                    key,
+                    run_in_threadpool,
+                    _compute_recommendation,
+                    product_type,
+                    measurements,
+                    sizing_data,
+                    cache,
+                )
+        else:
+            result, body = _compute_recommendation(product_type, measurements, sizing_data, cache)
+    except ValueError as e:
+        raise _chart_unavailable(product_type, e) from e
+    http_request.state.product_type = product_type
+    http_request.state.confidence = result["confidence"]
+    if _event_sink is not None:
+        state = http_request.state
+        _event_sink.record(
+            f"{http_request.method} {http_request.scope['route'].path}",
+            product_type,
+            measurements,
+            result,
+            tenant=getattr(state, "tenant", None),
+            data_version=getattr(state, "data_version", None) or _data_version,
+        )
+    return result, body
+
+
 @app.post("/api/v1/size-recommendation", response_model=SizingResponse)
-async def size_recommendation(request: SizingRequest):
-    result = recommend_size(
-        product_type=request.product_type.value,
-        measurements=request.measurements,
-        sizing_data=_sizing_data,
+async def size_recommendation(request: SizingRequest, http_request: Request):
+    sizing_data, cache = await _dataset(http_request)
+    _require_known_product(request.product_type, sizing_data)
+    result, body = await _recommend(
+        request.product_type, request.measurements, sizing_data, cache, http_request
     )
+    if body is not None:
+        return Response(body, media_type="application/json")
     return SizingResponse(**result)
+
+
+def _query_error(name: str, msg: str, value: object = None) -> RequestValidationError:
+    return RequestValidationError(
+        [{"type": "value_error", "loc": ("query", name), "msg": msg, "input": value}]
+    )
+
+
+def _parse_query_measurements(http_request: Request) -> dict[str, float]:
+    measurements: dict[str, float] = {}
+    for name, raw in http_request.query_params.multi_items():
+        if name == "product_type":
+            continue
+        if name in measurements:
+            raise _query_error(name, "Measurement given more than once", raw)
+        try:
+            value = float(raw)
+        except ValueError:
+            raise _query_error(name, "Measurement must be a number", raw) from None
+        if not math.isfinite(value):
+            raise _query_error(name, "Measurement must be finite", raw)
+        measurements[name] = value
+    if not measurements:
+        raise _query_error("measurements", "At least one measurement is required")
+    return measurements
+
+
+def _canonical_query(product_type: str, normalized: tuple[tuple[str, float], ...]) -> str:
+    """product_type first, then measurements sorted by name with normalized values."""
+    pairs = [("product_type", product_type)]
+    for name, value in normalized:
+        text = repr(value)
+        pairs.append((name, text[:-2] if text.endswith(".0") else text))
+    return urlencode(pairs)
+
+
+@app.get(
+    "/api/v1/size-recommendation",
+    response_model=SizingResponse,
+    responses={301: {"description": "Redirect to the canonical query"}, 304: {}},
+)
+async def size_recommendation_get(
+    http_request: Request,
+    product_type: str = Query(
+        ...,
+        min_length=1,
+        max_length=100,
+        pattern=r"^[a-z0-9_]+$",
+        description="Product type; every other query parameter is a measurement",
+    ),
+):
+    """Cacheable form of the POST endpoint, e.g. ``?product_type=socks&calf_circumference_cm=40``.
+
+    Non-canonical queries (unsorted measurements, unnormalized numbers) get a
+    permanent redirect to the canonical URL, so a CDN caches one copy per answer.
+    The strong ETag hashes the product's export version (chart content plus the
+    scoring thresholds and note templates) with the canonical query, so it
+    changes whenever the answer could.
+    """
+    measurements = _parse_query_measurements(http_request)
+    sizing_data, cache = await _dataset(http_request)
+    _require_known_product(product_type, sizing_data)
+
+    canonical = _canonical_query(
+        product_type, normalize_measurements(measurements, cache.precision)
+    )
+    cache_control = f"public, max-age={SIZING_GET_MAX_AGE}"
+    if http_request.url.query != canonical:
+        return RedirectResponse(
+            f"{http_request.url.path}?{canonical}",
+            status_code=301,
+            headers={"Cache-Control": cache_control},
+        )
+
+    try:
+        chart = sizing_data[product_type]
+    except ValueError as e:
+        raise _chart_unavailable(product_type, e) from e
+    digest = hashlib.sha256(f"{export_version(chart)}|{canonical}".encode()).hexdigest()[:32]
+    headers = {"ETag": f'"{digest}"', "Cache-Control": cache_control}
+
+    if_none_match = http_request.headers.get("if-none-match", "")
+    if if_none_match.strip() == "*" or headers["ETag"] in (
+        tag.strip() for tag in if_none_match.split(",")
+    ):
+        return Response(status_code=304, headers=headers)
+
+    result, body = await _recommend(product_type, measurements, sizing_data, cache, http_request)
+    if body is not None:
+        return Response(body, media_type="application/json", headers=headers)
+    return JSONResponse(SizingResponse(**result).model_dump(), headers=headers)
+
+
+async def _chart_for_export(product_type: str, http_request: Request) -> CompiledChart:
+    sizing_data, _ = await _dataset(http_request)
+    if product_type not in sizing_data:
+        raise HTTPException(status_code=404, detail=f"Unknown product type: {product_type}")
+    try:
+        return sizing_data[product_type]
+    except ValueError as e:
+        raise _chart_unavailable(product_type, e) from e
+
+
+@app.get("/api/v1/charts/{product_type}", status_code=307)
+async def chart_export_latest(product_type: str, http_request: Request):
+    """Redirect to the current version of a product's chart export.
+
+    The redirect is cacheable for ``SIZING_GET_MAX_AGE`` seconds; the versioned
+    URL it points to never changes.
+    """
+    chart = await _chart_for_export(product_type, http_request)
+    return RedirectResponse(
+        f"{http_request.url.path}/{export_version(chart)}",
+        status_code=307,
+        headers={"Cache-Control": f"public, max-age={SIZING_GET_MAX_AGE}"},
+    )
+
+
+@app.get("/api/v1/charts/{product_type}/{version}")
+async def chart_export(product_type: str, version: str, http_request: Request):
+    """Compact export of a product's chart for client-side sizing (see app.sizing.export).
+
+    Only the current version is served, as an immutable response; a superseded
+    version is a 404, and clients should fall back to the recommendation API.
+    """
+    chart = await _chart_for_export(product_type, http_request)
+    if version != export_version(chart):
+        raise HTTPException(
+            status_code=404,
+            detail=f"Chart version {version} of {product_type} is not current",
+            headers={"Cache-Control": "no-store"},
+        )
+    body = _json_encoder.encode(export_chart(chart)).encode()
+    return Response(
+        body,
+        media_type="application/json",
+        headers={
+            "Cache-Control": "public, max-age=31536000, immutable",
+            "ETag": f'"{version}"',
+        },
+    )
+
+
+@app.get("/api/v1/cache-stats")
+async def cache_stats():
+    return _recommendation_cache.stats()
+
+
+def require_admin(x_admin_token: str | None = Header(default=None)) -> None:
+    """Guard admin endpoints with the ADMIN_TOKEN env var (disabled when unset)."""
+    expected = os.getenv("ADMIN_TOKEN", "")
+    if not expected:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, expected):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+@app.post("/admin/reload-sizing-data", dependencies=[Depends(require_admin)])
+async def admin_reload_sizing_data():
+    try:
+        new_data = await reload_sizing_data()
+    except ValueError as e:
+        raise HTTPException(
+            status_code=422, detail=f"Reload failed, previous data still serving: {e}"
+        ) from e
+    return {"status": "reloaded", "products": sorted(new_data)}
+
+
+def _format_validation_error(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc']) or 'item'}: {err['msg']}"
+        for err in exc.errors()
+    )
+
+
+def _resolve_chart(
+    product_type: str,
+    sizing_data: Mapping[str, CompiledChart],
+    charts: dict[str, CompiledChart | str],
+) -> CompiledChart | str:
+    """Look up a product's chart once per batch; returns the chart or an error message."""
+    if product_type not in charts:
+        if product_type not in sizing_data:
+            charts[product_type] = f"product_type: Unknown product type: {product_type}"
+        else:
+            try:
+                charts[product_type] = sizing_data[product_type]
+            except ValueError:
+                CHART_VALIDATION_FAILURES.inc("lazy_load")
+                logger.exception("Sizing chart for %s could not be loaded", product_type)
+                charts[product_type] = f"Sizing chart for {product_type} is unavailable"
+    return charts[product_type]
+
+
+def _score_batch(
+    items: list[dict], sizing_data: Mapping[str, CompiledChart]
+) -> list[BatchSizingItem]:
+    """Validate each item, score the valid ones together, and keep input order."""
+    results: list[BatchSizingItem] = []
+    valid_positions: list[int] = []
+    valid_items: list[tuple[str, dict[str, float]]] = []
+    # Charts are resolved once per product, so a lazily loaded chart can't be
+    # evicted or reloaded partway through the batch
+    charts: dict[str, CompiledChart | str] = {}
+
+    for i, raw in enumerate(items):
+        try:
+            item = SizingRequest.model_validate(raw)
+        except ValidationError as e:
+            results.append(BatchSizingItem(index=i, error=_format_validation_error(e)))
+            continue
+        chart = _resolve_chart(item.product_type, sizing_data, charts)
+        if isinstance(chart, str):
+            results.append(BatchSizingItem(index=i, error=chart))
+            continue
+        results.append(BatchSizingItem(index=i))
+        valid_positions.append(i)
+        valid_items.append((item.product_type, item.measurements))
+
+    resolved = {pt: chart for pt, chart in charts.items() if not isinstance(chart, str)}
+    with phase("recommend"):
+        scored = recommend_size_batch(valid_items, resolved)
+    for i, result in zip(valid_positions, scored, strict=True):
+        results[i].result = SizingResponse(**result)
+    return results
+
+
+@app.post("/api/v1/size-recommendations/batch", response_model=BatchSizingResponse)
+async def size_recommendations_batch(request: BatchSizingRequest, http_request: Request):
+    # Capture the dataset once so the whole batch is scored against the same charts
+    sizing_data, _ = await _dataset(http_request)
+    if len(request.items) > BATCH_OFFLOAD_THRESHOLD:
+        results = await run_in_threadpool(_score_batch, request.items, sizing_data)
+    else:
+        results = _score_batch(request.items, sizing_data)
+    return BatchSizingResponse(results=results)
+
+
+@app.post(
+    "/api/v1/size-recommendations/stream",
+    responses={
+        200: {
+            "description": "One result per line, then a summary",
+            "content": {NDJSON_CONTENT_TYPE: {}},
+        }
+    },
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                NDJSON_CONTENT_TYPE: {
+                    "schema": {"type": "string", "description": "One sizing request per line"}
+                }
+            },
+        }
+    },
+)
+async def size_recommendations_stream(http_request: Request):
+    """Score an NDJSON body of sizing requests, streaming one result line per input line.
+
+    Lines are scored in chunks of ``STREAM_CHUNK_LINES`` as the body arrives,
+    against the dataset in place when the request started. The last line is a
+    ``{"summary": ...}`` trailer with counts per confidence and per size.
+    """
+    sizing_data, _ = await _dataset(http_request)
+    return NDJSONScoringResponse(
+        partial(_score_batch, sizing_data=sizing_data),
+        chunk_lines=STREAM_CHUNK_LINES,
+        queue_chunks=STREAM_QUEUE_CHUNKS,
+    )
+
+
+def _process_emails(
+    emails: list[EmailInput], recommend: bool, sizing_data: Mapping[str, CompiledChart]
+) -> list[EmailExtraction]:
+    """Extract a sizing request from each email and, if asked, score the usable ones together."""
+    product_types = list(sizing_data)
+    results: list[EmailExtraction] = []
+    ready: list[EmailExtraction] = []
+    for i, email in enumerate(emails):
+        found = extract_request(email.subject, email.body, product_types)
+        entry = EmailExtraction(index=i, can_process=False, **found)
+        if found["product_type"] is None:
+            entry.error = "Could not detect product type"
+        elif not found["measurements"]:
+            entry.error = "Could not extract measurements"
+        elif found["product_type"] not in sizing_data:
+            entry.error = f"Unknown product type: {found['product_type']}"
+        else:
+            entry.can_process = True
+            entry.request = SizingRequest(**found)
+            ready.append(entry)
+        results.append(entry)
+
+    if recommend and ready:
+        scored = _score_batch([entry.request.model_dump() for entry in ready], sizing_data)
+        for entry, item in zip(ready, scored, strict=True):
+            entry.result = item.result
+            entry.error = item.error
+            entry.can_process = item.error is None
+    return results
+
+
+@app.post("/api/v1/email-recommendation", response_model=EmailExtraction)
+async def email_recommendation(request: EmailRequest, http_request: Request):
+    """Extract the product type and measurements from one inquiry email and score them.
+
+    Replaces the n8n workflow's parse-then-score pair of calls with one. Inches,
+    feet and pounds are converted; see ``app.sizing.extract``.
+    """
+    sizing_data, _ = await _dataset(http_request)
+    (extraction,) = _process_emails([request], request.recommend, sizing_data)
+    if extraction.result is not None:
+        http_request.state.product_type = extraction.product_type
+        http_request.state.confidence = extraction.result.confidence
+    return extraction
+
+
+@app.post("/api/v1/email-recommendations/batch", response_model=EmailBatchResponse)
+async def email_recommendations_batch(request: EmailBatchRequest, http_request: Request):
+    """The single email endpoint for a backlog of emails, with results in input order."""
+    sizing_data, _ = await _dataset(http_request)
+    if len(request.emails) > EMAIL_OFFLOAD_THRESHOLD:
+        results = await run_in_threadpool(
+            _process_emails, request.emails, request.recommend, sizing_data
+        )
+    else:
+        results = _process_emails(request.emails, request.recommend, sizing_data)
+    return EmailBatchResponse(results=results)
@@ -0,0 +1,231 @@
+"""In-process Prometheus metrics: counters, histograms and the text exposition format.
+
+Metrics are aggregated in memory with one lock per metric and rendered on
+demand by ``GET /metrics``; nothing is logged or exported per request.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+
+# Latency buckets in seconds, from sub-millisecond engine calls to slow HTTP requests
+DEFAULT_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values, strict=True)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def value(self, *labelvalues: str) -> float:
+        return self._values.get(labelvalues, 0)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labelvalues, value in items:
+            lines.append(
+                f"{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(value)}"
+            )
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (non-cumulative, last is +Inf), sum]
+        self._series: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        slot = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][slot] += 1
+            series[1][0] += value
+
+    def count(self, *labelvalues: str) -> int:
+        series = self._series.get(labelvalues)
+        return sum(series[0]) if series else 0
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, (list(v[0]), v[1][0])) for k, v in self._series.items())
+        for labelvalues, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts, strict=True):
+                cumulative += count
+                labels = _format_labels(
+                    self.labelnames, labelvalues, f'le="{_format_value(bound)}"'
+                )
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, labelvalues)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Holds metrics plus callbacks that contribute gauges computed at scrape time."""
+
+    def __init__(self):
+        self._metrics: list[Counter | Histogram] = []
+        self._gauge_callbacks: list[Callable[[], dict[str, tuple[str, float]]]] = []
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Histogram:
+        metric = Histogram(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def add_gauge_callback(self, callback: Callable[[], dict[str, tuple[str, float]]]) -> None:
+        """Register ``callback() -> {metric_name: (help, value)}``, called on every scrape."""
+        self._gauge_callbacks.append(callback)
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for callback in self._gauge_callbacks:
+            for name, (documentation, value) in callback().items():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording HTTP latency by route template, method and status.
+
+    Handlers can add ``product_type`` and ``confidence`` to ``request.state``; when
+    both are present the request is also recorded in ``recommendation_histogram``.
+    """
+
+    def __init__(self, app, http_histogram: Histogram, recommendation_histogram: Histogram):
+        self.app = app
+        self.http_histogram = http_histogram
+        self.recommendation_histogram = recommendation_histogram
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+        state = scope.setdefault("state", {})
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            self.http_histogram.observe(elapsed, route, scope["method"], str(status))
+            if "product_type" in state and "confidence" in state:
+                self.recommendation_histogram.observe(
+                    elapsed, state["product_type"], state["confidence"]
+                )
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template, method and status",
+    ("route", "method", "status"),
+)
+RECOMMENDATION_REQUEST_DURATION = REGISTRY.histogram(
+    "sizing_recommendation_request_duration_seconds",
+    "End-to-end latency of single size recommendations by product type and confidence",
+    ("product_type", "confidence"),
+)
+ENGINE_DURATION = REGISTRY.histogram(
+    "sizing_engine_duration_seconds",
+    "Time in the recommendation cache and engine only, excluding HTTP and validation",
+    ("product_type",),
+)
+DATA_RELOADS = REGISTRY.counter(
+    "sizing_data_reloads_total",
+    "Sizing data reload attempts by result",
+    ("result",),
+)
+CHART_VALIDATION_FAILURES = REGISTRY.counter(
+    "sizing_chart_validation_failures_total",
+    "Sizing chart files rejected by validation, by where they were loaded",
+    ("source",),
+)
+REQUESTS_REJECTED = REGISTRY.counter(
+    "sizing_requests_rejected_total",
+    "Requests turned away by load shedding, by reason",
+    ("reason",),
+)
+REQUEST_VALIDATION_FAILURES = REGISTRY.counter(
+    "sizing_request_validation_failures_total",
+    "Requests rejected with 422 by route template",
+    ("route",),
+)
@@ -1,12 +1,14 @@
 """Pydantic request/response models for the sizing API."""
 
 from enum import StrEnum
-from typing import Literal
+from typing import Any, Literal
 
 from pydantic import BaseModel, Field
 
 
 class ProductType(StrEnum):
+    """Core product types shipped in data/. Other charts are discovered at load time."""
+
     arm_sleeves = "arm_sleeves"
     leggings = "leggings"
     capris = "capris"
@@ -15,7 +17,17 @@ class ProductType(StrEnum):
 
 
 class SizingRequest(BaseModel):
-    product_type: ProductType
+    product_type: str = Field(
+        ...,
+        min_length=1,
+        max_length=100,
+        pattern=r"^[a-z0-9_]+$",
+        description=(
+            "Product type of a loaded sizing chart (e.g. "
+            + ", ".join(ProductType)
+            + "); unknown types are rejected with 422"
+        ),
+    )
     measurements: dict[str, float] = Field(
         ...,
         min_length=1,
@@ -27,3 +39,65 @@ class SizingResponse(BaseModel):
     recommended_size: str
     confidence: Literal["exact", "interpolated", "out_of_range"]
     notes: str = ""
+
+
+MAX_BATCH_ITEMS = 10_000
+
+
+class BatchSizingRequest(BaseModel):
+    items: list[dict[str, Any]] = Field(
+        ...,
+        min_length=1,
+        max_length=MAX_BATCH_ITEMS,
+        description="SizingRequest-shaped objects; each item is validated on its own",
+    )
+
+
+class BatchSizingItem(BaseModel):
+    index: int
+    result: SizingResponse | None = None
+    error: str | None = None
+
+
+class BatchSizingResponse(BaseModel):
+    results: list[BatchSizingItem]
+
+
+MAX_EMAIL_BATCH_ITEMS = 1_000
+MAX_EMAIL_BODY_CHARS = 50_000
+
+
+class EmailInput(BaseModel):
+    subject: str = Field("", max_length=1_000)
+    body: str = Field(..., max_length=MAX_EMAIL_BODY_CHARS, description="Plain-text email body")
+
+
+class EmailRequest(EmailInput):
+    recommend: bool = Field(
+        True, description="Also score the extracted request; false only extracts it"
+    )
+
+
+class EmailBatchRequest(BaseModel):
+    emails: list[EmailInput] = Field(..., min_length=1, max_length=MAX_EMAIL_BATCH_ITEMS)
+    recommend: bool = Field(
+        True, description="Also score each extracted request; false only extracts them"
+    )
+
+
+class EmailExtraction(BaseModel):
+    index: int = 0
+    product_type: str | None
+    measurements: dict[str, float]
+    can_process: bool = Field(
+        ..., description="A known product type and at least one measurement were found"
+    )
+    request: SizingRequest | None = Field(
+        None, description="Ready to send to POST /api/v1/size-recommendation"
+    )
+    result: SizingResponse | None = None
+    error: str | None = Field(None, description="Why the email can't be answered automatically")
+
+
+class EmailBatchResponse(BaseModel):
+    results: list[EmailExtraction]
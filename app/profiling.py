@@ -0,0 +1,169 @@
+"""Opt-in per-request profiling with on-disk dumps.
+
+A request is profiled when it is sampled (``sample_percent`` of all requests)
+or when it carries ``X-Profile-Token`` matching the configured token. For each
+profiled request ``ProfilingMiddleware`` writes two files to ``directory``,
+named after a profile id that is also returned in the ``X-Profile-Id`` header:
+
+- ``<id>.json``: method, path, status, total time, and the timed phases the
+  handler marked with ``phase()`` (offsets and durations in milliseconds).
+  Time before the first phase is routing, body parsing and validation; time
+  after the last is response serialization and sending.
+- ``<id>.prof``: a cProfile dump, readable with ``python -m pstats``. cProfile
+  sees every function on the thread, so concurrent requests on the event loop
+  show up in it too, and only one request is cProfiled at a time (others
+  profiled meanwhile get phase timings only).
+
+When profiling is off the middleware isn't installed, and ``phase()`` costs a
+context variable lookup.
+"""
+
+import contextlib
+import cProfile
+import json
+import logging
+import random
+import secrets
+import time
+from contextvars import ContextVar
+from pathlib import Path
+
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile-token"
+
+
+class RequestProfile:
+    __slots__ = ("profile_id", "start", "phases")
+
+    def __init__(self, profile_id: str, start: float):
+        self.profile_id = profile_id
+        self.start = start
+        self.phases: list[tuple[str, float, float]] = []
+
+
+_current: ContextVar[RequestProfile | None] = ContextVar("request_profile", default=None)
+_NO_PHASE = contextlib.nullcontext()
+
+
+@contextlib.contextmanager
+def _timed_phase(profile: RequestProfile, name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.phases.append((name, start, time.perf_counter()))
+
+
+def phase(name: str):
+    """Context manager timing ``name`` for the profiled request, if any."""
+    profile = _current.get()
+    if profile is None:
+        return _NO_PHASE
+    return _timed_phase(profile, name)
+
+
+class Profiler:
+    """Which requests to profile, and where their dumps go.
+
+    ``sample_percent`` of 0 disables sampling; a ``token`` of None disables the
+    header. ``enabled`` is false when both are off.
+    """
+
+    def __init__(self, directory: str, sample_percent: float = 0, token: str | None = None):
+        if not 0 <= sample_percent <= 100:
+            raise ValueError("sample_percent must be between 0 and 100")
+        self.directory = Path(directory)
+        self.sample_percent = sample_percent
+        self.token = token or None
+        self._cprofile_busy = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_percent > 0 or self.token is not None
+
+    def wants(self, scope) -> bool:
+        if self.token is not None:
+            for name, value in scope.get("headers") or ():
+                if name == PROFILE_HEADER:
+                    return secrets.compare_digest(value, self.token.encode())
+        return self.sample_percent > 0 and random.random() * 100 < self.sample_percent
+
+    def write(self, profile: RequestProfile, summary: dict, stats: cProfile.Profile | None) -> None:
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self.directory / f"{profile.profile_id}.json"
+            path.write_text(json.dumps(summary, indent=2) + "\n")
+            if stats is not None:
+                stats.dump_stats(self.directory / f"{profile.profile_id}.prof")
+        except OSError as e:
+            logger.warning("Could not write profile %s: %s", profile.profile_id, e)
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling the requests ``profiler`` selects."""
+
+    def __init__(self, app, profiler: Profiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.profiler.wants(scope):
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.time()
+        profile = RequestProfile(
+            f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime(started_at))}-{secrets.token_hex(4)}",
+            time.perf_counter(),
+        )
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                profile_header = (b"x-profile-id", profile.profile_id.encode())
+                message = {**message, "headers": [*message.get("headers", ()), profile_header]}
+            await send(message)
+
+        stats = None
+        if not self.profiler._cprofile_busy:
+            self.profiler._cprofile_busy = True
+            stats = cProfile.Profile()
+            stats.enable()
+        token = _current.set(profile)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            end = time.perf_counter()
+            _current.reset(token)
+            if stats is not None:
+                stats.disable()
+                self.profiler._cprofile_busy = False
+
+            summary = {
+                "profile_id": profile.profile_id,
+                "started_at": started_at,
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": getattr(scope.get("route"), "path", None),
+                "status": status,
+                "total_ms": _ms(end - profile.start),
+                "phases": [
+                    {
+                        "name": name,
+                        "offset_ms": _ms(phase_start - profile.start),
+                        "duration_ms": _ms(phase_end - phase_start),
+                    }
+                    for name, phase_start, phase_end in sorted(profile.phases, key=lambda p: p[1])
+                ],
+            }
+            # After the response has gone out, off the event loop
+            await run_in_threadpool(self.profiler.write, profile, summary, stats)
@@ -0,0 +1,300 @@
+"""Multi-process production server: preload the sizing data once, then fork workers.
+
+    python -m app.serve --host 0.0.0.0 --port 8000 --workers 4
+
+The master process imports the app and loads and validates the sizing data
+(from the snapshot when there is one) before binding the port, so bad data
+fails the deploy before any worker starts. It then forks ``--workers`` uvicorn
+workers (default: ``WEB_CONCURRENCY``, else the CPUs this process may use,
+counting the container's CPU quota), all accepting on the one listening
+socket. Workers get the loaded charts from the master's memory through
+copy-on-write instead of loading their own copies; the master freezes the
+garbage collector's view of them first so that collections in a worker don't
+write to, and so copy, those pages.
+
+Signals to the master:
+
+- ``SIGHUP``: rolling restart. The master reloads the sizing data (keeping
+  the current workers if it is invalid), then replaces workers one at a time:
+  each new worker has finished its startup before the old one is told to
+  stop, so capacity never drops by more than one worker.
+- ``SIGTERM`` / ``SIGINT``: graceful shutdown. Workers stop accepting, finish
+  in-flight requests (up to ``--graceful-timeout`` seconds) and run their
+  shutdown, then the master exits.
+
+A worker that dies is replaced. Each worker keeps its own caches, rate limits
+and metrics, so ``/metrics`` reports the worker that answered the scrape.
+"""
+
+import argparse
+import gc
+import logging
+import math
+import os
+import select
+import signal
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Seconds a new worker has to finish startup before it is killed and counted as failed
+WORKER_READY_TIMEOUT = 60
+# A worker that dies within this many seconds of starting is replaced only after a pause
+WORKER_MIN_LIFETIME = 5
+CGROUP_CPU_MAX = "/sys/fs/cgroup/cpu.max"
+
+
+def available_cpus(cpu_max_path: str = CGROUP_CPU_MAX) -> int:
+    """CPUs this process may run on, capped by a cgroup v2 CPU quota when one is set."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        quota, period = Path(cpu_max_path).read_text().split()
+    except (OSError, ValueError):
+        return max(1, cpus)
+    if quota != "max":
+        cpus = min(cpus, math.ceil(int(quota) / int(period)))
+    return max(1, cpus)
+
+
+def default_workers() -> int:
+    return int(os.getenv("WEB_CONCURRENCY", "0")) or available_cpus()
+
+
+def _bind(host: str, port: int, backlog: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(sock: socket.socket, ready_fd: int, graceful_timeout: float) -> None:
+    """Body of a forked worker; never returns."""
+    code = 1
+    try:
+        # The master handles these; uvicorn installs its own handlers while serving
+        for sig in (signal.SIGHUP, signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, signal.SIG_IGN)
+        import uvicorn
+
+        import app.main as main
+
+        main._logging.restart_after_fork()
+
+        class WorkerServer(uvicorn.Server):
+            async def startup(self, sockets=None):
+                await super().startup(sockets=sockets)
+                os.write(ready_fd, b"1")
+                os.close(ready_fd)
+
+        config = uvicorn.Config(
+            main.app,
+            lifespan="on",
+            access_log=False,
+            log_config=None,
+            timeout_graceful_shutdown=graceful_timeout,
+        )
+        WorkerServer(config).run(sockets=[sock])
+        code = 0
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else 1
+    except BaseException:
+        logger.exception("Worker %d crashed", os.getpid())
+    finally:
+        try:
+            import app.main as main
+
+            main._logging.stop()
+        finally:
+            os._exit(code)
+
+
+class Supervisor:
+    """Forks and watches the workers, and handles the master's signals."""
+
+    def __init__(self, sock: socket.socket, workers: int, graceful_timeout: float):
+        self.sock = sock
+        self.n_workers = workers
+        self.graceful_timeout = graceful_timeout
+        self.workers: dict[int, float] = {}  # pid -> start time
+        self._wake = threading.Event()
+        self._reload = False
+        self._stopping = False
+
+    def _on_signal(self, sig: int, frame) -> None:
+        if sig == signal.SIGHUP:
+            self._reload = True
+        else:
+            self._stopping = True
+        self._wake.set()
+
+    def spawn(self) -> int | None:
+        """Fork a worker and wait for it to finish startup; None if it failed to."""
+        import app.main as main
+
+        read_fd, write_fd = os.pipe()
+        # A writer thread holding the stdout lock at fork time would leave the
+        # child's copy of that lock held forever, so no thread may run across it
+        main._logging.stop()
+        try:
+            pid = os.fork()
+            if pid == 0:
+                os.close(read_fd)
+                _run_worker(self.sock, write_fd, self.graceful_timeout)
+        finally:
+            main._logging.start()
+        os.close(write_fd)
+        try:
+            readable, _, _ = select.select([read_fd], [], [], WORKER_READY_TIMEOUT)
+            ready = bool(readable) and os.read(read_fd, 1) == b"1"
+        finally:
+            os.close(read_fd)
+        if not ready:
+            logger.error("Worker %d failed to start", pid)
+            self._kill(pid)
+            return None
+        self.workers[pid] = time.monotonic()
+        logger.info("Worker %d started", pid)
+        return pid
+
+    def _kill(self, pid: int) -> None:
+        try:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        except (ProcessLookupError, ChildProcessError):
+            pass
+
+    def _stop_worker(self, pid: int) -> None:
+        """Ask a worker to shut down gracefully and wait for it, killing it if it overruns."""
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+        deadline = time.monotonic() + self.graceful_timeout + 5
+        while time.monotonic() < deadline:
+            try:
+                done, _ = os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError:
+                done = pid
+            if done:
+                break
+            time.sleep(0.05)
+        else:
+            logger.warning("Worker %d did not stop in time; killing it", pid)
+            self._kill(pid)
+        self.workers.pop(pid, None)
+
+    def _reap(self) -> None:
+        while self.workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if not pid:
+                return
+            started = self.workers.pop(pid, None)
+            if started is not None:
+                logger.error("Worker %d exited unexpectedly (status %d)", pid, status)
+                if time.monotonic() - started < WORKER_MIN_LIFETIME:
+                    time.sleep(1)
+
+    def rolling_restart(self) -> None:
+        import app.main as main
+
+        gc.unfreeze()
+        try:
+            main.preload_sizing_data()
+        except ValueError:
+            logger.exception("Sizing data reload failed; keeping the current workers")
+            return
+        finally:
+            gc.collect()
+            gc.freeze()
+        for old in list(self.workers):
+            if self._stopping:
+                return
+            if self.spawn() is None:
+                logger.error("Rolling restart stopped; worker %d keeps serving", old)
+                return
+            self._stop_worker(old)
+        logger.info("Rolling restart complete")
+
+    def run(self) -> int:
+        for sig in (signal.SIGHUP, signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, self._on_signal)
+        while not self._stopping:
+            self._reap()
+            while len(self.workers) < self.n_workers and not self._stopping:
+                if self.spawn() is None:
+                    time.sleep(1)
+            if self._reload:
+                self._reload = False
+                self.rolling_restart()
+            self._wake.wait(0.5)
+            self._wake.clear()
+
+        logger.info("Shutting down %d workers", len(self.workers))
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in list(self.workers):
+            self._stop_worker(pid)
+        return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=default_workers(),
+        help="worker processes (default: WEB_CONCURRENCY, else available CPUs)",
+    )
+    parser.add_argument(
+        "--graceful-timeout",
+        type=float,
+        default=30,
+        help="seconds a stopping worker may spend finishing in-flight requests",
+    )
+    parser.add_argument("--backlog", type=int, default=2048)
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be >= 1")
+
+    import app.main as app_main
+
+    try:
+        app_main.preload_sizing_data()
+    except ValueError:
+        logger.exception("Sizing data failed validation; not starting")
+        return 1
+    # Everything loaded so far is shared with the workers; keep the collector off it
+    gc.collect()
+    gc.freeze()
+
+    sock = _bind(args.host, args.port, args.backlog)
+    logger.info(
+        "Serving on %s:%d with %d workers (master %d)",
+        args.host,
+        args.port,
+        args.workers,
+        os.getpid(),
+    )
+    return Supervisor(sock, args.workers, args.graceful_timeout).run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+"""Score CSV exports offline, without the web app.
+
+Usage::
+
+    python -m app.sizing.bulk data orders.csv scored.csv --workers 4
+
+The input needs a ``product_type`` column. Columns named like a measurement
+field of any loaded chart are read as measurements (empty cells are skipped);
+every other column is copied through untouched. The output is the input row
+followed by ``recommended_size``, ``confidence``, ``notes`` and ``error``, in
+input order. Use ``-`` for stdin or stdout.
+
+Rows are read lazily and handed out in chunks to a process pool whose workers
+each load the sizing data once. At most ``2 * workers`` chunks are in flight,
+so memory stays bounded however large the file is. Throughput stats go to
+stderr when the run finishes.
+"""
+
+import argparse
+import contextlib
+import csv
+import itertools
+import os
+import sys
+import time
+from collections import deque
+from collections.abc import Iterator, Mapping
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from app.sizing.chart import CompiledChart
+from app.sizing.engine import recommend_size_batch
+from app.sizing.loader import compile_sizing_data, load_sizing_data
+
+OUTPUT_COLUMNS = ["recommended_size", "confidence", "notes", "error"]
+DEFAULT_CHUNK_ROWS = 2000
+
+# Set in each pool worker by _init_worker, or directly for in-process runs
+_worker_data: Mapping[str, CompiledChart] = {}
+
+
+def _init_worker(data_dir: str) -> None:
+    global _worker_data
+    _worker_data = compile_sizing_data(load_sizing_data(data_dir))
+
+
+def score_rows(
+    rows: list[list[str]],
+    product_column: int,
+    measurement_columns: list[tuple[int, str]],
+    sizing_data: Mapping[str, CompiledChart],
+) -> list[list[str]]:
+    """Score CSV rows; return one ``OUTPUT_COLUMNS`` list per row, in order."""
+    outputs: list[list[str]] = []
+    valid_positions: list[int] = []
+    valid_items: list[tuple[str, dict[str, float]]] = []
+
+    for i, row in enumerate(rows):
+        product_type = row[product_column].strip() if product_column < len(row) else ""
+        measurements: dict[str, float] = {}
+        error = ""
+        for col, name in measurement_columns:
+            cell = row[col].strip() if col < len(row) else ""
+            if not cell:
+                continue
+            try:
+                measurements[name] = float(cell)
+            except ValueError:
+                error = f"{name}: not a number: {cell!r}"
+                break
+
+        if not error and product_type not in sizing_data:
+            error = f"product_type: Unknown product type: {product_type}"
+        if not error and not measurements:
+            error = "measurements: no measurement columns have values"
+        outputs.append(["", "", "", error])
+        if not error:
+            valid_positions.append(i)
+            valid_items.append((product_type, measurements))
+
+    for i, result in zip(
+        valid_positions, recommend_size_batch(valid_items, sizing_data), strict=True
+    ):
+        outputs[i][:3] = [result["recommended_size"], result["confidence"], result["notes"]]
+    return outputs
+
+
+def _score_chunk(
+    rows: list[list[str]], product_column: int, measurement_columns: list[tuple[int, str]]
+) -> list[list[str]]:
+    return score_rows(rows, product_column, measurement_columns, _worker_data)
+
+
+def _chunks(rows: Iterator[list[str]], size: int) -> Iterator[list[list[str]]]:
+    while chunk := list(itertools.islice(rows, size)):
+        yield chunk
+
+
+def run(
+    data_dir: str,
+    infile,
+    outfile,
+    workers: int = 1,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> dict:
+    """Score ``infile`` into ``outfile``; return run stats.
+
+    ``workers`` of 1 scores in this process; more starts a process pool.
+    """
+    start = time.perf_counter()
+    reader = csv.reader(infile)
+    header = next(reader, None)
+    if header is None:
+        raise ValueError("Input CSV is empty")
+    if "product_type" not in header:
+        raise ValueError("Input CSV has no product_type column")
+
+    sizing_data = compile_sizing_data(load_sizing_data(data_dir))
+    known_fields = {field for chart in sizing_data.values() for field in chart.fields}
+    product_column = header.index("product_type")
+    measurement_columns = [(i, name) for i, name in enumerate(header) if name in known_fields]
+
+    writer = csv.writer(outfile, lineterminator="\n")
+    writer.writerow(header + OUTPUT_COLUMNS)
+    stats = {"rows": 0, "errors": 0, "workers": workers, "chunk_rows": chunk_rows}
+
+    def write(rows: list[list[str]], outputs: list[list[str]]) -> None:
+        for row, output in zip(rows, outputs, strict=True):
+            writer.writerow(row + output)
+            stats["errors"] += bool(output[3])
+        stats["rows"] += len(rows)
+
+    chunks = _chunks(reader, chunk_rows)
+    if workers <= 1:
+        for rows in chunks:
+            write(rows, score_rows(rows, product_column, measurement_columns, sizing_data))
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(data_dir,)) as pool:
+            # Bounded window of in-flight chunks, collected in submission order
+            pending: deque[tuple[list[list[str]], Future]] = deque()
+            for rows in chunks:
+                pending.append(
+                    (rows, pool.submit(_score_chunk, rows, product_column, measurement_columns))
+                )
+                if len(pending) >= 2 * workers:
+                    done_rows, future = pending.popleft()
+                    write(done_rows, future.result())
+            while pending:
+                done_rows, future = pending.popleft()
+                write(done_rows, future.result())
+
+    stats["seconds"] = round(time.perf_counter() - start, 3)
+    stats["rows_per_second"] = round(stats["rows"] / stats["seconds"]) if stats["seconds"] else 0
+    return stats
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("data_dir", help="directory of sizing chart JSON files")
+    parser.add_argument("input", help="input CSV, or - for stdin")
+    parser.add_argument("output", help="output CSV, or - for stdout")
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count() or 1, help="worker processes (1 = inline)"
+    )
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    args = parser.parse_args(argv)
+
+    with contextlib.ExitStack() as stack:
+        infile = (
+            sys.stdin
+            if args.input == "-"
+            else stack.enter_context(open(args.input, newline="", encoding="utf-8"))
+        )
+        outfile = (
+            sys.stdout
+            if args.output == "-"
+            else stack.enter_context(open(args.output, "w", newline="", encoding="utf-8"))
+        )
+        try:
+            stats = run(args.data_dir, infile, outfile, args.workers, args.chunk_rows)
+        except ValueError as e:
+            print(f"error: {e}", file=sys.stderr)
+            return 2
+
+    print(
+        f"Scored {stats['rows']} rows ({stats['errors']} errors) in {stats['seconds']:.2f}s: "
+        f"{stats['rows_per_second']} rows/s with {stats['workers']} workers, "
+        f"{stats['chunk_rows']} rows per chunk",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+"""Bounded memoization cache in front of the sizing engine."""
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+
+from app.sizing.chart import CompiledChart
+from app.sizing.engine import SizingResult, recommend_size
+
+EVICTION_POLICIES = ("lru", "fifo")
+
+CacheKey = tuple[str, tuple[tuple[str, float], ...]]
+
+
+def normalize_measurements(
+    measurements: dict[str, float], precision: int
+) -> tuple[tuple[str, float], ...]:
+    """Canonical, order-independent form of a measurement dict.
+
+    Values are rounded to ``precision`` decimal places and coerced to float, so
+    ``{"a": 165}``, ``{"a": 165.0}`` and ``{"a": 165.001}`` (at precision 2) share a key.
+    """
+    return tuple(
+        sorted((name, round(float(value), precision) + 0.0) for name, value in measurements.items())
+    )
+
+
+class RecommendationCache:
+    """LRU/FIFO cache of ``recommend_size`` results with optional TTL.
+
+    Keys are the product type plus the normalized measurements, and the engine is
+    always run on the normalized values, so a cached answer is exactly what an
+    uncached call with the same key would return. The cache remembers which
+    sizing dataset it was filled from and clears itself when a different one is
+    passed in. Cached result dicts are shared between callers and must not be
+    mutated.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 4096,
+        ttl_seconds: float = 0,
+        policy: str = "lru",
+        precision: int = 2,
+    ):
+        if maxsize < 0:
+            raise ValueError("maxsize must be >= 0")
+        if policy not in EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy: {policy}")
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.policy = policy
+        self.precision = precision
+
+        self._entries: OrderedDict[CacheKey, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._sizing_data: Mapping | None = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def recommend(
+        self,
+        product_type: str,
+        measurements: dict[str, float],
+        sizing_data: Mapping[str, CompiledChart | list[dict]],
+    ) -> SizingResult:
+        """Return the cached recommendation, computing and storing it on a miss."""
+        normalized = normalize_measurements(measurements, self.precision)
+        if self.maxsize == 0:
+            return recommend_size(product_type, dict(normalized), sizing_data)
+
+        key = (product_type, normalized)
+        now = time.monotonic()
+        with self._lock:
+            result = self._lookup(key, sizing_data, now)
+            if result is not None:
+                return result
+            self.misses += 1
+
+        result = recommend_size(product_type, dict(normalized), sizing_data)
+
+        with self._lock:
+            # Don't store a result computed against data that was swapped out meanwhile
+            if sizing_data is self._sizing_data:
+                self._entries[key] = (now, result)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return result
+
+    def get(
+        self,
+        product_type: str,
+        measurements: dict[str, float],
+        sizing_data: Mapping[str, CompiledChart | list[dict]],
+    ) -> SizingResult | None:
+        """Return the cached recommendation, or None without computing it.
+
+        A hit is counted; a miss is left for the ``recommend`` call that follows it.
+        """
+        if self.maxsize == 0:
+            return None
+        key = (product_type, normalize_measurements(measurements, self.precision))
+        with self._lock:
+            return self._lookup(key, sizing_data, time.monotonic())
+
+    def _lookup(self, key: CacheKey, sizing_data: Mapping, now: float) -> SizingResult | None:
+        # Caller holds the lock
+        if sizing_data is not self._sizing_data:
+            self._invalidate(sizing_data)
+        entry = self._entries.get(key)
+        if entry is not None and (not self.ttl_seconds or now - entry[0] < self.ttl_seconds):
+            self.hits += 1
+            if self.policy == "lru":
+                self._entries.move_to_end(key)
+            return entry[1]
+        return None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _invalidate(self, sizing_data: Mapping) -> None:
+        if self._sizing_data is not None:
+            self.invalidations += 1
+        self._entries.clear()
+        self._sizing_data = sizing_data
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "policy": self.policy,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,130 @@
+"""Compiled, array-backed representation of a product's sizing chart."""
+
+import hashlib
+import json
+from array import array
+from dataclasses import dataclass, field
+
+from app.sizing.index import SizeIndex, build_size_index
+
+_UNBUILT = object()
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledChart:
+    """A sizing chart compiled into a fixed field order with flat range arrays.
+
+    Row ``r`` of the chart covers indices ``r * len(fields)`` through
+    ``(r + 1) * len(fields) - 1`` of ``mins``, ``maxs``, ``spans`` and ``present``.
+    ``present`` is 1 where the size defines a range for that field. The arrays are
+    memoryviews when the chart is attached from a shared snapshot.
+    """
+
+    product_type: str
+    sizes: tuple[str, ...]
+    fields: tuple[str, ...]
+    mins: array | memoryview
+    maxs: array | memoryview
+    spans: array | memoryview
+    present: bytes | memoryview
+    _size_index: object = field(init=False, repr=False, compare=False, default=_UNBUILT)
+    _content_hash: str = field(init=False, repr=False, compare=False, default="")
+    _decision_grid: object = field(init=False, repr=False, compare=False, default=None)
+
+    @property
+    def content_hash(self) -> str:
+        """Hex digest of the chart's sizes, fields and ranges; changes whenever they do."""
+        if not self._content_hash:
+            digest = hashlib.sha256()
+            digest.update(json.dumps([self.product_type, self.sizes, self.fields]).encode())
+            for block in (self.mins, self.maxs, self.present):
+                digest.update(bytes(block))
+            object.__setattr__(self, "_content_hash", digest.hexdigest()[:32])
+        return self._content_hash
+
+    @property
+    def size_index(self) -> SizeIndex | None:
+        """Sorted boundary index, built on first use; None for small or sparse charts."""
+        if self._size_index is _UNBUILT:
+            object.__setattr__(self, "_size_index", build_size_index(self))
+        return self._size_index
+
+    @property
+    def decision_grid(self):
+        """Precomputed ``DecisionGrid``, if ``attach_decision_grids`` gave the chart one."""
+        return self._decision_grid
+
+    @property
+    def n_sizes(self) -> int:
+        return len(self.sizes)
+
+    @property
+    def n_fields(self) -> int:
+        return len(self.fields)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the chart's arrays and labels."""
+        labels = sum(len(label) for label in self.sizes) + sum(len(name) for name in self.fields)
+        return 3 * 8 * len(self.mins) + len(self.present) + labels
+
+    def columns_for(self, measurements: dict[str, float]) -> list[tuple[int, float]]:
+        """Return (field index, value) pairs for the measurements this chart knows about.
+
+        Pairs come back in chart field order so penalties are always summed in the
+        same order, whatever order the caller's dict happens to be in.
+        """
+        return [
+            (i, measurements[name]) for i, name in enumerate(self.fields) if name in measurements
+        ]
+
+    def to_entries(self) -> list[dict]:
+        """Rebuild the original list-of-dicts form of the chart."""
+        n_fields = self.n_fields
+        entries = []
+        for row, size in enumerate(self.sizes):
+            base = row * n_fields
+            measurements = {}
+            for col, name in enumerate(self.fields):
+                cell = base + col
+                if self.present[cell]:
+                    measurements[name] = {"min": self.mins[cell], "max": self.maxs[cell]}
+            entries.append({"size": size, "measurements": measurements})
+        return entries
+
+
+def compile_chart(product_type: str, size_entries: list[dict]) -> CompiledChart:
+    """Compile validated size entries into a ``CompiledChart``.
+
+    Fields are ordered alphabetically; sizes keep their order from the source file,
+    which the engine relies on for tie-breaking.
+    """
+    fields = sorted({name for entry in size_entries for name in entry["measurements"]})
+    n_fields = len(fields)
+    cells = len(size_entries) * n_fields
+
+    mins = array("d", bytes(8 * cells))
+    maxs = array("d", bytes(8 * cells))
+    spans = array("d", bytes(8 * cells))
+    present = bytearray(cells)
+
+    for row, entry in enumerate(size_entries):
+        base = row * n_fields
+        for col, name in enumerate(fields):
+            range_obj = entry["measurements"].get(name)
+            if range_obj is None:
+                continue
+            mins[base + col] = range_obj["min"]
+            maxs[base + col] = range_obj["max"]
+            spans[base + col] = range_obj["max"] - range_obj["min"]
+            present[base + col] = 1
+
+    return CompiledChart(
+        product_type=product_type,
+        sizes=tuple(entry["size"] for entry in size_entries),
+        fields=tuple(fields),
+        mins=mins,
+        maxs=maxs,
+        spans=spans,
+        present=bytes(present),
+    )
@@ -1,5 +1,47 @@
 """Core sizing logic: match measurements against loaded sizing data."""
 
+import math
+from collections.abc import Mapping
+from typing import Literal, TypedDict
+
+from app.sizing.chart import CompiledChart, compile_chart
+from app.sizing.index import SizeIndex
+
+# A size that isn't an exact match is "interpolated" while its summed penalty
+# (distance outside each range, in units of that range's width) is at most this
+INTERPOLATED_MAX_PENALTY = 0.5
+# An interpolated best size mentions the runner-up when their penalties are closer than this
+BETWEEN_SIZES_MAX_GAP = 0.3
+
+# Notes attached to recommendations; exported with charts so clients word them identically
+NOTE_BETWEEN_SIZES = (
+    "You're between sizes {best} and {second}. "
+    "We recommend {best}, but consider sizing up to "
+    "{second} for a more comfortable fit."
+)
+NOTE_CLOSE = (
+    "Your measurements are close to size {best} but not an exact match. "
+    "Consider sizing up for comfort."
+)
+NOTE_OUT_OF_RANGE = (
+    "Your measurements fall outside the standard size range. "
+    "The closest size is {best}. "
+    "Please contact info@solideaus.com for personalized assistance."
+)
+NOTE_IRRELEVANT = (
+    "None of the provided measurements ({provided}) are relevant for {product_type}. "
+    "Expected: {expected}"
+)
+
+
+class SizingResult(TypedDict):
+    """A recommendation as returned by the engine; same fields, in the same order,
+    as ``SizingResponse``, so it can be encoded to JSON without a model."""
+
+    recommended_size: str
+    confidence: Literal["exact", "interpolated", "out_of_range"]
+    notes: str
+
 
 def _score_size(size_entry: dict, measurements: dict[str, float]) -> tuple[str, float, int]:
     """Score how well a set of measurements matches a size entry.
@@ -38,7 +80,7 @@ def _score_size(size_entry: dict, measurements: dict[str, float]) -> tuple[str,
 
     if matched_count == len(common_fields):
         status = "exact"
-    elif total_penalty <= 0.5:
+    elif total_penalty <= INTERPOLATED_MAX_PENALTY:
         status = "interpolated"
     else:
         status = "out_of_range"
@@ -46,84 +88,323 @@ def _score_size(size_entry: dict, measurements: dict[str, float]) -> tuple[str,
     return (status, total_penalty, matched_count)
 
 
-def recommend_size(
-    product_type: str,
-    measurements: dict[str, float],
-    sizing_data: dict[str, list[dict]],
-) -> dict:
-    """Find the best matching size for given measurements.
+def _score_row(
+    chart: CompiledChart, row: int, columns: list[tuple[int, float]]
+) -> tuple[str, float, int]:
+    """Score one row of a compiled chart; same contract as ``_score_size``."""
+    mins = chart.mins
+    maxs = chart.maxs
+    spans = chart.spans
+    present = chart.present
+    base = row * chart.n_fields
 
-    Returns a dict with recommended_size, confidence, and notes.
+    common_count = 0
+    total_penalty = 0.0
+    matched_count = 0
+
+    for col, value in columns:
+        cell = base + col
+        if not present[cell]:
+            continue
+        common_count += 1
+        range_min = mins[cell]
+        range_max = maxs[cell]
+
+        if range_min <= value <= range_max:
+            matched_count += 1
+        elif value < range_min:
+            span = spans[cell]
+            total_penalty += (range_min - value) / span if span else abs(range_min - value)
+        else:
+            span = spans[cell]
+            total_penalty += (value - range_max) / span if span else abs(value - range_max)
+
+    if not common_count:
+        return ("out_of_range", float("inf"), 0)
+
+    if matched_count == common_count:
+        status = "exact"
+    elif total_penalty <= INTERPOLATED_MAX_PENALTY:
+        status = "interpolated"
+    else:
+        status = "out_of_range"
+
+    return (status, total_penalty, matched_count)
+
+
+def _rank_top_two(
+    chart: CompiledChart, columns: list[tuple[int, float]]
+) -> tuple[tuple[int, str, float, int], tuple[int, str, float, int] | None]:
+    """Return the best and runner-up (row, status, penalty, matched) for the measurements.
+
+    Equivalent to a stable sort on (not exact, penalty, -matched) followed by taking
+    the first two rows, without building or sorting the full scored list.
     """
-    if product_type not in sizing_data:
-        return {
-            "recommended_size": "",
-            "confidence": "out_of_range",
-            "notes": f"Unknown product type: {product_type}",
-        }
+    best = second = None
+    best_key = second_key = None
 
-    size_entries = sizing_data[product_type]
+    for row in range(chart.n_sizes):
+        status, penalty, matched = _score_row(chart, row, columns)
+        key = (status != "exact", penalty, -matched)
+        if best_key is None or key < best_key:
+            second, second_key = best, best_key
+            best, best_key = (row, status, penalty, matched), key
+        elif second_key is None or key < second_key:
+            second, second_key = (row, status, penalty, matched), key
 
-    # Check that at least one provided measurement is relevant
-    all_fields: set[str] = set()
-    for entry in size_entries:
-        all_fields.update(entry["measurements"].keys())
+    return best, second
 
-    provided_fields = set(measurements.keys())
-    relevant_fields = all_fields & provided_fields
-    if not relevant_fields:
-        return {
-            "recommended_size": "",
-            "confidence": "out_of_range",
-            "notes": (
-                f"None of the provided measurements ({', '.join(sorted(provided_fields))}) "
-                f"are relevant for {product_type}. "
-                f"Expected: {', '.join(sorted(all_fields))}"
-            ),
-        }
-
-    # Score each size
-    scored: list[tuple[dict, str, float, int]] = []
-    for entry in size_entries:
-        status, penalty, matched = _score_size(entry, measurements)
-        scored.append((entry, status, penalty, matched))
-
-    # Sort: prefer exact matches, then fewest penalty, then most matched fields
-    scored.sort(key=lambda x: (x[1] != "exact", x[2], -x[3]))
-
-    best_entry, best_status, best_penalty, best_matched = scored[0]
-    best_size = best_entry["size"]
+
+def _rank_top_two_indexed(
+    chart: CompiledChart, index: SizeIndex, columns: list[tuple[int, float]]
+) -> tuple[tuple[int, str, float, int], tuple[int, str, float, int] | None]:
+    """Same result as ``_rank_top_two``, visiting only the rows nearest the measurements.
+
+    Rows are pulled round-robin from each provided field's ``rows_nearest`` stream
+    and scored in full when first seen. Every unseen row is at least the current
+    stream distance away on each field, so its penalty is at least
+    ``sum(distance / max_span)`` over the fields. Once that bound exceeds the
+    runner-up's penalty (or, for exact matches, once every in-range row has been
+    seen), no unseen row can displace the top two and the scan stops. Ties are
+    broken by row order, as in the linear scan. If the bound still hasn't
+    stopped the scan after ``index.max_visited`` rows, it isn't pruning and the
+    rest is cheaper as a plain ``_rank_top_two``.
+    """
+    streams = [index.fields[col].rows_nearest(value) for col, value in columns]
+    max_spans = [index.fields[col].max_span for col, _ in columns]
+    frontier = [0.0] * len(streams)
+    live = list(range(len(streams)))
+    seen: set[int] = set()
+    best = second = None
+    best_key = second_key = None
+
+    while live:
+        for slot in list(live):
+            item = next(streams[slot], None)
+            if item is None:
+                live.remove(slot)
+                frontier[slot] = math.inf
+                continue
+            row, frontier[slot] = item
+            if row in seen:
+                continue
+            seen.add(row)
+            status, penalty, matched = _score_row(chart, row, columns)
+            key = (status != "exact", penalty, -matched, row)
+            if best_key is None or key < best_key:
+                second, second_key = best, best_key
+                best, best_key = (row, status, penalty, matched), key
+            elif second_key is None or key < second_key:
+                second, second_key = (row, status, penalty, matched), key
+
+        if len(seen) == chart.n_sizes:
+            break
+        bound = 0.0
+        for distance, max_span in zip(frontier, max_spans, strict=True):
+            bound += distance / max_span
+        if second_key is not None and bound > 0 and second_key[1] < bound:
+            break
+        if len(seen) >= index.max_visited:
+            return _rank_top_two(chart, columns)
+
+    return best, second
+
+
+def _build_result(
+    chart: CompiledChart,
+    best: tuple[int, str, float, int],
+    second: tuple[int, str, float, int] | None,
+) -> SizingResult:
+    """Turn the ranked rows into the recommendation dict returned by ``recommend_size``."""
+    best_row, best_status, best_penalty, _ = best
+    best_size = chart.sizes[best_row]
 
     notes = ""
     if best_status == "interpolated":
         # Check if there's a second candidate close by
-        if len(scored) > 1:
-            second = scored[1]
-            if second[1] in ("exact", "interpolated") and abs(second[2] - best_penalty) < 0.3:
-                notes = (
-                    f"You're between sizes {best_size} and {second[0]['size']}. "
-                    f"We recommend {best_size}, but consider sizing up to "
-                    f"{second[0]['size']} for a more comfortable fit."
-                )
-            else:
-                notes = (
-                    f"Your measurements are close to size {best_size} but not an exact match. "
-                    f"Consider sizing up for comfort."
-                )
+        if (
+            second is not None
+            and second[1] in ("exact", "interpolated")
+            and abs(second[2] - best_penalty) < BETWEEN_SIZES_MAX_GAP
+        ):
+            notes = NOTE_BETWEEN_SIZES.format(best=best_size, second=chart.sizes[second[0]])
         else:
-            notes = (
-                f"Your measurements are close to size {best_size} but not an exact match. "
-                f"Consider sizing up for comfort."
-            )
+            notes = NOTE_CLOSE.format(best=best_size)
     elif best_status == "out_of_range":
-        notes = (
-            f"Your measurements fall outside the standard size range. "
-            f"The closest size is {best_size}. "
-            f"Please contact info@solideaus.com for personalized assistance."
-        )
+        notes = NOTE_OUT_OF_RANGE.format(best=best_size)
 
     return {
         "recommended_size": best_size,
         "confidence": best_status,
         "notes": notes,
     }
+
+
+def _unknown_product_result(product_type: str) -> SizingResult:
+    return {
+        "recommended_size": "",
+        "confidence": "out_of_range",
+        "notes": f"Unknown product type: {product_type}",
+    }
+
+
+def _irrelevant_measurements_result(
+    chart: CompiledChart, measurements: dict[str, float]
+) -> SizingResult:
+    return {
+        "recommended_size": "",
+        "confidence": "out_of_range",
+        "notes": NOTE_IRRELEVANT.format(
+            provided=", ".join(sorted(measurements)),
+            product_type=chart.product_type,
+            expected=", ".join(chart.fields),
+        ),
+    }
+
+
+def recommend_size(
+    product_type: str,
+    measurements: dict[str, float],
+    sizing_data: Mapping[str, CompiledChart | list[dict]],
+) -> SizingResult:
+    """Find the best matching size for given measurements.
+
+    ``sizing_data`` maps product type to either a compiled chart (as produced by
+    ``compile_sizing_data``) or the raw list of size entries, which is compiled
+    on the fly. Charts with a decision grid answer measurements on its lattice
+    from the grid.
+
+    Returns a dict with recommended_size, confidence, and notes.
+    """
+    if product_type not in sizing_data:
+        return _unknown_product_result(product_type)
+
+    chart = sizing_data[product_type]
+    if not isinstance(chart, CompiledChart):
+        chart = compile_chart(product_type, chart)
+
+    # Check that at least one provided measurement is relevant
+    columns = chart.columns_for(measurements)
+    if not columns:
+        return _irrelevant_measurements_result(chart, measurements)
+
+    grid = chart.decision_grid
+    if grid is not None:
+        result = grid.lookup(columns)
+        if result is not None:
+            return result
+
+    index = chart.size_index
+    if index is not None and all(math.isfinite(value) for _, value in columns):
+        best, second = _rank_top_two_indexed(chart, index, columns)
+    else:
+        best, second = _rank_top_two(chart, columns)
+    return _build_result(chart, best, second)
+
+
+def recommend_sizes(
+    product_type: str,
+    measurement_sets: list[dict[str, float]],
+    sizing_data: Mapping[str, CompiledChart | list[dict]],
+) -> list[SizingResult]:
+    """Score many measurement sets for one product type in a single pass.
+
+    The measurements are laid out as one value column per chart field, and each
+    size row is applied to the whole column at once instead of re-walking the
+    chart per item. Results match calling ``recommend_size`` for each item.
+    """
+    if product_type not in sizing_data:
+        return [_unknown_product_result(product_type) for _ in measurement_sets]
+
+    chart = sizing_data[product_type]
+    if not isinstance(chart, CompiledChart):
+        chart = compile_chart(product_type, chart)
+
+    n_items = len(measurement_sets)
+    n_fields = chart.n_fields
+    mins, maxs, spans, present = chart.mins, chart.maxs, chart.spans, chart.present
+
+    # Measurements matrix: one column per chart field, None where not provided
+    columns = [[m.get(name) for m in measurement_sets] for name in chart.fields]
+    relevant = [False] * n_items
+    for values in columns:
+        for i, value in enumerate(values):
+            if value is not None:
+                relevant[i] = True
+
+    best: list[tuple[int, str, float, int] | None] = [None] * n_items
+    second: list[tuple[int, str, float, int] | None] = [None] * n_items
+    best_key: list[tuple | None] = [None] * n_items
+    second_key: list[tuple | None] = [None] * n_items
+
+    for row in range(chart.n_sizes):
+        base = row * n_fields
+        common = [0] * n_items
+        matched = [0] * n_items
+        penalty = [0.0] * n_items
+
+        for col, values in enumerate(columns):
+            cell = base + col
+            if not present[cell]:
+                continue
+            range_min = mins[cell]
+            range_max = maxs[cell]
+            span = spans[cell]
+            for i, value in enumerate(values):
+                if value is None:
+                    continue
+                common[i] += 1
+                if range_min <= value <= range_max:
+                    matched[i] += 1
+                elif value < range_min:
+                    penalty[i] += (range_min - value) / span if span else abs(range_min - value)
+                else:
+                    penalty[i] += (value - range_max) / span if span else abs(value - range_max)
+
+        for i in range(n_items):
+            if not common[i]:
+                status, item_penalty, item_matched = "out_of_range", float("inf"), 0
+            else:
+                item_penalty, item_matched = penalty[i], matched[i]
+                if item_matched == common[i]:
+                    status = "exact"
+                elif item_penalty <= INTERPOLATED_MAX_PENALTY:
+                    status = "interpolated"
+                else:
+                    status = "out_of_range"
+
+            key = (status != "exact", item_penalty, -item_matched)
+            scored = (row, status, item_penalty, item_matched)
+            if best_key[i] is None or key < best_key[i]:
+                second[i], second_key[i] = best[i], best_key[i]
+                best[i], best_key[i] = scored, key
+            elif second_key[i] is None or key < second_key[i]:
+                second[i], second_key[i] = scored, key
+
+    return [
+        _build_result(chart, best[i], second[i])
+        if relevant[i]
+        else _irrelevant_measurements_result(chart, measurement_sets[i])
+        for i in range(n_items)
+    ]
+
+
+def recommend_size_batch(
+    items: list[tuple[str, dict[str, float]]],
+    sizing_data: Mapping[str, CompiledChart | list[dict]],
+) -> list[SizingResult]:
+    """Score (product_type, measurements) pairs, possibly for mixed product types.
+
+    Items are grouped by product type, each group is scored with ``recommend_sizes``,
+    and results are returned in input order.
+    """
+    groups: dict[str, list[int]] = {}
+    for i, (product_type, _) in enumerate(items):
+        groups.setdefault(product_type, []).append(i)
+
+    results: list[dict] = [{}] * len(items)
+    for product_type, positions in groups.items():
+        group_results = recommend_sizes(product_type, [items[i][1] for i in positions], sizing_data)
+        for i, result in zip(positions, group_results, strict=True):
+            results[i] = result
+    return results
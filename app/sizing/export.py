@@ -0,0 +1,91 @@
+"""Compact, versioned export of a compiled chart for client-side evaluation.
+
+The export carries everything ``recommend_size`` uses for one product: the
+range grid, the penalty thresholds and the note templates. A client that
+implements the same scoring (``widget/sizing-widget.js`` does) reaches the same
+result as the API. ``version`` is the chart's content hash, so an export URL
+that includes it never changes and can be cached indefinitely.
+
+Layout (``format`` 1)::
+
+    {
+      "format": 1,
+      "product_type": "socks",
+      "version": "<export_version(chart)>",
+      "fields": ["ankle_circumference_cm", "calf_circumference_cm"],
+      "sizes": ["S", "M", "L"],
+      "min": [18, 28, ...],     # row-major, len(sizes) * len(fields); null = undefined
+      "max": [21, 33, ...],
+      "thresholds": {"interpolated_max_penalty": 0.5, "between_sizes_max_gap": 0.3},
+      "notes": {"between_sizes": "...", "close": "...", ...}
+    }
+
+Bump ``EXPORT_FORMAT`` whenever the layout or the scoring rules change, so
+clients that only know the old rules fall back to the API.
+"""
+
+import hashlib
+import json
+
+from app.sizing.chart import CompiledChart
+from app.sizing.engine import (
+    BETWEEN_SIZES_MAX_GAP,
+    INTERPOLATED_MAX_PENALTY,
+    NOTE_BETWEEN_SIZES,
+    NOTE_CLOSE,
+    NOTE_IRRELEVANT,
+    NOTE_OUT_OF_RANGE,
+)
+
+EXPORT_FORMAT = 1
+
+
+def _number(value: float) -> float | int:
+    # Whole numbers as ints keep the export short; JSON readers parse both the same
+    return int(value) if value.is_integer() else value
+
+
+def _rules() -> dict:
+    """Everything in an export besides the chart itself."""
+    return {
+        "format": EXPORT_FORMAT,
+        "thresholds": {
+            "interpolated_max_penalty": INTERPOLATED_MAX_PENALTY,
+            "between_sizes_max_gap": BETWEEN_SIZES_MAX_GAP,
+        },
+        "notes": {
+            "between_sizes": NOTE_BETWEEN_SIZES,
+            "close": NOTE_CLOSE,
+            "out_of_range": NOTE_OUT_OF_RANGE,
+            "irrelevant": NOTE_IRRELEVANT,
+        },
+    }
+
+
+def _rules_digest(rules: dict) -> str:
+    return hashlib.sha256(json.dumps(rules, sort_keys=True).encode()).hexdigest()
+
+
+RULES_DIGEST = _rules_digest(_rules())
+
+
+def export_version(chart: CompiledChart) -> str:
+    """Version of ``chart``'s export: changes with the chart, the format, thresholds or notes."""
+    return hashlib.sha256(f"{chart.content_hash}|{RULES_DIGEST}".encode()).hexdigest()[:32]
+
+
+def export_chart(chart: CompiledChart) -> dict:
+    """Return the format-``EXPORT_FORMAT`` export of ``chart`` as a JSON-ready dict."""
+    present = chart.present
+    rules = _rules()
+    return {
+        "format": rules["format"],
+        "product_type": chart.product_type,
+        "version": export_version(chart),
+        "fields": list(chart.fields),
+        "sizes": list(chart.sizes),
+        "min": [_number(v) if present[i] else None for i, v in enumerate(chart.mins)],
+        "max": [_number(v) if present[i] else None for i, v in enumerate(chart.maxs)],
+        "thresholds": rules["thresholds"],
+        "notes": rules["notes"],
+    }
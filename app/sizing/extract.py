@@ -0,0 +1,165 @@
+"""Pull a product type and measurements out of a free-text sizing inquiry email.
+
+This replaces the regexes in the n8n workflow's "Parse Email" node, with a
+few fixes: "underbust" no longer also counts as "bust", sentences like "I'm
+5'6" and weigh 140 lbs" or "my waist is 28 inches" are understood, and
+values given in inches, feet or pounds are converted to the chart's units.
+Values without a unit are taken as centimetres and kilograms, as before,
+except that circumferences are read as inches when every unit in the same
+email is imperial (inches, a feet-and-inches height or pounds), and a height
+below 100 as inches.
+
+All patterns are compiled once at import, so scoring a backlog of emails
+spends its time matching rather than compiling.
+"""
+
+import re
+from collections.abc import Iterable
+from typing import TypedDict
+
+CM_PER_INCH = 2.54
+KG_PER_POUND = 0.45359237
+
+# Checked in order; the first product mentioned in the subject or body wins
+PRODUCT_KEYWORDS = {
+    "arm_sleeves": ("arm sleeve", "arm sleeves", "arm-sleeve", "arm-sleeves", "armsleeve"),
+    "leggings": ("legging", "leggings"),
+    "capris": ("capri", "capris"),
+    "socks": ("sock", "socks", "knee-high", "knee high"),
+    "bras": ("bra", "bras"),
+}
+
+MEASUREMENT_KEYWORDS = {
+    "height_cm": r"height|tall",
+    "weight_kg": r"weight|weigh|weighs",
+    "hip_circumference_cm": r"hips?",
+    "waist_circumference_cm": r"waist",
+    "underbust_circumference_cm": r"under[\s-]?bust|band",
+    "bust_circumference_cm": r"(?<!under)(?<!under-)(?<!under )bust|chest",
+    "upper_arm_circumference_cm": r"upper[\s-]?arms?|biceps?",
+    "forearm_circumference_cm": r"forearms?",
+    "wrist_circumference_cm": r"wrists?",
+    "calf_circumference_cm": r"calf|calves",
+    "ankle_circumference_cm": r"ankles?",
+}
+
+_NUMBER = r"(\d{1,3}(?:[.,]\d{1,2})?)"
+_UNIT = (
+    r"\s*(cm|centimet(?:er|re)s?|mm|in(?:ch(?:es)?)?\b|\"|''|"
+    r"kg|kilo(?:gram)?s?|lbs?\b|pounds?)?"
+)
+# "waist: 70cm", "waist is 28 inches", "hips are about 93 cm", "weigh 140 lbs"
+_FILLER = r"(?:\s+(?:is|are|was|of|measures?|measurement|circumference|around|about|approx\.?))*"
+_MEASUREMENT_PATTERNS = {
+    field: re.compile(rf"\b(?:{keywords})\b{_FILLER}\s*[:=-]?\s*{_NUMBER}{_UNIT}", re.IGNORECASE)
+    for field, keywords in MEASUREMENT_KEYWORDS.items()
+}
+# "170cm tall", "65 kg" (a weight can only be in kg or lbs, so the unit identifies it)
+_TRAILING_HEIGHT = re.compile(rf"{_NUMBER}{_UNIT}\s+tall\b", re.IGNORECASE)
+_BARE_WEIGHT = re.compile(r"\b(\d{2,3}(?:[.,]\d)?)\s*(kg|kilo(?:gram)?s?|lbs?|pounds?)\b", re.I)
+# "5'6", "5 ft 6 in", "5 foot 6", "5'"
+_FEET_INCHES = re.compile(
+    r"\b([4-7])\s*(?:'|’|ft\b|feet\b|foot\b)\s*"
+    r"(?:(\d{1,2}(?:\.\d)?)\s*(?:\"|”|''|in\b|inch(?:es)?\b)?)?",
+    re.IGNORECASE,
+)
+# A unitless height below this many centimetres is read as inches ("height: 64")
+MIN_UNITLESS_HEIGHT_CM = 100
+
+_PRODUCT_PATTERNS = {
+    product: re.compile(r"\b(?:" + "|".join(re.escape(k) for k in keywords) + r")\b", re.IGNORECASE)
+    for product, keywords in PRODUCT_KEYWORDS.items()
+}
+
+
+class ExtractedRequest(TypedDict):
+    """What was found in one email; ``product_type`` is None when none was recognized."""
+
+    product_type: str | None
+    measurements: dict[str, float]
+
+
+_INCH_UNITS = ("in", "inch", "inches", '"', "''")
+
+
+def _to_chart_units(field: str, value: float, unit: str | None, default_length: str) -> float:
+    unit = (unit or "").lower()
+    if field == "weight_kg":
+        if unit.startswith(("lb", "pound")):
+            value *= KG_PER_POUND
+    elif field == "height_cm" and not unit:
+        if value < MIN_UNITLESS_HEIGHT_CM:
+            value *= CM_PER_INCH
+    elif unit in _INCH_UNITS or (not unit and default_length == "in"):
+        value *= CM_PER_INCH
+    elif unit == "mm":
+        value /= 10
+    return round(value, 1)
+
+
+def _number(text: str) -> float:
+    return float(text.replace(",", "."))
+
+
+def detect_product_type(text: str, product_types: Iterable[str] = ()) -> str | None:
+    """Return the first core product mentioned in ``text``, else any of ``product_types``
+    whose name (underscores read as spaces) appears in it."""
+    for product, pattern in _PRODUCT_PATTERNS.items():
+        if pattern.search(text):
+            return product
+    lowered = text.lower()
+    for product in product_types:
+        name = product.replace("_", " ")
+        if product not in PRODUCT_KEYWORDS and re.search(rf"\b{re.escape(name)}\b", lowered):
+            return product
+    return None
+
+
+def extract_measurements(text: str) -> dict[str, float]:
+    """Measurements mentioned in ``text``, converted to centimetres and kilograms."""
+    found: dict[str, tuple[float, str | None]] = {}
+    for field, pattern in _MEASUREMENT_PATTERNS.items():
+        match = pattern.search(text)
+        if match:
+            found[field] = (_number(match[1]), match[2])
+
+    height_cm = None
+    feet = _FEET_INCHES.search(text)
+    if feet:
+        # Checked first: "height 5 ft 4" would otherwise read as 5 (cm)
+        inches = int(feet[1]) * 12 + (_number(feet[2]) if feet[2] else 0)
+        height_cm = round(inches * CM_PER_INCH, 1)
+        found.pop("height_cm", None)
+    elif "height_cm" not in found:
+        tall = _TRAILING_HEIGHT.search(text)
+        if tall:
+            found["height_cm"] = (_number(tall[1]), tall[2])
+    if "weight_kg" not in found:
+        weight = _BARE_WEIGHT.search(text)
+        if weight:
+            found["weight_kg"] = (_number(weight[1]), weight[2])
+
+    # Unitless circumferences follow the email's explicit units when those are all
+    # imperial: inches, a feet-and-inches height or pounds
+    units = {(unit or "").lower() for _, unit in found.values() if unit}
+    imperial = feet is not None or any(
+        unit in _INCH_UNITS or unit.startswith(("lb", "pound")) for unit in units
+    )
+    metric = any(unit.startswith(("c", "m", "k")) for unit in units)
+    default_length = "in" if imperial and not metric else "cm"
+
+    measurements = {
+        field: _to_chart_units(field, value, unit, default_length)
+        for field, (value, unit) in found.items()
+    }
+    if height_cm is not None:
+        measurements["height_cm"] = height_cm
+    return measurements
+
+
+def extract_request(subject: str, body: str, product_types: Iterable[str] = ()) -> ExtractedRequest:
+    """Product type (from the subject or body) and measurements (from the body) of one email."""
+    return {
+        "product_type": detect_product_type(f"{subject}\n{body}", product_types),
+        "measurements": extract_measurements(body),
+    }
@@ -0,0 +1,224 @@
+"""Dense precomputed decision grids for charts with two measurement fields.
+
+Socks (calf/ankle) and bras (bust/underbust) have two fields with bounded
+ranges, so every answer the engine can give for them on a fine lattice fits in
+a small table. ``DecisionGrid`` stores the recommended size, confidence and
+note for each lattice point, and ``lookup`` answers with one index instead of
+scoring every size.
+
+Cells are single lattice points rather than intervals: the engine's answer
+changes wherever two sizes' penalties cross, and those lines run between chart
+boundaries, so no interval cell could be answered exactly. Values off the
+lattice (30.25 at a 0.5 cm step), outside the grid, or with only one of the two
+fields return None from ``lookup`` and are scored by the engine as usual.
+"""
+
+import logging
+import math
+from array import array
+from collections.abc import Mapping
+
+from app.sizing.chart import CompiledChart, compile_chart
+from app.sizing.engine import SizingResult, recommend_size, recommend_sizes
+
+logger = logging.getLogger(__name__)
+
+# Lattice points per unit (cm) along each field: 2 stores every half centimetre
+GRID_STEPS_PER_UNIT = 2
+# Charts whose grid would need more cells than this are left to the engine
+GRID_MAX_CELLS = 100_000
+
+_CONFIDENCES = ("exact", "interpolated", "out_of_range")
+
+
+class DecisionGrid:
+    """Engine answers for every lattice point of a two-field chart.
+
+    Point ``(i, j)`` is at ``((lo0 + i) / steps, (lo1 + j) / steps)`` and its
+    answer is at index ``i * width1 + j`` of ``size_rows``, ``confidence`` and
+    ``note_ids``; notes are stored once each in ``notes``.
+    """
+
+    __slots__ = (
+        "chart",
+        "steps",
+        "lo",
+        "widths",
+        "size_rows",
+        "confidence",
+        "note_ids",
+        "notes",
+    )
+
+    def __init__(
+        self,
+        chart: CompiledChart,
+        steps: int,
+        lo: tuple[int, int],
+        widths: tuple[int, int],
+        size_rows: array,
+        confidence: array,
+        note_ids: array,
+        notes: tuple[str, ...],
+    ):
+        self.chart = chart
+        self.steps = steps
+        self.lo = lo
+        self.widths = widths
+        self.size_rows = size_rows
+        self.confidence = confidence
+        self.note_ids = note_ids
+        self.notes = notes
+
+    @property
+    def n_cells(self) -> int:
+        return self.widths[0] * self.widths[1]
+
+    @property
+    def nbytes(self) -> int:
+        return 5 * self.n_cells + sum(len(note) for note in self.notes)
+
+    def points(self, axis: int) -> list[float]:
+        """Lattice values along field ``axis``, in chart units."""
+        start, steps = self.lo[axis], self.steps
+        return [(start + k) / steps for k in range(self.widths[axis])]
+
+    def cell_for(self, columns: list[tuple[int, float]]) -> int | None:
+        """Index of the lattice point at the measurements, or None if they aren't on one."""
+        if len(columns) != 2:
+            return None
+        steps = self.steps
+        index = 0
+        for (_, value), start, width in zip(columns, self.lo, self.widths, strict=True):
+            if not math.isfinite(value):
+                return None
+            k = round(value * steps)
+            offset = k - start
+            # k / steps is how the point was built, so equality means exactly on it
+            if k / steps != value or not 0 <= offset < width:
+                return None
+            index = index * width + offset
+        return index
+
+    def answer(self, cell: int) -> SizingResult:
+        return {
+            "recommended_size": self.chart.sizes[self.size_rows[cell]],
+            "confidence": _CONFIDENCES[self.confidence[cell]],
+            "notes": self.notes[self.note_ids[cell]],
+        }
+
+    def lookup(self, columns: list[tuple[int, float]]) -> SizingResult | None:
+        """The stored answer for ``columns`` (as from ``chart.columns_for``), if there is one."""
+        cell = self.cell_for(columns)
+        if cell is None:
+            return None
+        return self.answer(cell)
+
+
+def _field_bounds(chart: CompiledChart, col: int, steps: int) -> tuple[int, int] | None:
+    n_fields = chart.n_fields
+    cells = range(col, len(chart.present), n_fields)
+    present = [cell for cell in cells if chart.present[cell]]
+    if not present:
+        return None
+    # Past half the widest span beyond the outermost sizes every answer is out_of_range
+    margin = max(chart.spans[cell] for cell in present) / 2
+    low = min(chart.mins[cell] for cell in present) - margin
+    high = max(chart.maxs[cell] for cell in present) + margin
+    start = math.floor(low * steps)
+    return start, math.ceil(high * steps) - start + 1
+
+
+def build_decision_grid(
+    chart: CompiledChart,
+    steps: int = GRID_STEPS_PER_UNIT,
+    max_cells: int = GRID_MAX_CELLS,
+) -> DecisionGrid | None:
+    """Score every lattice point of a two-field chart with the batch scorer.
+
+    Returns None for charts without exactly two fields, or whose grid would
+    exceed ``max_cells``.
+    """
+    if chart.n_fields != 2:
+        return None
+    bounds = [_field_bounds(chart, col, steps) for col in range(2)]
+    if None in bounds:
+        return None
+    (lo0, width0), (lo1, width1) = bounds
+    if width0 * width1 > max_cells:
+        return None
+
+    name0, name1 = chart.fields
+    values1 = [(lo1 + k) / steps for k in range(width1)]
+    points = [
+        {name0: (lo0 + i) / steps, name1: value1} for i in range(width0) for value1 in values1
+    ]
+    results = recommend_sizes(chart.product_type, points, {chart.product_type: chart})
+
+    rows = {size: row for row, size in reversed(list(enumerate(chart.sizes)))}
+    note_ids: dict[str, int] = {}
+    size_rows = array("H")
+    confidence = array("B")
+    notes = array("H")
+    for result in results:
+        size_rows.append(rows[result["recommended_size"]])
+        confidence.append(_CONFIDENCES.index(result["confidence"]))
+        notes.append(note_ids.setdefault(result["notes"], len(note_ids)))
+
+    return DecisionGrid(
+        chart, steps, (lo0, lo1), (width0, width1), size_rows, confidence, notes, tuple(note_ids)
+    )
+
+
+def verify_decision_grid(grid: DecisionGrid) -> list[str]:
+    """Compare the grid with ``recommend_size`` at every lattice point.
+
+    The engine runs on a fresh compile of the chart, so the grid under test is
+    never consulted. The points include each cell centre, and every chart range
+    boundary on the lattice, where the inclusive comparisons are most likely to
+    disagree. Returns a description of each mismatch (empty if none).
+    """
+    chart = grid.chart
+    reference = {chart.product_type: compile_chart(chart.product_type, chart.to_entries())}
+    name0, name1 = chart.fields
+    values1 = grid.points(1)
+    mismatches = []
+    cell = 0
+    for value0 in grid.points(0):
+        for value1 in values1:
+            measurements = {name0: value0, name1: value1}
+            expected = recommend_size(chart.product_type, measurements, reference)
+            stored = grid.answer(cell)
+            if stored != expected:
+                mismatches.append(f"{chart.product_type} {measurements}: {stored} != {expected}")
+            cell += 1
+    return mismatches
+
+
+def attach_decision_grids(
+    charts: Mapping[str, CompiledChart], steps: int = GRID_STEPS_PER_UNIT
+) -> list[str]:
+    """Build, verify and attach a grid to each two-field chart; return the product types.
+
+    A grid that fails verification is logged and discarded, leaving that chart
+    on the engine.
+    """
+    attached = []
+    for product_type, chart in charts.items():
+        grid = build_decision_grid(chart, steps)
+        if grid is None:
+            continue
+        mismatches = verify_decision_grid(grid)
+        if mismatches:
+            logger.error(
+                "Decision grid for %s disagrees with the engine at %d points (first: %s)",
+                product_type,
+                len(mismatches),
+                mismatches[0],
+            )
+            continue
+        # Charts are frozen; the grid is attached once, before the charts serve requests
+        object.__setattr__(chart, "_decision_grid", grid)
+        attached.append(product_type)
+        logger.info("Decision grid for %s: %d cells", product_type, grid.n_cells)
+    return attached
@@ -0,0 +1,115 @@
+"""Per-field sorted boundary index for charts with many sizes."""
+
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterator
+
+# Charts with fewer sizes than this are scored linearly; below it the linear scan
+# is as fast as walking the index
+INDEX_MIN_SIZES = 16
+# Share of a chart's sizes the indexed ranking may score (but at least
+# INDEX_MIN_SIZES) before it gives up on pruning and scans linearly. Inputs near
+# some size finish within a dozen rows; inputs that fit no size well (fields on
+# different sides of the chart, or spread far apart) barely prune, and walking
+# the index costs more per row than the linear scan.
+INDEX_MAX_VISITED_FRACTION = 1 / 16
+
+
+class FieldIndex:
+    """Rows of one field sorted by their min and by their max boundary.
+
+    ``rows_nearest(value)`` yields ``(row, distance)`` in nondecreasing distance
+    from ``value``: first every row whose range contains it (distance 0), then
+    rows below and above the value merged by how far outside their range it is.
+    """
+
+    __slots__ = (
+        "by_min",
+        "mins_sorted",
+        "prefix_max_of_max",
+        "by_max",
+        "maxs_sorted",
+        "row_max",
+        "max_span",
+    )
+
+    def __init__(self, mins: list[float], maxs: list[float], spans: list[float]):
+        n = len(mins)
+        self.by_min = sorted(range(n), key=mins.__getitem__)
+        self.mins_sorted = [mins[r] for r in self.by_min]
+        self.by_max = sorted(range(n), key=maxs.__getitem__)
+        self.maxs_sorted = [maxs[r] for r in self.by_max]
+        self.row_max = maxs
+
+        # Largest max among rows up to each position in min order, used to stop the
+        # containment walk as soon as no earlier row can reach the value
+        self.prefix_max_of_max = []
+        running = float("-inf")
+        for r in self.by_min:
+            running = max(running, maxs[r])
+            self.prefix_max_of_max.append(running)
+
+        # Penalty divides by the span, or by 1 when the span is zero
+        self.max_span = max((span if span else 1.0) for span in spans)
+
+    def rows_nearest(self, value: float) -> Iterator[tuple[int, float]]:
+        by_min, mins_sorted, row_max = self.by_min, self.mins_sorted, self.row_max
+
+        k = bisect_right(mins_sorted, value) - 1
+        prefix_max_of_max = self.prefix_max_of_max
+        while k >= 0 and prefix_max_of_max[k] >= value:
+            row = by_min[k]
+            if row_max[row] >= value:
+                yield row, 0.0
+            k -= 1
+
+        # Rows entirely below the value (max < value), nearest first
+        left = bisect_left(self.maxs_sorted, value) - 1
+        # Rows entirely above the value (min > value), nearest first
+        right = bisect_right(mins_sorted, value)
+        by_max, maxs_sorted, n = self.by_max, self.maxs_sorted, len(mins_sorted)
+        while left >= 0 or right < n:
+            left_distance = value - maxs_sorted[left] if left >= 0 else float("inf")
+            right_distance = mins_sorted[right] - value if right < n else float("inf")
+            if left_distance <= right_distance:
+                yield by_max[left], left_distance
+                left -= 1
+            else:
+                yield by_min[right], right_distance
+                right += 1
+
+
+class SizeIndex:
+    """One ``FieldIndex`` per chart field, for charts where every size defines every field.
+
+    ``max_visited`` is how many rows the indexed ranking scores before falling
+    back to the linear scan.
+    """
+
+    __slots__ = ("fields", "max_visited")
+
+    def __init__(self, fields: list[FieldIndex], n_sizes: int):
+        self.fields = fields
+        self.max_visited = max(INDEX_MIN_SIZES, int(n_sizes * INDEX_MAX_VISITED_FRACTION))
+
+
+def build_size_index(chart) -> SizeIndex | None:
+    """Build the index for a ``CompiledChart``, or None if it wouldn't be used.
+
+    Charts with fewer than ``INDEX_MIN_SIZES`` rows, or where some size leaves a
+    field undefined, are always scored linearly: the pruning bound assumes every
+    provided measurement contributes to every row's penalty.
+    """
+    if chart.n_sizes < INDEX_MIN_SIZES or not all(chart.present):
+        return None
+    n_fields = chart.n_fields
+    fields = []
+    for col in range(n_fields):
+        cells = range(col, chart.n_sizes * n_fields, n_fields)
+        fields.append(
+            FieldIndex(
+                [chart.mins[c] for c in cells],
+                [chart.maxs[c] for c in cells],
+                [chart.spans[c] for c in cells],
+            )
+        )
+    return SizeIndex(fields, chart.n_sizes)
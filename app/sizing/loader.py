@@ -1,9 +1,13 @@
 """Load and validate sizing data from JSON files."""
 
+import hashlib
 import json
 import logging
 from pathlib import Path
 
+from app.sizing.chart import CompiledChart, compile_chart
+from app.sizing.grid import attach_decision_grids
+
 logger = logging.getLogger(__name__)
 
 EXPECTED_PRODUCT_FILES = {
@@ -14,6 +18,12 @@ EXPECTED_PRODUCT_FILES = {
     "bras": "bras.json",
 }
 
+# Optional file mapping product type -> chart filename; overrides directory discovery
+MANIFEST_FILE = "manifest.json"
+
+# JSON files in the data directory that are not charts
+NON_CHART_FILES = {"schema.json", MANIFEST_FILE}
+
 
 def _validate_sizing_entry(entry: dict, filepath: str, index: int) -> None:
     """Validate a single sizing entry against the expected structure."""
@@ -48,35 +58,119 @@ def _validate_sizing_entry(entry: dict, filepath: str, index: int) -> None:
             raise ValueError(f"{filepath}: entry {index}, field '{field_name}' min > max")
 
 
-def load_sizing_data(data_dir: str = "data") -> dict[str, list[dict]]:
-    """Load all sizing JSON files from the data directory.
+def _product_type_for(filename: str) -> str:
+    """Derive a product type from a chart filename (``arm-sleeves.json`` -> ``arm_sleeves``)."""
+    return Path(filename).stem.replace("-", "_")
 
-    Returns a dict mapping product_type -> list of size entries.
-    Raises ValueError if any file is missing or invalid.
+
+def discover_product_files(data_dir: str = "data") -> dict[str, Path]:
+    """Map product types to chart files in the data directory.
+
+    If the directory contains ``manifest.json`` (an object mapping product type to
+    filename), it is authoritative. Otherwise every ``*.json`` file other than
+    ``schema.json`` is a chart, named after its file stem; the core
+    ``EXPECTED_PRODUCT_FILES`` must be present in that case.
+
+    Raises ValueError if the directory, the manifest, or a listed file is missing
+    or malformed. Chart contents are not read.
     """
     data_path = Path(data_dir)
     if not data_path.is_dir():
         raise ValueError(f"Sizing data directory not found: {data_dir}")
 
-    sizing_data: dict[str, list[dict]] = {}
-
-    for product_type, filename in EXPECTED_PRODUCT_FILES.items():
-        filepath = data_path / filename
+    manifest_path = data_path / MANIFEST_FILE
+    if manifest_path.exists():
+        try:
+            manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON in {manifest_path}: {e}") from e
+        if not isinstance(manifest, dict) or not manifest:
+            raise ValueError(f"{manifest_path}: must be a non-empty object")
+        files = {}
+        for product_type, filename in manifest.items():
+            if not isinstance(filename, str) or not filename:
+                raise ValueError(f"{manifest_path}: entry '{product_type}' must be a filename")
+            files[product_type] = data_path / filename
+    else:
+        files = {
+            product_type: data_path / filename
+            for product_type, filename in EXPECTED_PRODUCT_FILES.items()
+        }
+        for filepath in sorted(data_path.glob("*.json")):
+            if filepath.name not in NON_CHART_FILES:
+                files.setdefault(_product_type_for(filepath.name), filepath)
+
+    for filepath in files.values():
         if not filepath.exists():
             raise ValueError(f"Missing sizing data file: {filepath}")
+    return files
 
-        try:
-            raw = json.loads(filepath.read_text(encoding="utf-8"))
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Invalid JSON in {filepath}: {e}") from e
 
-        if not isinstance(raw, list) or len(raw) == 0:
-            raise ValueError(f"{filepath}: must be a non-empty array")
+def source_hash(data_dir: str = "data") -> str:
+    """Hash the chart files ``load_sizing_data`` would read, by product type and content.
+
+    Editing, adding, removing or renaming a chart changes the hash; touching a
+    file does not. Raises ValueError like ``discover_product_files``.
+    """
+    digest = hashlib.sha256()
+    for product_type, filepath in sorted(discover_product_files(data_dir).items()):
+        content = filepath.read_bytes()
+        digest.update(f"{product_type}\0{len(content)}\0".encode())
+        digest.update(content)
+    return digest.hexdigest()
+
 
-        for i, entry in enumerate(raw):
-            _validate_sizing_entry(entry, str(filepath), i)
+def load_chart_file(filepath: Path) -> list[dict]:
+    """Read and validate a single chart file.
 
+    Raises ValueError if the file is missing or invalid.
+    """
+    if not filepath.exists():
+        raise ValueError(f"Missing sizing data file: {filepath}")
+
+    try:
+        raw = json.loads(filepath.read_text(encoding="utf-8"))
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSON in {filepath}: {e}") from e
+
+    if not isinstance(raw, list) or len(raw) == 0:
+        raise ValueError(f"{filepath}: must be a non-empty array")
+
+    for i, entry in enumerate(raw):
+        _validate_sizing_entry(entry, str(filepath), i)
+    return raw
+
+
+def load_sizing_data(data_dir: str = "data") -> dict[str, list[dict]]:
+    """Load all sizing JSON files from the data directory.
+
+    Returns a dict mapping product_type -> list of size entries.
+    Raises ValueError if any file is missing or invalid.
+    """
+    sizing_data: dict[str, list[dict]] = {}
+
+    for product_type, filepath in discover_product_files(data_dir).items():
+        raw = load_chart_file(filepath)
         sizing_data[product_type] = raw
         logger.info("Loaded %d sizes for %s from %s", len(raw), product_type, filepath)
 
     return sizing_data
+
+
+def compile_sizing_data(
+    sizing_data: dict[str, list[dict]], decision_grids: bool = False
+) -> dict[str, CompiledChart]:
+    """Compile validated sizing data into per-product ``CompiledChart`` objects.
+
+    Compilation happens once at load time so ``recommend_size`` can score
+    against flat arrays instead of walking the nested entry dicts per request.
+    With ``decision_grids``, two-field charts also get a verified
+    ``DecisionGrid`` (see ``app.sizing.grid``).
+    """
+    charts = {
+        product_type: compile_chart(product_type, entries)
+        for product_type, entries in sizing_data.items()
+    }
+    if decision_grids:
+        attach_decision_grids(charts)
+    return charts
@@ -0,0 +1,182 @@
+"""Binary snapshot of compiled sizing charts that worker processes mmap read-only.
+
+Layout (little-endian):
+
+    magic        8 bytes   b"SOLSIZE\\0"
+    version      u32
+    reserved     u32
+    header_len   u64
+    header       header_len bytes of UTF-8 JSON, padded to an 8-byte boundary
+    blocks       per product: mins, maxs, spans (float64 each), present (uint8),
+                 each block starting on an 8-byte boundary
+
+The JSON header lists each product's sizes, fields and the offset of its blocks
+from the start of the block section. Attaching maps the file once and exposes
+the blocks as memoryviews, so every worker shares the same physical pages and
+nothing is parsed per chart.
+
+Build a snapshot with::
+
+    python -m app.sizing.snapshot data sizing.snapshot
+
+The CLI records the loader's ``source_hash`` of the data directory in the
+header; ``attach_verified_snapshot`` only uses a snapshot whose hash matches
+the files on disk, so a stale snapshot can never serve outdated charts.
+"""
+
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+from pathlib import Path
+
+from app.sizing.chart import CompiledChart
+from app.sizing.loader import compile_sizing_data, load_sizing_data, source_hash
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"SOLSIZE\0"
+VERSION = 1
+_PREAMBLE = struct.Struct("<8sIIQ")
+
+
+def _pad(length: int) -> int:
+    return -length % 8
+
+
+def write_snapshot(
+    charts: dict[str, CompiledChart], path: str, extra_header: dict | None = None
+) -> None:
+    """Write compiled charts to ``path`` atomically (temp file + rename).
+
+    ``extra_header`` is stored alongside the chart metadata and returned by
+    ``read_snapshot_header``.
+    """
+    products = []
+    blocks: list[bytes] = []
+    offset = 0
+    for product_type, chart in charts.items():
+        entry = {
+            "product_type": product_type,
+            "sizes": list(chart.sizes),
+            "fields": list(chart.fields),
+            "cells": chart.n_sizes * chart.n_fields,
+        }
+        for name in ("mins", "maxs", "spans", "present"):
+            data = bytes(getattr(chart, name))
+            entry[name] = offset
+            blocks.append(data + bytes(_pad(len(data))))
+            offset += len(data) + _pad(len(data))
+        products.append(entry)
+
+    header = json.dumps({**(extra_header or {}), "products": products}).encode("utf-8")
+    header += b" " * _pad(len(header))
+
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(_PREAMBLE.pack(MAGIC, VERSION, 0, len(header)))
+        f.write(header)
+        for block in blocks:
+            f.write(block)
+    os.replace(tmp_path, path)
+
+
+def _read_preamble(buf, size: int) -> int:
+    """Validate the preamble and return the header length."""
+    if size < _PREAMBLE.size:
+        raise ValueError("Snapshot is truncated")
+    magic, version, _, header_len = _PREAMBLE.unpack_from(buf, 0)
+    if magic != MAGIC:
+        raise ValueError("Not a sizing snapshot (bad magic)")
+    if version != VERSION:
+        raise ValueError(f"Unsupported snapshot version {version}")
+    if _PREAMBLE.size + header_len > size:
+        raise ValueError("Snapshot is truncated")
+    return header_len
+
+
+def read_snapshot_header(path: str) -> dict:
+    """Return the JSON header of a snapshot without mapping its chart blocks."""
+    with open(path, "rb") as f:
+        preamble = f.read(_PREAMBLE.size)
+        header_len = _read_preamble(preamble, os.fstat(f.fileno()).st_size)
+        return json.loads(f.read(header_len))
+
+
+def attach_snapshot(path: str) -> dict[str, CompiledChart]:
+    """Map a snapshot read-only and return charts backed by the shared pages.
+
+    Raises ValueError if the file is not a valid snapshot.
+    """
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    view = memoryview(mapped)
+    header_len = _read_preamble(view, len(view))
+    header = json.loads(bytes(view[_PREAMBLE.size : _PREAMBLE.size + header_len]))
+    data_start = _PREAMBLE.size + header_len
+
+    charts: dict[str, CompiledChart] = {}
+    for entry in header["products"]:
+        cells = entry["cells"]
+        if cells != len(entry["sizes"]) * len(entry["fields"]):
+            raise ValueError(f"Snapshot entry for {entry['product_type']} is inconsistent")
+        if data_start + entry["present"] + cells > len(view):
+            raise ValueError("Snapshot is truncated")
+
+        def block(offset: int, width: int, fmt: str, cells: int = cells) -> memoryview:
+            start = data_start + offset
+            return view[start : start + cells * width].cast(fmt)
+
+        charts[entry["product_type"]] = CompiledChart(
+            product_type=entry["product_type"],
+            sizes=tuple(entry["sizes"]),
+            fields=tuple(entry["fields"]),
+            mins=block(entry["mins"], 8, "d"),
+            maxs=block(entry["maxs"], 8, "d"),
+            spans=block(entry["spans"], 8, "d"),
+            present=block(entry["present"], 1, "B"),
+        )
+    logger.info("Attached sizing snapshot %s (%d products)", path, len(charts))
+    return charts
+
+
+def attach_verified_snapshot(path: str, data_dir: str) -> dict[str, CompiledChart] | None:
+    """Attach the snapshot at ``path`` if it was built from the current ``data_dir``.
+
+    Returns None when the recorded source hash is missing or differs, so the
+    caller can fall back to loading and validating the JSON. Raises ValueError
+    if the snapshot is unreadable or the data directory is invalid.
+    """
+    recorded = read_snapshot_header(path).get("source_hash")
+    current = source_hash(data_dir)
+    if recorded != current:
+        logger.warning(
+            "Snapshot %s was built from different data (%s, current %s); ignoring it",
+            path,
+            recorded[:12] if recorded else "no source hash",
+            current[:12],
+        )
+        return None
+    return attach_snapshot(path)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Build a snapshot: ``python -m app.sizing.snapshot <data_dir> <output>``."""
+    args = sys.argv[1:] if argv is None else argv
+    if len(args) != 2:
+        print("usage: python -m app.sizing.snapshot <data_dir> <output>", file=sys.stderr)
+        return 2
+    data_dir, output = args
+    # Hash before loading, so a file changed mid-build makes the snapshot look stale
+    digest = source_hash(data_dir)
+    charts = compile_sizing_data(load_sizing_data(data_dir))
+    write_snapshot(charts, output, extra_header={"source_hash": digest})
+    print(f"Wrote {len(charts)} charts to {output} ({Path(output).stat().st_size} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
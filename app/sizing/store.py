@@ -0,0 +1,89 @@
+"""Lazily loaded, memory-bounded chart store for large catalogs."""
+
+import logging
+import threading
+from collections import OrderedDict
+from collections.abc import Iterator, Mapping
+from pathlib import Path
+
+from app.sizing.chart import CompiledChart, compile_chart
+from app.sizing.loader import discover_product_files, load_chart_file
+
+logger = logging.getLogger(__name__)
+
+
+class LazyChartStore(Mapping[str, CompiledChart]):
+    """Mapping of product type to compiled chart, loading each chart on first use.
+
+    The set of products comes from ``discover_product_files`` when the store is
+    created; chart files are read, validated and compiled only when looked up.
+    Resident charts are kept in LRU order and the least recently used ones are
+    evicted once their combined ``nbytes`` exceeds ``memory_budget_bytes`` (the
+    most recently used chart always stays resident).
+
+    Looking up a product whose file has become invalid raises ValueError.
+    """
+
+    def __init__(self, data_dir: str, memory_budget_bytes: int = 64 * 1024 * 1024):
+        self.data_dir = data_dir
+        self.memory_budget_bytes = memory_budget_bytes
+        self._files: dict[str, Path] = discover_product_files(data_dir)
+        self._resident: OrderedDict[str, CompiledChart] = OrderedDict()
+        self._resident_bytes = 0
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.evictions = 0
+        self.load_failures = 0
+
+    def __getitem__(self, product_type: str) -> CompiledChart:
+        with self._lock:
+            chart = self._resident.get(product_type)
+            if chart is not None:
+                self._resident.move_to_end(product_type)
+                return chart
+        filepath = self._files.get(product_type)
+        if filepath is None:
+            raise KeyError(product_type)
+
+        try:
+            chart = compile_chart(product_type, load_chart_file(filepath))
+        except ValueError:
+            with self._lock:
+                self.load_failures += 1
+            raise
+        logger.info("Loaded %d sizes for %s from %s", chart.n_sizes, product_type, filepath)
+
+        with self._lock:
+            # Another thread may have loaded the same chart meanwhile; keep the first
+            existing = self._resident.get(product_type)
+            if existing is not None:
+                return existing
+            self.loads += 1
+            self._resident[product_type] = chart
+            self._resident_bytes += chart.nbytes
+            while self._resident_bytes > self.memory_budget_bytes and len(self._resident) > 1:
+                _, evicted = self._resident.popitem(last=False)
+                self._resident_bytes -= evicted.nbytes
+                self.evictions += 1
+        return chart
+
+    def __contains__(self, product_type: object) -> bool:
+        return product_type in self._files
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._files)
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "products": len(self._files),
+                "resident": len(self._resident),
+                "resident_bytes": self._resident_bytes,
+                "memory_budget_bytes": self.memory_budget_bytes,
+                "loads": self.loads,
+                "evictions": self.evictions,
+                "load_failures": self.load_failures,
+            }
@@ -0,0 +1,47 @@
+"""Poll the sizing data directory for changes."""
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+def data_dir_signature(data_dir: str) -> tuple[tuple[str, int, int], ...]:
+    """Return (name, mtime_ns, size) for every JSON file in the data directory.
+
+    Two equal signatures mean nothing in the directory changed between the calls.
+    """
+    entries = []
+    for path in sorted(Path(data_dir).glob("*.json")):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((path.name, stat.st_mtime_ns, stat.st_size))
+    return tuple(entries)
+
+
+async def watch_data_dir(
+    data_dir: str,
+    interval: float,
+    on_change: Callable[[], Awaitable[object]],
+) -> None:
+    """Call ``on_change`` whenever the data directory's signature changes.
+
+    Runs until cancelled. Stat calls run in a worker thread so a slow disk never
+    blocks the event loop. An exception from ``on_change`` is logged and the
+    watch goes on, so one failed reload doesn't end hot reloading.
+    """
+    signature = await asyncio.to_thread(data_dir_signature, data_dir)
+    while True:
+        await asyncio.sleep(interval)
+        current = await asyncio.to_thread(data_dir_signature, data_dir)
+        if current != signature:
+            logger.info("Change detected in %s, reloading sizing data", data_dir)
+            signature = current
+            try:
+                await on_change()
+            except Exception:
+                logger.exception("Reload after a change in %s failed", data_dir)
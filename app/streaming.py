@@ -0,0 +1,211 @@
+"""Streaming NDJSON scoring: read request lines incrementally, stream results back.
+
+The request body is split into lines as it arrives and grouped into chunks. A
+bounded queue sits between the reader and the scorer, so when scoring or the
+client falls behind the reader stops pulling the body, and the server stops
+reading the socket. Memory stays proportional to the queue, not the input.
+"""
+
+import asyncio
+import contextlib
+import json
+import logging
+from collections import Counter
+from collections.abc import Callable
+from typing import Any
+
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response
+
+from app.models import BatchSizingItem
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "application/x-ndjson"
+
+# Scores one chunk of parsed lines; returns one item per line, indexed from 0
+ChunkScorer = Callable[[list[Any]], list[BatchSizingItem]]
+
+
+class _ClientDisconnectedError(Exception):
+    pass
+
+
+class _ParseError:
+    __slots__ = ("message",)
+
+    def __init__(self, message: str):
+        self.message = message
+
+
+class StreamSummary:
+    """Running totals for the trailer line."""
+
+    def __init__(self):
+        self.items = 0
+        self.errors = 0
+        self.confidence: Counter[str] = Counter()
+        self.sizes: dict[str, Counter[str]] = {}
+
+    def add(self, item: BatchSizingItem, product_type: str | None) -> None:
+        self.items += 1
+        if item.result is None:
+            self.errors += 1
+            return
+        self.confidence[item.result.confidence] += 1
+        if item.result.recommended_size is not None and product_type is not None:
+            self.sizes.setdefault(product_type, Counter())[item.result.recommended_size] += 1
+
+    def to_dict(self) -> dict:
+        return {
+            "items": self.items,
+            "errors": self.errors,
+            "confidence": dict(sorted(self.confidence.items())),
+            "sizes": {
+                product_type: dict(sorted(counts.items()))
+                for product_type, counts in sorted(self.sizes.items())
+            },
+        }
+
+
+class NDJSONScoringResponse(Response):
+    """ASGI response that scores an NDJSON request body line by line.
+
+    Each non-blank input line produces one output line shaped like a batch item
+    (``index``, ``result``, ``error``), in input order; lines that aren't JSON or
+    exceed ``max_line_bytes`` get an ``error``. The last line is
+    ``{"summary": {...}}`` with counts per confidence and per recommended size.
+
+    This reads ``receive`` itself: the endpoint must not declare a body parameter.
+    """
+
+    media_type = CONTENT_TYPE
+
+    def __init__(
+        self,
+        score_chunk: ChunkScorer,
+        chunk_lines: int = 500,
+        queue_chunks: int = 4,
+        max_line_bytes: int = 64 * 1024,
+    ):
+        self.score_chunk = score_chunk
+        self.chunk_lines = chunk_lines
+        self.queue_chunks = queue_chunks
+        self.max_line_bytes = max_line_bytes
+        self.status_code = 200
+        self.background = None
+        self.init_headers()
+
+    async def __call__(self, scope, receive, send) -> None:
+        # Each queued chunk is a list of (index, parsed line or parse error). The reader
+        # ends the queue with None, or with the exception that stopped it.
+        queue: asyncio.Queue = asyncio.Queue(self.queue_chunks)
+        reader = asyncio.create_task(self._read_lines(receive, queue))
+        try:
+            await self._write_results(send, queue)
+        except _ClientDisconnectedError:
+            logger.info("Client disconnected from streaming request")
+        finally:
+            reader.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await reader
+
+    async def _read_lines(self, receive, queue: asyncio.Queue) -> None:
+        try:
+            await self._read_body(receive, queue)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await queue.put(e)
+        else:
+            await queue.put(None)
+
+    async def _read_body(self, receive, queue: asyncio.Queue) -> None:
+        chunk: list[tuple[int, Any]] = []
+        buffer = b""
+        skipping = False
+        index = 0
+
+        too_long = _ParseError(f"line: longer than {self.max_line_bytes} bytes")
+
+        async def add(item: Any) -> None:
+            nonlocal chunk, index
+            chunk.append((index, item))
+            index += 1
+            if len(chunk) >= self.chunk_lines:
+                await queue.put(chunk)
+                chunk = []
+
+        async def add_line(line: bytes) -> None:
+            if len(line) > self.max_line_bytes:
+                await add(too_long)
+                return
+            if not line.strip():
+                return
+            try:
+                item = json.loads(line)
+            except ValueError as e:
+                item = _ParseError(f"line: invalid JSON: {e}")
+            await add(item)
+
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            buffer += message.get("body", b"")
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if skipping:
+                    skipping = False
+                    continue
+                await add_line(line)
+            if len(buffer) > self.max_line_bytes:
+                if not skipping:
+                    await add(too_long)
+                buffer = b""
+                skipping = True
+            if not message.get("more_body", False):
+                if not skipping:
+                    await add_line(buffer)
+                if chunk:
+                    await queue.put(chunk)
+                return
+
+    async def _write_results(self, send, queue: asyncio.Queue) -> None:
+        await send(
+            {"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers}
+        )
+        summary = StreamSummary()
+        while True:
+            chunk = await queue.get()
+            if chunk is None:
+                break
+            if isinstance(chunk, Exception):
+                raise chunk
+            body = await run_in_threadpool(self._score, chunk, summary)
+            await _send_body(send, body, more_body=True)
+        trailer = json.dumps({"summary": summary.to_dict()}, separators=(",", ":")) + "\n"
+        await _send_body(send, trailer.encode(), more_body=False)
+
+    def _score(self, chunk: list[tuple[int, Any]], summary: StreamSummary) -> bytes:
+        parsed = [(i, line) for i, line in chunk if not isinstance(line, _ParseError)]
+        scored = iter(self.score_chunk([line for _, line in parsed]))
+        lines = []
+        for index, line in chunk:
+            if isinstance(line, _ParseError):
+                item = BatchSizingItem(index=index, error=line.message)
+                product_type = None
+            else:
+                item = next(scored)
+                item.index = index
+                product_type = line.get("product_type") if isinstance(line, dict) else None
+            summary.add(item, product_type)
+            lines.append(item.model_dump_json())
+        return ("\n".join(lines) + "\n").encode()
+
+
+async def _send_body(send, body: bytes, more_body: bool) -> None:
+    try:
+        await send({"type": "http.response.body", "body": body, "more_body": more_body})
+    except OSError as e:
+        raise _ClientDisconnectedError from e
@@ -0,0 +1,258 @@
+"""Per-tenant chart sets, loaded on first use and evicted when idle.
+
+Each storefront or brand (a tenant) has its own chart directory under one
+root, laid out like ``SIZING_DATA_DIR``: ``<root>/<tenant_id>/*.json``, with an
+optional manifest. ``TenantRegistry`` loads a tenant's charts the first time
+one of its requests arrives, in a worker thread, and keeps it resident with
+its own recommendation cache. Resident tenants are evicted least recently
+used first when their charts exceed the memory budget, and when they haven't
+been used for ``idle_seconds``.
+
+Tenants are isolated from each other. A slow load only holds up that tenant's
+requests, and each of those waits at most ``load_timeout`` seconds. Concurrent
+first requests share a single load. A tenant whose charts fail validation is
+refused for ``retry_after`` seconds before its files are read again.
+
+``TenantRoutingMiddleware`` picks the tenant from a ``/t/<tenant_id>`` path
+prefix or an ``X-Tenant-Id`` header and leaves it in the request state for the
+handlers. Requests naming no tenant use the default dataset.
+"""
+
+import asyncio
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Mapping
+from pathlib import Path
+
+from starlette.datastructures import MutableHeaders
+
+from app.coalesce import SingleFlight
+from app.sizing.cache import RecommendationCache
+from app.sizing.chart import CompiledChart
+from app.sizing.loader import compile_sizing_data, load_sizing_data, source_hash
+
+logger = logging.getLogger(__name__)
+
+TENANT_ID_PATTERN = re.compile(r"^[a-z0-9][a-z0-9_-]{0,62}$")
+TENANT_HEADER_NAME = "X-Tenant-Id"
+TENANT_HEADER = TENANT_HEADER_NAME.lower().encode()
+TENANT_PATH_PREFIX = "/t/"
+
+
+class Tenant:
+    """One tenant's resident charts, with the cache and version that go with them."""
+
+    __slots__ = ("tenant_id", "charts", "cache", "version", "nbytes", "last_used")
+
+    def __init__(
+        self,
+        tenant_id: str,
+        charts: Mapping[str, CompiledChart],
+        cache: RecommendationCache,
+        version: str,
+        now: float,
+    ):
+        self.tenant_id = tenant_id
+        self.charts = charts
+        self.cache = cache
+        self.version = version
+        self.nbytes = sum(chart.nbytes for chart in charts.values())
+        self.last_used = now
+
+
+class TenantRegistry:
+    """Tenants' chart sets under ``root``, loaded lazily within a shared memory budget.
+
+    ``get`` raises KeyError for a tenant with no directory, ValueError when its
+    charts are invalid (now or within ``retry_after`` seconds of a failure) and
+    TimeoutError when its load takes longer than ``load_timeout``; the load
+    carries on, and the next request picks it up.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        cache_factory: Callable[[], RecommendationCache],
+        memory_budget_bytes: int = 64 * 1024 * 1024,
+        idle_seconds: float = 3600,
+        load_timeout: float = 5,
+        retry_after: float = 30,
+        decision_grids: bool = False,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.root = Path(root)
+        self.cache_factory = cache_factory
+        self.memory_budget_bytes = memory_budget_bytes
+        self.idle_seconds = idle_seconds
+        self.load_timeout = load_timeout
+        self.retry_after = retry_after
+        self.decision_grids = decision_grids
+        self.clock = clock
+        self._resident: OrderedDict[str, Tenant] = OrderedDict()
+        self._resident_bytes = 0
+        self._failures: dict[str, tuple[float, str]] = {}
+        self._lock = threading.Lock()
+        self._loads = SingleFlight()
+        self.loads = 0
+        self.evictions = 0
+        self.load_failures = 0
+
+    def exists(self, tenant_id: str) -> bool:
+        return bool(TENANT_ID_PATTERN.match(tenant_id)) and (self.root / tenant_id).is_dir()
+
+    async def get(self, tenant_id: str) -> Tenant:
+        now = self.clock()
+        with self._lock:
+            self._evict_idle(now)
+            tenant = self._resident.get(tenant_id)
+            if tenant is not None:
+                tenant.last_used = now
+                self._resident.move_to_end(tenant_id)
+                return tenant
+            failure = self._failures.get(tenant_id)
+        if failure is not None and now - failure[0] < self.retry_after:
+            raise ValueError(failure[1])
+        if not self.exists(tenant_id):
+            raise KeyError(tenant_id)
+
+        # The load runs to completion and installs the tenant even if every
+        # waiter has timed out, so it isn't restarted by the next request
+        return await asyncio.wait_for(
+            self._loads.do(tenant_id, asyncio.to_thread, self._load, tenant_id),
+            self.load_timeout,
+        )
+
+    def _load(self, tenant_id: str) -> Tenant:
+        data_dir = str(self.root / tenant_id)
+        try:
+            version = source_hash(data_dir)[:12]
+            charts = compile_sizing_data(load_sizing_data(data_dir), self.decision_grids)
+        except (ValueError, OSError) as e:
+            with self._lock:
+                self.load_failures += 1
+                self._failures[tenant_id] = (self.clock(), str(e))
+            logger.error("Sizing data for tenant %s could not be loaded: %s", tenant_id, e)
+            if isinstance(e, OSError):
+                # Unreadable or vanished files are as unusable as invalid ones
+                raise ValueError(str(e)) from e
+            raise
+        tenant = Tenant(tenant_id, charts, self.cache_factory(), version, self.clock())
+        logger.info(
+            "Loaded %d products for tenant %s (version %s)", len(charts), tenant_id, version
+        )
+
+        with self._lock:
+            self._failures.pop(tenant_id, None)
+            self.loads += 1
+            self._resident[tenant_id] = tenant
+            self._resident_bytes += tenant.nbytes
+            while self._resident_bytes > self.memory_budget_bytes and len(self._resident) > 1:
+                self._evict_oldest()
+        return tenant
+
+    def _evict_oldest(self) -> None:
+        # Caller holds the lock
+        tenant_id, evicted = self._resident.popitem(last=False)
+        self._resident_bytes -= evicted.nbytes
+        self.evictions += 1
+        logger.info("Evicted tenant %s", tenant_id)
+
+    def _evict_idle(self, now: float) -> None:
+        # Caller holds the lock; the least recently used tenant is always first
+        while self._resident:
+            oldest = next(iter(self._resident.values()))
+            if now - oldest.last_used < self.idle_seconds:
+                break
+            self._evict_oldest()
+
+    def clear(self) -> None:
+        """Drop every resident tenant and remembered failure; each reloads on next use."""
+        with self._lock:
+            self._resident.clear()
+            self._resident_bytes = 0
+            self._failures.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "resident": len(self._resident),
+                "resident_bytes": self._resident_bytes,
+                "memory_budget_bytes": self.memory_budget_bytes,
+                "loading": len(self._loads),
+                "loads": self.loads,
+                "evictions": self.evictions,
+                "load_failures": self.load_failures,
+            }
+
+
+async def _bad_request(send, detail: str) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 400,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+class TenantRoutingMiddleware:
+    """ASGI middleware setting ``state["tenant"]`` from the path prefix or header.
+
+    ``/t/<tenant_id>/api/v1/...`` is routed as ``/api/v1/...`` with the prefix
+    moved into ``root_path``, so redirects keep it. A header naming a different
+    tenant than the path, or a malformed tenant id, is a 400.
+
+    Without the prefix the URL doesn't identify the tenant, so those responses
+    carry ``Vary: X-Tenant-Id`` and shared caches keep one copy per tenant.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        tenant_id = None
+        for name, value in scope.get("headers") or ():
+            if name == TENANT_HEADER:
+                tenant_id = value.decode("latin-1")
+                break
+
+        route_path = scope["path"][len(scope.get("root_path", "")) :]
+        by_path = route_path.startswith(TENANT_PATH_PREFIX)
+        if by_path:
+            prefix_id, _, rest = route_path[len(TENANT_PATH_PREFIX) :].partition("/")
+            if tenant_id is not None and tenant_id != prefix_id:
+                await _bad_request(send, "Tenant header does not match the path")
+                return
+            tenant_id = prefix_id
+            if rest:
+                # In place, so outer middlewares see the route the router matches
+                scope["root_path"] = scope.get("root_path", "") + TENANT_PATH_PREFIX + prefix_id
+
+        if tenant_id is not None:
+            if not TENANT_ID_PATTERN.match(tenant_id):
+                await _bad_request(send, "Invalid tenant id")
+                return
+            scope.setdefault("state", {})["tenant"] = tenant_id
+        if by_path:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_vary(message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).add_vary_header(TENANT_HEADER_NAME)
+            await send(message)
+
+        await self.app(scope, receive, send_with_vary)
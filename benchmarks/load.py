@@ -0,0 +1,368 @@
+"""Load-test one uvicorn instance of the API.
+
+Usage::
+
+    python -m benchmarks.load                          # start uvicorn, 32 workers, 10s
+    python -m benchmarks.load --concurrency 64         # closed loop: N requests in flight
+    python -m benchmarks.load --rate 200,400,800       # open loop: Poisson arrivals per second
+    python -m benchmarks.load --url http://host:8000   # against a server that's already up
+    python -m benchmarks.load --update-baseline        # record load_baseline.json
+
+Requests replay measurement sets drawn around real chart sizes (the way
+customers cluster) for each product in ``--mix``, posted to
+``/api/v1/size-recommendation``. Each run reports throughput, error counts and
+p50/p95/p99/max latency, overall and per product.
+
+With ``--concurrency`` the generator keeps that many requests in flight (a
+closed loop): it finds the throughput ceiling. With ``--rate`` requests start
+on a Poisson schedule whatever the server's state (an open loop), and latency
+is measured from each request's scheduled start, so a backlog shows up as
+latency instead of quietly lowering the offered load. Several rates are run in
+order, stopping at the first one whose p99 exceeds ``--slo-p99-ms``; the last
+rate that met it is reported as the instance's sustainable rate.
+
+The regression gate compares each run against ``--baseline``, normalizing by
+the same calibration loop as ``benchmarks.run``. A run regresses when
+throughput falls, or p99 rises, by more than ``--tolerance``, or when its
+error rate exceeds ``--max-error-rate``. The exit status is 1 on regression.
+The load generator shares the machine with the server, so compare runs from
+the same kind of machine.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+from benchmarks.run import _calibration_ns
+from benchmarks.synthetic import make_near_measurements
+
+LOAD_BASELINE_PATH = Path(__file__).with_name("load_baseline.json")
+DEFAULT_TOLERANCE = 0.3
+DEFAULT_MIX = "leggings=30,socks=25,bras=20,capris=15,arm_sleeves=10"
+ENDPOINT = "/api/v1/size-recommendation"
+
+
+def parse_mix(spec: str) -> dict[str, float]:
+    """``"leggings=3,socks=1"`` to normalized weights ``{"leggings": 0.75, "socks": 0.25}``."""
+    weights = {}
+    for part in spec.split(","):
+        product, _, weight = part.partition("=")
+        weights[product.strip()] = float(weight or 1)
+    total = sum(weights.values())
+    if total <= 0:
+        raise ValueError("Mix weights must add up to more than 0")
+    return {product: weight / total for product, weight in weights.items()}
+
+
+def build_workload(
+    data_dir: str, mix: dict[str, float], distinct: int, seed: int = 0
+) -> list[tuple[str, bytes]]:
+    """``distinct`` encoded request bodies, split between products by ``mix``."""
+    from app.sizing.loader import load_sizing_data
+
+    charts = load_sizing_data(data_dir)
+    unknown = set(mix) - set(charts)
+    if unknown:
+        raise ValueError(f"No chart for {', '.join(sorted(unknown))} in {data_dir}")
+    workload = []
+    for i, (product, share) in enumerate(sorted(mix.items())):
+        n = max(1, round(distinct * share))
+        for measurements in make_near_measurements(charts[product], n, seed=seed + i):
+            payload = {"product_type": product, "measurements": measurements}
+            workload.append((product, json.dumps(payload).encode()))
+    random.Random(seed).shuffle(workload)
+    return workload
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    """Nearest-rank percentile of already sorted values (0 when empty)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * p // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def _latency_summary(latencies: list[float]) -> dict:
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+    }
+
+
+def summarize(samples: list[tuple[str, int, float]], elapsed: float) -> dict:
+    """Throughput, error counts and latency percentiles of ``(product, status, seconds)``."""
+    statuses = Counter(status for _, status, _ in samples)
+    errors = sum(n for status, n in statuses.items() if status != 200)
+    by_product: dict[str, list[float]] = {}
+    for product, _, latency in samples:
+        by_product.setdefault(product, []).append(latency)
+    return {
+        **_latency_summary([latency for _, _, latency in samples]),
+        "throughput_rps": round(len(samples) / elapsed, 1) if elapsed else 0.0,
+        "error_rate": round(errors / len(samples), 5) if samples else 0.0,
+        # 0 stands for a client-side failure (timeout, refused connection)
+        "statuses": {str(status): n for status, n in sorted(statuses.items())},
+        "products": {name: _latency_summary(by_product[name]) for name in sorted(by_product)},
+    }
+
+
+async def _send(client, product: str, body: bytes, started: float, samples: list) -> None:
+    try:
+        response = await client.post(
+            ENDPOINT, content=body, headers={"content-type": "application/json"}
+        )
+        status = response.status_code
+    except Exception:
+        status = 0
+    samples.append((product, status, time.perf_counter() - started))
+
+
+async def run_closed_loop(
+    client, workload: list[tuple[str, bytes]], concurrency: int, duration: float
+) -> dict:
+    """Keep ``concurrency`` requests in flight for ``duration`` seconds."""
+    samples: list[tuple[str, int, float]] = []
+    start = time.perf_counter()
+    deadline = start + duration
+
+    async def worker(offset: int) -> None:
+        i = offset
+        while time.perf_counter() < deadline:
+            product, body = workload[i % len(workload)]
+            i += concurrency
+            await _send(client, product, body, time.perf_counter(), samples)
+
+    await asyncio.gather(*(worker(n) for n in range(concurrency)))
+    return summarize(samples, time.perf_counter() - start)
+
+
+async def run_open_loop(
+    client,
+    workload: list[tuple[str, bytes]],
+    rate: float,
+    duration: float,
+    max_outstanding: int = 1000,
+    seed: int = 0,
+) -> dict:
+    """Start requests on a Poisson schedule of ``rate`` per second for ``duration`` seconds.
+
+    Latency counts from each request's scheduled start. Arrivals that would
+    exceed ``max_outstanding`` in-flight requests are recorded as client-side
+    failures rather than queued without bound.
+    """
+    rng = random.Random(seed)
+    samples: list[tuple[str, int, float]] = []
+    tasks: set[asyncio.Task] = set()
+    start = time.perf_counter()
+    scheduled = start
+    i = 0
+    while scheduled < start + duration:
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        product, body = workload[i % len(workload)]
+        i += 1
+        if len(tasks) >= max_outstanding:
+            samples.append((product, 0, time.perf_counter() - scheduled))
+        else:
+            task = asyncio.create_task(_send(client, product, body, scheduled, samples))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        scheduled += rng.expovariate(rate)
+    if tasks:
+        await asyncio.gather(*tasks)
+    return summarize(samples, time.perf_counter() - start)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.contextmanager
+def local_server(data_dir: str, startup_timeout: float = 30.0, workers: int = 0):
+    """Run the app on a free local port and yield its base URL.
+
+    ``workers`` of 0 runs a single ``uvicorn app.main:app``; otherwise ``app.serve``
+    forks that many workers.
+    """
+    import httpx
+
+    port = _free_port()
+    env = {**os.environ, "SIZING_DATA_DIR": data_dir, "APP_LOG_LEVEL": "warning"}
+    if workers:
+        command = ["app.serve", "--port", str(port), "--workers", str(workers)]
+    else:
+        command = ["uvicorn", "app.main:app", "--port", str(port), "--no-access-log"]
+    process = subprocess.Popen([sys.executable, "-m", *command], env=env)
+    url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + startup_timeout
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"server exited with status {process.returncode}")
+            with contextlib.suppress(httpx.TransportError):
+                if httpx.get(f"{url}/health").status_code == 200:
+                    break
+            if time.monotonic() > deadline:
+                raise RuntimeError("server did not become healthy in time")
+            time.sleep(0.1)
+        yield url
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+async def run_load(url: str, workload, args) -> dict:
+    import httpx
+
+    limits = httpx.Limits(max_connections=args.max_connections, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=args.timeout) as client:
+        runs = {}
+        if args.rates:
+            sustainable = None
+            for rate in args.rates:
+                await run_open_loop(client, workload, rate, args.warmup, args.max_connections)
+                result = await run_open_loop(
+                    client, workload, rate, args.duration, args.max_connections, seed=int(rate)
+                )
+                runs[f"rate_{rate:g}"] = result
+                _print_run(f"rate {rate:g}/s", result)
+                if result["p99_ms"] > args.slo_p99_ms or result["error_rate"] > args.max_error_rate:
+                    break
+                sustainable = rate
+            print(f"Sustainable rate at p99 <= {args.slo_p99_ms:g} ms: {sustainable or 'none'}")
+        else:
+            await run_closed_loop(client, workload, args.concurrency, args.warmup)
+            result = await run_closed_loop(client, workload, args.concurrency, args.duration)
+            runs[f"concurrency_{args.concurrency}"] = result
+            _print_run(f"concurrency {args.concurrency}", result)
+    return runs
+
+
+def _print_run(label: str, result: dict) -> None:
+    print(
+        f"{label:20s} {result['throughput_rps']:9.1f} req/s  "
+        f"p50 {result['p50_ms']:8.2f}  p95 {result['p95_ms']:8.2f}  "
+        f"p99 {result['p99_ms']:8.2f}  max {result['max_ms']:8.2f} ms  "
+        f"errors {result['error_rate']:.2%}"
+    )
+
+
+def compare(current: dict, baseline: dict, tolerance: float, max_error_rate: float) -> list[str]:
+    """Return a message for every run that regressed against the same-named baseline run."""
+    regressions = []
+    scale = current["calibration_ns"] / baseline["calibration_ns"]
+    for name, result in current["runs"].items():
+        if result["error_rate"] > max_error_rate:
+            regressions.append(f"{name}: error rate {result['error_rate']:.2%}")
+        base = baseline.get("runs", {}).get(name)
+        if base is None:
+            continue
+        # A machine whose calibration loop is slower is expected to serve proportionally less
+        min_rps = base["throughput_rps"] / scale * (1 - tolerance)
+        max_p99 = base["p99_ms"] * scale * (1 + tolerance)
+        if result["throughput_rps"] < min_rps:
+            regressions.append(
+                f"{name}: {result['throughput_rps']:.1f} req/s < {min_rps:.1f} "
+                f"(baseline {base['throughput_rps']:.1f}, tolerance {tolerance:.0%})"
+            )
+        if result["p99_ms"] > max_p99:
+            regressions.append(
+                f"{name}: p99 {result['p99_ms']:.2f} ms > {max_p99:.2f} "
+                f"(baseline {base['p99_ms']:.2f}, tolerance {tolerance:.0%})"
+            )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--url", help="server to test (default: start a local uvicorn)")
+    parser.add_argument("--data-dir", default="data", help="charts to draw measurements from")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="local server worker processes via app.serve (default: one uvicorn process)",
+    )
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="product weights, e.g. socks=2,bras=1")
+    parser.add_argument("--distinct", type=int, default=2000, help="distinct request bodies")
+    parser.add_argument("--concurrency", type=int, default=32, help="requests in flight")
+    parser.add_argument(
+        "--rate",
+        dest="rates",
+        type=lambda s: [float(r) for r in s.split(",")],
+        help="open-loop arrival rates per second, comma-separated",
+    )
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per run")
+    parser.add_argument("--warmup", type=float, default=2.0, help="unmeasured seconds first")
+    parser.add_argument("--max-connections", type=int, default=256)
+    parser.add_argument("--timeout", type=float, default=10.0, help="per-request timeout")
+    parser.add_argument("--slo-p99-ms", type=float, default=50.0)
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--output", type=Path, help="write results JSON here")
+    parser.add_argument("--baseline", type=Path, default=LOAD_BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.INFO)
+    workload = build_workload(args.data_dir, parse_mix(args.mix), args.distinct)
+    if args.url:
+        runs = asyncio.run(run_load(args.url, workload, args))
+    else:
+        with local_server(args.data_dir, workers=args.workers) as url:
+            runs = asyncio.run(run_load(url, workload, args))
+
+    current = {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "duration": args.duration,
+            "mix": args.mix,
+        },
+        "calibration_ns": round(_calibration_ns(5), 1),
+        "runs": runs,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(current, indent=2) + "\n")
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(current, indent=2) + "\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one")
+        return 0
+
+    regressions = compare(
+        current, json.loads(args.baseline.read_text()), args.tolerance, args.max_error_rate
+    )
+    for message in regressions:
+        print(f"REGRESSION {message}")
+    if not regressions:
+        print("No regressions against baseline")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,324 @@
+"""Benchmark the sizing engine, loader and HTTP path.
+
+Usage::
+
+    python -m benchmarks.run                      # run and compare to the baseline
+    python -m benchmarks.run --quick              # smaller inputs, fewer repeats
+    python -m benchmarks.run --update-baseline    # record a new baseline
+    python -m benchmarks.run --filter recommend   # only cases whose name matches
+
+Every case reports nanoseconds per operation (best of several repeats) and the
+same figure normalized by a fixed pure-Python calibration loop, which makes
+results from different machines roughly comparable. A case regresses when its
+normalized time exceeds the baseline by more than ``--tolerance``. Results are
+written as JSON to ``--output``; the exit status is 1 when anything regressed.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from benchmarks.synthetic import (
+    make_catalog,
+    make_chart,
+    make_measurements,
+    make_near_measurements,
+    make_out_of_range_measurements,
+    write_data_dir,
+)
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+DEFAULT_TOLERANCE = 0.5
+
+
+def _time_per_op(fn: Callable[[], object], number: int, repeat: int) -> float:
+    """Best-of-``repeat`` nanoseconds per call of ``fn``, called ``number`` times per repeat."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter_ns() - start) / number)
+    return best
+
+
+def _calibration_ns(repeat: int) -> float:
+    """Time a fixed arithmetic/dict workload to normalize results across machines."""
+    table = {i: float(i) for i in range(256)}
+
+    def workload() -> float:
+        total = 0.0
+        for i in range(256):
+            total += table[i] * 1.5 if i % 3 else table[i] / 2.0
+        return total
+
+    return _time_per_op(workload, 200, repeat)
+
+
+def _cycle(items: list) -> Callable[[], object]:
+    """Return a zero-arg function yielding the next item on every call."""
+    state = {"i": 0}
+
+    def next_item():
+        i = state["i"]
+        state["i"] = i + 1 if i + 1 < len(items) else 0
+        return items[i]
+
+    return next_item
+
+
+def build_cases(quick: bool) -> dict[str, tuple[Callable[[], object], int]]:
+    """Return ``{name: (fn, calls_per_repeat)}`` for every benchmark case."""
+    from app.sizing.engine import _score_row, _score_size, recommend_size, recommend_sizes
+    from app.sizing.loader import compile_sizing_data, load_sizing_data
+
+    scale = 0.1 if quick else 1.0
+    cases: dict[str, tuple[Callable[[], object], int]] = {}
+
+    real_data = compile_sizing_data(load_sizing_data("data"))
+    real_leggings = real_data["leggings"].to_entries()
+    leggings_inputs = _cycle(make_measurements(real_leggings, 512, seed=1))
+    cases["recommend_size/leggings_real"] = (
+        lambda: recommend_size("leggings", leggings_inputs(), real_data),
+        2000,
+    )
+
+    large_raw = make_chart(300, 40, seed=2)
+    large = compile_sizing_data({"large": large_raw})
+    large_inputs = make_measurements(large_raw, 512, seed=3)
+    next_large = _cycle(large_inputs)
+    cases["recommend_size/300x40"] = (
+        lambda: recommend_size("large", next_large(), large),
+        max(1, int(100 * scale)),
+    )
+
+    made_to_measure_raw = make_chart(64, 3, seed=7)
+    made_to_measure = compile_sizing_data({"mtm": made_to_measure_raw})
+    next_mtm = _cycle(make_near_measurements(made_to_measure_raw, 512, seed=8))
+    cases["recommend_size/made_to_measure_64x3"] = (
+        lambda: recommend_size("mtm", next_mtm(), made_to_measure),
+        2000,
+    )
+
+    # Indexed charts whose inputs fit no size: the index can't prune these
+    wide_raw = make_chart(300, 5, seed=9)
+    wide = compile_sizing_data({"wide": wide_raw})
+    next_wide = _cycle(make_out_of_range_measurements(wide_raw, 512, seed=10))
+    cases["recommend_size/out_of_range_300x5"] = (
+        lambda: recommend_size("wide", next_wide(), wide),
+        max(1, int(200 * scale)),
+    )
+
+    entry = large_raw[150]
+    cases["_score_size/40_fields"] = (lambda: _score_size(entry, next_large()), 5000)
+    chart = large["large"]
+    cases["_score_row/40_fields"] = (
+        lambda: _score_row(chart, 150, chart.columns_for(next_large())),
+        5000,
+    )
+
+    batch = large_inputs[: max(1, int(512 * scale))]
+    cases["recommend_sizes/300x40_batch"] = (
+        lambda: recommend_sizes("large", batch, large),
+        1,
+    )
+
+    n_products = max(10, int(2000 * scale))
+    catalog_raw = make_catalog(n_products, 12, 6, seed=4)
+    catalog = compile_sizing_data(catalog_raw)
+    catalog_inputs = _cycle(
+        [
+            (product_type, m)
+            for product_type, chart_raw in list(catalog_raw.items())[:256]
+            for m in make_measurements(chart_raw, 2, seed=5)
+        ]
+    )
+
+    def catalog_lookup():
+        product_type, m = catalog_inputs()
+        return recommend_size(product_type, m, catalog)
+
+    cases[f"recommend_size/catalog_{n_products}_products"] = (catalog_lookup, 2000)
+    cases[f"compile_sizing_data/{n_products}_products"] = (
+        lambda: compile_sizing_data(catalog_raw),
+        1,
+    )
+
+    tmp_dir = Path(tempfile.mkdtemp(prefix="sizing-bench-"))
+    n_sizes = max(20, int(400 * scale))
+    write_data_dir(tmp_dir, n_sizes, 30, seed=6)
+    cases[f"load_sizing_data/5x{n_sizes}x30"] = (lambda: load_sizing_data(str(tmp_dir)), 1)
+
+    cases.update(_http_cases(real_data, leggings_inputs, quick))
+    return cases
+
+
+def _http_cases(real_data, leggings_inputs, quick: bool) -> dict:
+    """POST /api/v1/size-recommendation through an in-process ASGI client."""
+    import httpx
+
+    import app.main as main_module
+    from app.sizing.cache import RecommendationCache
+
+    main_module._sizing_data = real_data
+    loop = asyncio.new_event_loop()
+    client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=main_module.app), base_url="http://bench"
+    )
+    number = 50 if quick else 500
+
+    def post(payload: dict):
+        async def run():
+            response = await client.post("/api/v1/size-recommendation", json=payload)
+            assert response.status_code == 200, response.text
+            return response
+
+        return loop.run_until_complete(run())
+
+    fixed = {"product_type": "leggings", "measurements": {"height_cm": 165, "weight_kg": 60}}
+
+    def post_cached():
+        return post(fixed)
+
+    def post_uncached():
+        main_module._recommendation_cache = uncached
+        try:
+            return post({"product_type": "leggings", "measurements": leggings_inputs()})
+        finally:
+            main_module._recommendation_cache = cached
+
+    cached = main_module._recommendation_cache
+    uncached = RecommendationCache(maxsize=0)
+    cases = {
+        "http/size_recommendation_cached": (post_cached, number),
+        "http/size_recommendation_uncached": (post_uncached, number),
+    }
+    for mode, fast in (("model", False), ("fast", True)):
+        cases[f"asgi/size_recommendation_cached_{mode}_serialization"] = (
+            _asgi_post(main_module, loop, fixed, fast),
+            number * 4,
+        )
+    return cases
+
+
+def _asgi_post(main_module, loop, payload: dict, fast: bool) -> Callable[[], object]:
+    """Call the ASGI app directly, without an HTTP client, to isolate per-request CPU."""
+    body = json.dumps(payload).encode()
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.4"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/api/v1/size-recommendation",
+        "raw_path": b"/api/v1/size-recommendation",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"bench"), (b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 1),
+        "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            assert message["status"] == 200
+
+    async def call():
+        await main_module.app(dict(scope), receive, send)
+
+    def run():
+        main_module.SIZING_FAST_SERIALIZATION = fast
+        return loop.run_until_complete(call())
+
+    return run
+
+
+def run(quick: bool, name_filter: str | None, repeat: int) -> dict:
+    # Keep loader and HTTP client log lines out of the timings and the report
+    logging.disable(logging.INFO)
+    cases = build_cases(quick)
+    calibration = _calibration_ns(repeat)
+    results = {}
+    for name, (fn, number) in cases.items():
+        if name_filter and name_filter not in name:
+            continue
+        fn()  # warm up
+        ns = _time_per_op(fn, number, repeat)
+        results[name] = {"ns_per_op": round(ns, 1), "normalized": round(ns / calibration, 4)}
+        print(f"{name:48s} {ns / 1000:12.2f} us/op  ({ns / calibration:9.3f} x calibration)")
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "quick": quick,
+            "repeat": repeat,
+        },
+        "calibration_ns": round(calibration, 1),
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Return a message for every case slower than baseline by more than ``tolerance``."""
+    regressions = []
+    for name, result in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            continue
+        limit = base["normalized"] * (1 + tolerance)
+        if result["normalized"] > limit:
+            regressions.append(
+                f"{name}: {result['normalized']:.3f} > {limit:.3f} "
+                f"(baseline {base['normalized']:.3f}, tolerance {tolerance:.0%})"
+            )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--quick", action="store_true", help="smaller inputs, fewer repeats")
+    parser.add_argument("--filter", dest="name_filter", help="only run cases containing this")
+    parser.add_argument("--repeat", type=int, default=None, help="repeats per case")
+    parser.add_argument("--output", type=Path, help="write results JSON here")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    repeat = args.repeat or (3 if args.quick else 5)
+    current = run(args.quick, args.name_filter, repeat)
+
+    if args.output:
+        args.output.write_text(json.dumps(current, indent=2) + "\n")
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(current, indent=2) + "\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text())
+    if baseline["meta"].get("quick") != current["meta"]["quick"]:
+        print("Baseline was recorded with a different --quick setting; skipping comparison")
+        return 0
+    regressions = compare(current, baseline, args.tolerance)
+    for message in regressions:
+        print(f"REGRESSION {message}")
+    if not regressions:
+        print("No regressions against baseline")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""Synthetic sizing charts and measurements for benchmarks."""
+
+import json
+import random
+from pathlib import Path
+
+from app.sizing.loader import EXPECTED_PRODUCT_FILES
+
+
+def make_chart(n_sizes: int, n_fields: int, seed: int = 0) -> list[dict]:
+    """Build a valid chart of overlapping, increasing ranges.
+
+    Each field gets its own base value and step so sizes overlap their
+    neighbours the way real charts do.
+    """
+    rng = random.Random(seed)
+    fields = [f"field_{i:02d}_cm" for i in range(n_fields)]
+    bases = [rng.uniform(10, 100) for _ in fields]
+    steps = [rng.uniform(1, 5) for _ in fields]
+
+    chart = []
+    for row in range(n_sizes):
+        measurements = {}
+        for field, base, step in zip(fields, bases, steps, strict=True):
+            low = round(base + row * step, 1)
+            measurements[field] = {"min": low, "max": round(low + step * 1.5, 1)}
+        chart.append({"size": f"S{row:03d}", "measurements": measurements})
+    return chart
+
+
+def make_catalog(
+    n_products: int, n_sizes: int, n_fields: int, seed: int = 0
+) -> dict[str, list[dict]]:
+    """Build ``n_products`` charts keyed ``product_0000`` and up."""
+    return {
+        f"product_{i:04d}": make_chart(n_sizes, n_fields, seed=seed + i) for i in range(n_products)
+    }
+
+
+def make_measurements(chart: list[dict], n: int, seed: int = 0) -> list[dict[str, float]]:
+    """Draw measurement sets spread a little beyond the chart's overall range."""
+    rng = random.Random(seed)
+    fields = sorted({f for entry in chart for f in entry["measurements"]})
+    lows = {f: min(e["measurements"][f]["min"] for e in chart) for f in fields}
+    highs = {f: max(e["measurements"][f]["max"] for e in chart) for f in fields}
+    samples = []
+    for _ in range(n):
+        samples.append(
+            {
+                f: round(rng.uniform(lows[f] * 0.9, highs[f] * 1.1), 1)
+                for f in fields
+                if rng.random() < 0.9
+            }
+            or {fields[0]: lows[fields[0]]}
+        )
+    return samples
+
+
+def write_data_dir(data_dir: Path, n_sizes: int, n_fields: int, seed: int = 0) -> None:
+    """Write one synthetic chart per expected product file into ``data_dir``."""
+    data_dir.mkdir(parents=True, exist_ok=True)
+    for i, filename in enumerate(EXPECTED_PRODUCT_FILES.values()):
+        chart = make_chart(n_sizes, n_fields, seed=seed + i)
+        (data_dir / filename).write_text(json.dumps(chart), encoding="utf-8")
+
+
+def make_near_measurements(chart: list[dict], n: int, seed: int = 0) -> list[dict[str, float]]:
+    """Draw measurement sets centred on a random size, the way real customers cluster."""
+    rng = random.Random(seed)
+    samples = []
+    for _ in range(n):
+        ranges = chart[rng.randrange(len(chart))]["measurements"]
+        samples.append(
+            {
+                f: round((r["min"] + r["max"]) / 2 + rng.gauss(0, r["max"] - r["min"]), 1)
+                for f, r in ranges.items()
+            }
+        )
+    return samples
+
+
+def make_out_of_range_measurements(
+    chart: list[dict], n: int, seed: int = 0
+) -> list[dict[str, float]]:
+    """Draw measurement sets with every field outside the chart, each on a random side.
+
+    No size fits such a set well, which is the worst case for pruning candidates.
+    """
+    rng = random.Random(seed)
+    fields = sorted({f for entry in chart for f in entry["measurements"]})
+    lows = {f: min(e["measurements"][f]["min"] for e in chart) for f in fields}
+    highs = {f: max(e["measurements"][f]["max"] for e in chart) for f in fields}
+    return [
+        {
+            f: round(
+                highs[f] * rng.uniform(1.05, 1.3)
+                if rng.random() < 0.5
+                else lows[f] * rng.uniform(0.7, 0.95),
+                1,
+            )
+            for f in fields
+        }
+        for _ in range(n)
+    ]
@@ -1,5 +1,11 @@
 """Integration tests for the FastAPI endpoints."""
 
+import asyncio
+import json
+import time
+from pathlib import Path
+
+import httpx
 import pytest
 from fastapi.testclient import TestClient
 
@@ -156,3 +162,425 @@ class TestSizeRecommendationEndpoint:
         for case in test_cases:
             resp = client.post("/api/v1/size-recommendation", json=case)
             assert resp.status_code != 500, f"Got 500 for: {case}"
+
+
+class TestBatchRecommendationEndpoint:
+    def test_mixed_batch_with_per_item_errors(self, client):
+        response = client.post(
+            "/api/v1/size-recommendations/batch",
+            json={
+                "items": [
+                    {
+                        "product_type": "socks",
+                        "measurements": {
+                            "calf_circumference_cm": 40,
+                            "ankle_circumference_cm": 24,
+                        },
+                    },
+                    {"product_type": "hats", "measurements": {"head_cm": 58}},
+                    {
+                        "product_type": "bras",
+                        "measurements": {
+                            "bust_circumference_cm": 130,
+                            "underbust_circumference_cm": 105,
+                        },
+                    },
+                ]
+            },
+        )
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert [r["index"] for r in results] == [0, 1, 2]
+        assert results[0]["result"]["recommended_size"] == "L"
+        assert results[1]["result"] is None
+        assert "product_type" in results[1]["error"]
+        assert results[2]["result"]["recommended_size"] == "XXL"
+
+    def test_large_batch_matches_single_requests(self, client):
+        items = [
+            {
+                "product_type": "socks",
+                "measurements": {
+                    "calf_circumference_cm": 25 + i % 30,
+                    "ankle_circumference_cm": 15 + i % 20,
+                },
+            }
+            for i in range(300)
+        ]
+        response = client.post("/api/v1/size-recommendations/batch", json={"items": items})
+        assert response.status_code == 200
+        results = response.json()["results"]
+        for item, batch_result in zip(items[:40], results, strict=False):
+            single = client.post("/api/v1/size-recommendation", json=item).json()
+            assert batch_result["result"] == single
+
+    def test_empty_batch_rejected(self, client):
+        response = client.post("/api/v1/size-recommendations/batch", json={"items": []})
+        assert response.status_code == 422
+
+
+class TestStreamingRecommendationEndpoint:
+    def test_streams_results_and_summary(self, client):
+        items = [
+            {
+                "product_type": "socks",
+                "measurements": {
+                    "calf_circumference_cm": 25 + i % 30,
+                    "ankle_circumference_cm": 20,
+                },
+            }
+            for i in range(40)
+        ]
+        body = "\n".join(json.dumps(item) for item in items) + "\nnot json\n"
+        response = client.post("/api/v1/size-recommendations/stream", content=body)
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["index"] for line in lines[:-1]] == list(range(41))
+        for item, line in zip(items, lines, strict=False):
+            single = client.post("/api/v1/size-recommendation", json=item).json()
+            assert line["result"] == single
+        assert "invalid JSON" in lines[40]["error"]
+
+        summary = lines[-1]["summary"]
+        assert summary["items"] == 41
+        assert summary["errors"] == 1
+        assert sum(summary["confidence"].values()) == 40
+        assert sum(summary["sizes"]["socks"].values()) == 40
+
+
+class TestFastSerialization:
+    PAYLOADS = [
+        {"product_type": "leggings", "measurements": {"height_cm": 165, "weight_kg": 60}},
+        {"product_type": "bras", "measurements": {"bust_circumference_cm": 140}},
+        {"product_type": "socks", "measurements": {"head_cm": 50}},
+    ]
+
+    def test_bytes_match_model_serialization(self, client, monkeypatch):
+        import app.main as main_module
+
+        fast = [client.post("/api/v1/size-recommendation", json=p) for p in self.PAYLOADS]
+        monkeypatch.setattr(main_module, "SIZING_FAST_SERIALIZATION", False)
+        model = [client.post("/api/v1/size-recommendation", json=p) for p in self.PAYLOADS]
+        for a, b in zip(fast, model, strict=True):
+            assert a.content == b.content
+            assert a.headers["content-type"] == b.headers["content-type"]
+
+    def test_openapi_schema_unchanged(self, client):
+        operation = client.get("/openapi.json").json()["paths"]["/api/v1/size-recommendation"]
+        schema = operation["post"]["responses"]["200"]["content"]["application/json"]["schema"]
+        assert schema == {"$ref": "#/components/schemas/SizingResponse"}
+
+
+class TestRequestCoalescing:
+    def test_concurrent_identical_misses_share_one_computation(self, client, monkeypatch):
+        import app.main as main_module
+
+        computed = []
+        compute = main_module._compute_recommendation
+
+        def slow_compute(*args):
+            computed.append(args[0])
+            time.sleep(0.05)
+            return compute(*args)
+
+        monkeypatch.setattr(main_module, "SIZING_COALESCE", True)
+        monkeypatch.setattr(main_module, "_compute_recommendation", slow_compute)
+        main_module._recommendation_cache.clear()
+        payload = {"product_type": "capris", "measurements": {"height_cm": 160, "weight_kg": 58}}
+
+        async def burst():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+                return await asyncio.gather(
+                    *(ac.post("/api/v1/size-recommendation", json=payload) for _ in range(8))
+                )
+
+        responses = asyncio.run(burst())
+        assert computed == ["capris"]
+        assert {r.status_code for r in responses} == {200}
+        assert len({r.content for r in responses}) == 1
+
+        # The next identical request is a plain cache hit
+        assert client.post("/api/v1/size-recommendation", json=payload).content == (
+            responses[0].content
+        )
+        assert computed == ["capris"]
+
+
+class TestEmailEndpoints:
+    def test_single_email_is_extracted_and_scored(self, client):
+        response = client.post(
+            "/api/v1/email-recommendation",
+            json={
+                "subject": "Arm sleeve sizing help",
+                "body": "My upper arm is 33cm, forearm is 26cm, and wrist is 17cm.",
+            },
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["can_process"] is True
+        assert data["request"]["product_type"] == "arm_sleeves"
+        assert data["request"]["measurements"] == data["measurements"]
+        direct = client.post("/api/v1/size-recommendation", json=data["request"]).json()
+        assert data["result"] == direct
+        assert data["error"] is None
+
+    def test_batch_keeps_order_and_explains_failures(self, client):
+        emails = [
+            {"subject": "Bra size question", "body": "Bust: 95cm, underbust: 77cm"},
+            {"subject": "Sizing question", "body": "I usually wear a medium."},
+            {"subject": "Leggings", "body": "No numbers here"},
+        ]
+        response = client.post(
+            "/api/v1/email-recommendations/batch", json={"emails": emails, "recommend": False}
+        )
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert [r["index"] for r in results] == [0, 1, 2]
+        assert results[0]["can_process"] is True and results[0]["result"] is None
+        assert results[1]["error"] == "Could not detect product type"
+        assert results[2]["error"] == "Could not extract measurements"
+
+    def test_large_batch_matches_small(self, client, monkeypatch):
+        import app.main as main_module
+
+        emails = [{"subject": "socks", "body": f"calf {30 + i} cm"} for i in range(10)]
+        inline = client.post("/api/v1/email-recommendations/batch", json={"emails": emails})
+        monkeypatch.setattr(main_module, "EMAIL_OFFLOAD_THRESHOLD", 0)
+        offloaded = client.post("/api/v1/email-recommendations/batch", json={"emails": emails})
+        assert inline.json() == offloaded.json()
+
+
+class TestCacheStatsEndpoint:
+    def test_repeat_request_is_a_hit(self, client):
+        payload = {
+            "product_type": "bras",
+            "measurements": {"bust_circumference_cm": 91, "underbust_circumference_cm": 73},
+        }
+        before = client.get("/api/v1/cache-stats").json()
+        client.post("/api/v1/size-recommendation", json=payload)
+        client.post("/api/v1/size-recommendation", json=payload)
+        after = client.get("/api/v1/cache-stats").json()
+        assert after["hits"] - before["hits"] >= 1
+
+
+class TestCacheableGetEndpoint:
+    CANONICAL = (
+        "/api/v1/size-recommendation"
+        "?product_type=socks&ankle_circumference_cm=22&calf_circumference_cm=35.5"
+    )
+
+    def test_get_matches_post(self, client):
+        response = client.get(self.CANONICAL)
+        assert response.status_code == 200
+        assert response.headers["cache-control"].startswith("public, max-age=")
+        posted = client.post(
+            "/api/v1/size-recommendation",
+            json={
+                "product_type": "socks",
+                "measurements": {"calf_circumference_cm": 35.5, "ankle_circumference_cm": 22},
+            },
+        )
+        assert response.json() == posted.json()
+
+    def test_non_canonical_query_redirects(self, client):
+        response = client.get(
+            "/api/v1/size-recommendation"
+            "?calf_circumference_cm=35.50&product_type=socks&ankle_circumference_cm=22.0",
+            follow_redirects=False,
+        )
+        assert response.status_code == 301
+        assert response.headers["location"] == self.CANONICAL
+
+    def test_matching_etag_returns_304(self, client):
+        etag = client.get(self.CANONICAL).headers["etag"]
+        assert etag.startswith('"') and etag.endswith('"')
+        response = client.get(self.CANONICAL, headers={"If-None-Match": f'"other", {etag}'})
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+        assert client.get(self.CANONICAL, headers={"If-None-Match": '"other"'}).status_code == 200
+
+    def test_etag_changes_with_chart(self, client, reloadable_data):
+        before = client.get(self.CANONICAL).headers["etag"]
+        socks = json.loads((reloadable_data / "socks.json").read_text())
+        socks[0]["size"] = "SMALL"
+        (reloadable_data / "socks.json").write_text(json.dumps(socks))
+        client.post("/admin/reload-sizing-data", headers={"X-Admin-Token": "secret"})
+        assert client.get(self.CANONICAL).headers["etag"] != before
+
+    @pytest.mark.parametrize(
+        "query",
+        [
+            "product_type=socks",
+            "product_type=socks&calf_circumference_cm=abc",
+            "product_type=socks&calf_circumference_cm=30&calf_circumference_cm=31",
+            "product_type=hats&head_circumference_cm=55",
+        ],
+    )
+    def test_invalid_queries_rejected(self, client, query):
+        response = client.get(f"/api/v1/size-recommendation?{query}")
+        assert response.status_code == 422
+
+
+@pytest.fixture
+def reloadable_data(tmp_path, monkeypatch):
+    """Point the app at a scratch copy of the sizing data and restore it afterwards."""
+    import shutil
+
+    import app.main as main_module
+
+    for path in Path("data").glob("*.json"):
+        shutil.copy(path, tmp_path / path.name)
+    monkeypatch.setattr(main_module, "_data_dir", str(tmp_path))
+    monkeypatch.setattr(main_module, "_sizing_data", main_module._sizing_data)
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    return tmp_path
+
+
+class TestReloadEndpoint:
+    def test_disabled_without_admin_token(self, client, monkeypatch):
+        monkeypatch.delenv("ADMIN_TOKEN", raising=False)
+        response = client.post("/admin/reload-sizing-data")
+        assert response.status_code == 403
+
+    def test_rejects_wrong_token(self, client, reloadable_data):
+        response = client.post("/admin/reload-sizing-data", headers={"X-Admin-Token": "nope"})
+        assert response.status_code == 401
+
+    def test_reload_swaps_in_new_chart(self, client, reloadable_data):
+        socks = json.loads((reloadable_data / "socks.json").read_text())
+        socks[0]["size"] = "SMALL"
+        (reloadable_data / "socks.json").write_text(json.dumps(socks))
+
+        response = client.post("/admin/reload-sizing-data", headers={"X-Admin-Token": "secret"})
+        assert response.status_code == 200
+        assert "socks" in response.json()["products"]
+
+        result = client.post(
+            "/api/v1/size-recommendation",
+            json={
+                "product_type": "socks",
+                "measurements": {"calf_circumference_cm": 31, "ankle_circumference_cm": 20},
+            },
+        ).json()
+        assert result["recommended_size"] == "SMALL"
+
+    def test_bad_file_keeps_previous_data(self, client, reloadable_data):
+        import app.main as main_module
+
+        before = main_module._sizing_data
+        (reloadable_data / "bras.json").write_text('[{"size": "S"}]')
+
+        response = client.post("/admin/reload-sizing-data", headers={"X-Admin-Token": "secret"})
+        assert response.status_code == 422
+        assert main_module._sizing_data is before
+
+    def test_unreadable_file_keeps_previous_data(self, client, reloadable_data, monkeypatch):
+        import app.main as main_module
+        from app.metrics import DATA_RELOADS
+
+        def unreadable(self):
+            raise PermissionError(13, "Permission denied", str(self))
+
+        before = main_module._sizing_data
+        failures = DATA_RELOADS.value("failure")
+        monkeypatch.setattr(Path, "read_bytes", unreadable)
+        monkeypatch.setattr(Path, "read_text", unreadable)
+
+        response = client.post("/admin/reload-sizing-data", headers={"X-Admin-Token": "secret"})
+        assert response.status_code == 422
+        assert "Permission denied" in response.json()["detail"]
+        assert main_module._sizing_data is before
+        assert DATA_RELOADS.value("failure") == failures + 1
+        asyncio.run(main_module._reload_on_change())  # the watcher's callback swallows it too
+
+
+class TestChartExportEndpoint:
+    def test_latest_redirects_to_immutable_version(self, client):
+        response = client.get("/api/v1/charts/socks", follow_redirects=False)
+        assert response.status_code == 307
+        location = response.headers["location"]
+        assert location.startswith("/api/v1/charts/socks/")
+
+        exported = client.get(location)
+        assert exported.status_code == 200
+        assert "immutable" in exported.headers["cache-control"]
+        body = exported.json()
+        assert body["product_type"] == "socks"
+        assert location.endswith(body["version"])
+
+    def test_superseded_version_is_not_served(self, client, reloadable_data):
+        old = client.get("/api/v1/charts/socks", follow_redirects=False).headers["location"]
+        socks = json.loads((reloadable_data / "socks.json").read_text())
+        socks[0]["size"] = "SMALL"
+        (reloadable_data / "socks.json").write_text(json.dumps(socks))
+        client.post("/admin/reload-sizing-data", headers={"X-Admin-Token": "secret"})
+
+        assert client.get(old).status_code == 404
+        new = client.get("/api/v1/charts/socks", follow_redirects=False).headers["location"]
+        assert new != old
+        assert client.get(new).json()["sizes"][0] == "SMALL"
+
+    def test_unknown_product_is_404(self, client):
+        assert client.get("/api/v1/charts/hats", follow_redirects=False).status_code == 404
+
+
+class TestDiscoveredProducts:
+    def test_new_chart_file_is_served_without_code_changes(self, client, reloadable_data):
+        chart = [
+            {"size": "S", "measurements": {"hand_circumference_cm": {"min": 15, "max": 18}}},
+            {"size": "M", "measurements": {"hand_circumference_cm": {"min": 18, "max": 21}}},
+        ]
+        (reloadable_data / "compression-gloves.json").write_text(json.dumps(chart))
+        response = client.post("/admin/reload-sizing-data", headers={"X-Admin-Token": "secret"})
+        assert "compression_gloves" in response.json()["products"]
+
+        result = client.post(
+            "/api/v1/size-recommendation",
+            json={
+                "product_type": "compression_gloves",
+                "measurements": {"hand_circumference_cm": 20},
+            },
+        ).json()
+        assert result["recommended_size"] == "M"
+
+    def test_unknown_product_error_names_the_field(self, client):
+        response = client.post(
+            "/api/v1/size-recommendation",
+            json={"product_type": "hats", "measurements": {"head_cm": 58}},
+        )
+        assert response.status_code == 422
+        assert response.json()["detail"][0]["loc"] == ["body", "product_type"]
+
+
+class TestMetricsEndpoint:
+    def test_reports_latency_by_product_and_confidence(self, client):
+        client.post(
+            "/api/v1/size-recommendation",
+            json={
+                "product_type": "socks",
+                "measurements": {"calf_circumference_cm": 40, "ankle_circumference_cm": 24},
+            },
+        )
+        client.post("/api/v1/size-recommendation", json={"product_type": "socks"})
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        text = response.text
+        assert (
+            'sizing_recommendation_request_duration_seconds_count{product_type="socks",'
+            'confidence="exact"}' in text
+        )
+        assert 'sizing_engine_duration_seconds_count{product_type="socks"}' in text
+        assert 'route="/api/v1/size-recommendation",method="POST",status="200"' in text
+        assert 'sizing_request_validation_failures_total{route="/api/v1/size-recommendation"}' in (
+            text
+        )
+        assert "sizing_cache_hits " in text
+
+    def test_reload_counters(self, client, reloadable_data):
+        client.post("/admin/reload-sizing-data", headers={"X-Admin-Token": "secret"})
+        text = client.get("/metrics").text
+        assert 'sizing_data_reloads_total{result="success"}' in text
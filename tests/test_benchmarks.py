@@ -0,0 +1,117 @@
+"""Sanity checks for the benchmark suite's generators, load harness and regression gates."""
+
+import asyncio
+import json
+from collections import Counter
+
+import httpx
+import pytest
+
+from app.sizing.engine import recommend_size
+from app.sizing.loader import _validate_sizing_entry, load_sizing_data
+from benchmarks.load import build_workload, parse_mix, percentile, run_closed_loop, summarize
+from benchmarks.load import compare as load_compare
+from benchmarks.run import compare
+from benchmarks.synthetic import (
+    make_catalog,
+    make_measurements,
+    make_out_of_range_measurements,
+    write_data_dir,
+)
+
+
+class TestSyntheticData:
+    def test_generated_charts_pass_validation(self):
+        catalog = make_catalog(3, 60, 12)
+        for product_type, chart in catalog.items():
+            for i, entry in enumerate(chart):
+                _validate_sizing_entry(entry, product_type, i)
+
+    def test_generated_data_dir_loads(self, tmp_path):
+        write_data_dir(tmp_path, 20, 5)
+        data = load_sizing_data(str(tmp_path))
+        assert all(len(entries) == 20 for entries in data.values())
+
+    def test_measurements_are_scoreable(self):
+        chart = make_catalog(1, 30, 8)["product_0000"]
+        for m in make_measurements(chart, 50):
+            assert recommend_size("p", m, {"p": chart})["recommended_size"]
+
+    def test_out_of_range_measurements_fit_no_size(self):
+        chart = make_catalog(1, 30, 4)["product_0000"]
+        for m in make_out_of_range_measurements(chart, 50):
+            assert recommend_size("p", m, {"p": chart})["confidence"] == "out_of_range"
+
+
+class TestCompare:
+    def test_flags_only_cases_beyond_tolerance(self):
+        baseline = {"results": {"a": {"normalized": 1.0}, "b": {"normalized": 1.0}}}
+        current = {"results": {"a": {"normalized": 1.4}, "b": {"normalized": 1.6}}}
+        regressions = compare(current, baseline, tolerance=0.5)
+        assert len(regressions) == 1
+        assert regressions[0].startswith("b:")
+
+    def test_ignores_cases_missing_from_baseline(self):
+        assert compare({"results": {"new": {"normalized": 9.0}}}, {"results": {}}, 0.5) == []
+
+
+class TestLoadHarness:
+    def test_mix_is_normalized(self):
+        assert parse_mix("leggings=3,socks=1") == {"leggings": 0.75, "socks": 0.25}
+        with pytest.raises(ValueError):
+            parse_mix("socks=0")
+
+    def test_workload_follows_mix_and_is_scoreable(self):
+        data = load_sizing_data("data")
+        workload = build_workload("data", {"socks": 0.75, "bras": 0.25}, distinct=40)
+        counts = Counter(product for product, _ in workload)
+        assert counts == {"socks": 30, "bras": 10}
+        for product, body in workload:
+            payload = json.loads(body)
+            assert payload["product_type"] == product
+            assert recommend_size(product, payload["measurements"], data)["recommended_size"]
+
+    def test_percentiles_use_nearest_rank(self):
+        values = [float(i) for i in range(1, 101)]
+        assert [percentile(values, p) for p in (50, 95, 99, 100)] == [50.0, 95.0, 99.0, 100.0]
+        assert percentile([], 99) == 0.0
+
+    def test_summary_counts_errors(self):
+        samples = [("socks", 200, 0.010)] * 98 + [("bras", 503, 0.5), ("bras", 0, 1.0)]
+        summary = summarize(samples, elapsed=2.0)
+        assert summary["throughput_rps"] == 50.0
+        assert summary["error_rate"] == 0.02
+        assert summary["statuses"] == {"0": 1, "200": 98, "503": 1}
+        assert summary["p50_ms"] == 10.0
+        assert summary["products"]["bras"]["requests"] == 2
+
+    def test_compare_flags_throughput_and_p99(self):
+        base = {"calibration_ns": 100.0, "runs": {"c": {"throughput_rps": 100, "p99_ms": 10}}}
+
+        def run(rps, p99, errors=0.0, calibration=100.0):
+            result = {"throughput_rps": rps, "p99_ms": p99, "error_rate": errors}
+            return {"calibration_ns": calibration, "runs": {"c": result}}
+
+        assert load_compare(run(80, 12), base, 0.3, 0.01) == []
+        assert len(load_compare(run(60, 12), base, 0.3, 0.01)) == 1
+        assert len(load_compare(run(80, 14), base, 0.3, 0.01)) == 1
+        assert len(load_compare(run(100, 10, errors=0.05), base, 0.3, 0.01)) == 1
+        # A machine twice as slow is held to half the throughput and twice the latency
+        assert load_compare(run(40, 24, calibration=200.0), base, 0.3, 0.01) == []
+
+    def test_closed_loop_against_app(self):
+        from fastapi.testclient import TestClient
+
+        from app.main import app
+
+        workload = build_workload("data", parse_mix("socks=1,leggings=1"), distinct=20)
+
+        async def run():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await run_closed_loop(client, workload, concurrency=4, duration=0.2)
+
+        with TestClient(app):
+            summary = asyncio.run(run())
+        assert summary["requests"] > 0
+        assert summary["statuses"] == {"200": summary["requests"]}
@@ -0,0 +1,74 @@
+"""Unit tests for the offline bulk CSV scorer."""
+
+import csv
+import io
+
+import pytest
+
+from app.sizing.bulk import main, run
+from app.sizing.engine import recommend_size
+from app.sizing.loader import compile_sizing_data, load_sizing_data
+
+SIZING_DATA = compile_sizing_data(load_sizing_data("data"))
+
+
+def _input_csv(n: int) -> str:
+    lines = ["order_id,product_type,calf_circumference_cm,ankle_circumference_cm,height_cm"]
+    for i in range(n):
+        lines.append(f"o{i},socks,{25 + i % 30},{15 + i % 20},")
+    lines.append("bad1,hats,40,20,")
+    lines.append("bad2,socks,forty,20,")
+    lines.append("bad3,socks,,,")
+    return "\n".join(lines) + "\n"
+
+
+def _score(text: str, **kwargs) -> tuple[list[dict], dict]:
+    out = io.StringIO()
+    stats = run("data", io.StringIO(text), out, **kwargs)
+    return list(csv.DictReader(io.StringIO(out.getvalue()))), stats
+
+
+class TestBulkScoring:
+    def test_matches_recommend_size_in_input_order(self):
+        rows, stats = _score(_input_csv(50), chunk_rows=7)
+        assert [row["order_id"] for row in rows[:50]] == [f"o{i}" for i in range(50)]
+        for row in rows[:50]:
+            expected = recommend_size(
+                "socks",
+                {
+                    "calf_circumference_cm": float(row["calf_circumference_cm"]),
+                    "ankle_circumference_cm": float(row["ankle_circumference_cm"]),
+                },
+                SIZING_DATA,
+            )
+            assert row["recommended_size"] == expected["recommended_size"]
+            assert row["confidence"] == expected["confidence"]
+            assert row["error"] == ""
+        assert stats["rows"] == 53
+        assert stats["errors"] == 3
+
+    def test_row_errors_are_reported_per_row(self):
+        rows, _ = _score(_input_csv(0))
+        assert "Unknown product type: hats" in rows[0]["error"]
+        assert "not a number" in rows[1]["error"]
+        assert "no measurement" in rows[2]["error"]
+        assert all(row["recommended_size"] == "" for row in rows)
+
+    def test_process_pool_matches_inline(self):
+        text = _input_csv(120)
+        inline, _ = _score(text, chunk_rows=16)
+        pooled, stats = _score(text, workers=2, chunk_rows=16)
+        assert pooled == inline
+        assert stats["workers"] == 2
+
+    def test_requires_product_type_column(self):
+        with pytest.raises(ValueError, match="product_type"):
+            run("data", io.StringIO("height_cm\n170\n"), io.StringIO())
+
+    def test_cli_writes_output_and_stats(self, tmp_path, capsys):
+        source = tmp_path / "orders.csv"
+        source.write_text(_input_csv(5))
+        output = tmp_path / "scored.csv"
+        assert main(["data", str(source), str(output), "--workers", "1"]) == 0
+        assert len(output.read_text().splitlines()) == 9
+        assert "Scored 8 rows (3 errors)" in capsys.readouterr().err
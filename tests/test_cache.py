@@ -0,0 +1,85 @@
+"""Unit tests for the recommendation cache."""
+
+import pytest
+
+from app.sizing.cache import RecommendationCache, normalize_measurements
+from app.sizing.engine import recommend_size
+from app.sizing.loader import compile_sizing_data, load_sizing_data
+
+SIZING_DATA = compile_sizing_data(load_sizing_data("data"))
+
+SOCKS_L = {"calf_circumference_cm": 40, "ankle_circumference_cm": 24}
+
+
+class TestNormalization:
+    def test_order_and_type_independent(self):
+        a = normalize_measurements({"x": 165, "y": 60}, 2)
+        b = normalize_measurements({"y": 60.0, "x": 165.0}, 2)
+        assert a == b
+
+    def test_rounds_to_precision(self):
+        assert normalize_measurements({"x": 165.004}, 2) == normalize_measurements({"x": 165}, 2)
+        assert normalize_measurements({"x": 165.4}, 0) == (("x", 165.0),)
+
+
+class TestRecommendationCache:
+    def test_hit_returns_same_result_as_engine(self):
+        cache = RecommendationCache(maxsize=8)
+        first = cache.recommend("socks", SOCKS_L, SIZING_DATA)
+        second = cache.recommend("socks", dict(reversed(SOCKS_L.items())), SIZING_DATA)
+        assert first == second == recommend_size("socks", SOCKS_L, SIZING_DATA)
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_lru_eviction(self):
+        cache = RecommendationCache(maxsize=2, policy="lru")
+        cache.recommend("socks", {"calf_circumference_cm": 30}, SIZING_DATA)
+        cache.recommend("socks", {"calf_circumference_cm": 35}, SIZING_DATA)
+        cache.recommend("socks", {"calf_circumference_cm": 30}, SIZING_DATA)
+        cache.recommend("socks", {"calf_circumference_cm": 40}, SIZING_DATA)
+        assert cache.evictions == 1
+        cache.recommend("socks", {"calf_circumference_cm": 30}, SIZING_DATA)
+        assert cache.hits == 2
+
+    def test_fifo_eviction(self):
+        cache = RecommendationCache(maxsize=2, policy="fifo")
+        cache.recommend("socks", {"calf_circumference_cm": 30}, SIZING_DATA)
+        cache.recommend("socks", {"calf_circumference_cm": 35}, SIZING_DATA)
+        cache.recommend("socks", {"calf_circumference_cm": 30}, SIZING_DATA)
+        cache.recommend("socks", {"calf_circumference_cm": 40}, SIZING_DATA)
+        cache.recommend("socks", {"calf_circumference_cm": 30}, SIZING_DATA)
+        assert cache.hits == 1
+
+    def test_ttl_expiry(self, monkeypatch):
+        clock = [100.0]
+        monkeypatch.setattr("app.sizing.cache.time.monotonic", lambda: clock[0])
+        cache = RecommendationCache(maxsize=8, ttl_seconds=10)
+        cache.recommend("socks", SOCKS_L, SIZING_DATA)
+        clock[0] += 11
+        cache.recommend("socks", SOCKS_L, SIZING_DATA)
+        assert (cache.hits, cache.misses) == (0, 2)
+
+    def test_invalidated_when_data_changes(self):
+        cache = RecommendationCache(maxsize=8)
+        cache.recommend("socks", SOCKS_L, SIZING_DATA)
+        reloaded = dict(SIZING_DATA)
+        cache.recommend("socks", SOCKS_L, reloaded)
+        assert cache.misses == 2
+        assert cache.stats()["invalidations"] == 1
+
+    def test_get_never_computes(self):
+        cache = RecommendationCache(maxsize=8)
+        assert cache.get("socks", SOCKS_L, SIZING_DATA) is None
+        assert cache.stats()["misses"] == 0
+        result = cache.recommend("socks", SOCKS_L, SIZING_DATA)
+        assert cache.get("socks", SOCKS_L, SIZING_DATA) is result
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_zero_size_disables_caching(self):
+        cache = RecommendationCache(maxsize=0)
+        cache.recommend("socks", SOCKS_L, SIZING_DATA)
+        cache.recommend("socks", SOCKS_L, SIZING_DATA)
+        assert cache.stats()["size"] == 0
+
+    def test_rejects_unknown_policy(self):
+        with pytest.raises(ValueError):
+            RecommendationCache(policy="random")
@@ -0,0 +1,65 @@
+"""Unit tests for single-flight coalescing."""
+
+import asyncio
+
+import pytest
+
+from app.coalesce import SingleFlight
+
+
+class TestSingleFlight:
+    def test_concurrent_calls_share_one_computation(self):
+        flight = SingleFlight()
+        calls = []
+
+        async def work(value):
+            calls.append(value)
+            await asyncio.sleep(0.01)
+            return {"value": value}
+
+        async def run():
+            same = await asyncio.gather(*(flight.do("a", work, 1) for _ in range(5)))
+            other = await flight.do("b", work, 2)
+            again = await flight.do("a", work, 3)
+            return same, other, again
+
+        same, other, again = asyncio.run(run())
+        assert calls == [1, 2, 3]
+        assert all(result is same[0] for result in same)
+        assert other == {"value": 2}
+        # A finished call isn't remembered
+        assert again == {"value": 3}
+        assert flight.stats() == {"in_flight": 0, "leaders": 3, "followers": 4}
+
+    def test_exception_reaches_every_caller(self):
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("chart unavailable")
+
+        async def run():
+            calls = [flight.do("k", fail) for _ in range(3)]
+            return await asyncio.gather(*calls, return_exceptions=True)
+
+        results = asyncio.run(run())
+        assert [type(r) for r in results] == [ValueError] * 3
+        assert len(flight) == 0
+
+    def test_cancelled_caller_does_not_cancel_the_others(self):
+        flight = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.02)
+            return "done"
+
+        async def run():
+            leader = asyncio.create_task(flight.do("k", work))
+            follower = asyncio.create_task(flight.do("k", work))
+            await asyncio.sleep(0)
+            leader.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await leader
+            return await follower
+
+        assert asyncio.run(run()) == "done"
@@ -0,0 +1,149 @@
+"""Unit tests for the write-behind recommendation event store."""
+
+import asyncio
+import json
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main_module
+from app.events import EventSink, connect, delete_events_before, main, summarize_events
+
+EXACT_M = {"recommended_size": "M", "confidence": "exact", "notes": ""}
+
+
+def _rows(path) -> list[tuple]:
+    connection = sqlite3.connect(path)
+    try:
+        return connection.execute(
+            "SELECT endpoint, tenant, product_type, measurements, recommended_size, confidence,"
+            " data_version FROM recommendation_events ORDER BY id"
+        ).fetchall()
+    finally:
+        connection.close()
+
+
+class TestEventSink:
+    def test_record_and_flush(self, tmp_path):
+        path = tmp_path / "events.db"
+        sink = EventSink(str(path))
+        sink.record("POST /x", "socks", {"calf_circumference_cm": 40}, EXACT_M, "acme", "v1")
+        assert not path.exists()  # nothing written on the request path
+        sink.close()
+        assert _rows(path) == [
+            ("POST /x", "acme", "socks", '{"calf_circumference_cm":40}', "M", "exact", "v1")
+        ]
+        assert sink.stats() == {"buffered": 0, "written": 1, "dropped": 0, "write_failures": 0}
+
+    def test_overflow_drops_oldest(self, tmp_path):
+        path = tmp_path / "events.db"
+        sink = EventSink(str(path), max_buffered=3, batch_size=2)
+        for i in range(5):
+            sink.record("POST /x", "socks", {"calf_circumference_cm": i}, EXACT_M)
+        assert (len(sink), sink.dropped) == (3, 2)
+        sink.close()
+        assert [json.loads(row[3])["calf_circumference_cm"] for row in _rows(path)] == [2, 3, 4]
+
+    def test_failed_write_counted_and_dropped(self, tmp_path):
+        sink = EventSink(str(tmp_path))  # a directory, not a database file
+        sink.record("POST /x", "socks", {}, EXACT_M)
+        sink.flush()
+        assert sink.stats() == {"buffered": 0, "written": 0, "dropped": 1, "write_failures": 1}
+
+    def test_background_task_flushes_and_drains_on_cancel(self, tmp_path):
+        path = tmp_path / "events.db"
+        sink = EventSink(str(path), batch_size=2, flush_interval=0.01)
+
+        async def scenario():
+            task = asyncio.create_task(sink.run())
+            for _ in range(3):
+                sink.record("POST /x", "socks", {}, EXACT_M)
+            while sink.written < 3:
+                await asyncio.sleep(0.01)
+            sink.record("POST /x", "bras", {}, EXACT_M)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(scenario())
+        assert [row[2] for row in _rows(path)] == ["socks"] * 3 + ["bras"]
+
+    def test_rejects_empty_buffer(self, tmp_path):
+        with pytest.raises(ValueError):
+            EventSink(str(tmp_path / "events.db"), max_buffered=0)
+
+
+@pytest.fixture
+def events_db(tmp_path):
+    path = tmp_path / "events.db"
+    connection = connect(str(path))
+    rows = [
+        (100.0, "acme", "socks", "M", "exact"),
+        (200.0, None, "socks", "M", "exact"),
+        (300.0, None, "socks", "L", "interpolated"),
+        (86_500.0, None, "socks", "L", "interpolated"),
+        (150.0, None, "bras", "S", "out_of_range"),
+    ]
+    with connection:
+        connection.executemany(
+            "INSERT INTO recommendation_events (ts, endpoint, tenant, product_type, measurements,"
+            " recommended_size, confidence) VALUES (?, 'POST /x', ?, ?, '{}', ?, ?)",
+            rows,
+        )
+    yield path, connection
+    connection.close()
+
+
+class TestSummaries:
+    def test_per_product_and_window(self, events_db):
+        _, connection = events_db
+        summaries = summarize_events(connection, window_seconds=86_400)
+        assert [(s["product_type"], s["window_start"], s["total"]) for s in summaries] == [
+            ("bras", 0, 1),
+            ("socks", 0, 3),
+            ("socks", 86_400, 1),
+        ]
+        socks_day = summaries[1]
+        assert socks_day["confidence"] == {"exact": 2, "interpolated": 1}
+        assert socks_day["sizes"] == {"M": 2, "L": 1}
+
+    def test_filters(self, events_db):
+        _, connection = events_db
+        (summary,) = summarize_events(connection, product_type="socks", since=150, until=86_400)
+        assert summary["total"] == 2
+        (summary,) = summarize_events(connection, tenant="acme")
+        assert summary["sizes"] == {"M": 1}
+        with pytest.raises(ValueError):
+            summarize_events(connection, window_seconds=0)
+
+    def test_delete_before(self, events_db):
+        _, connection = events_db
+        assert delete_events_before(connection, 250) == 3
+        assert sum(s["total"] for s in summarize_events(connection)) == 2
+
+    def test_cli(self, events_db, capsys):
+        path, _ = events_db
+        assert main([str(path), "--product", "bras", "--window", "3600"]) == 0
+        (line,) = capsys.readouterr().out.splitlines()
+        assert json.loads(line)["confidence"] == {"out_of_range": 1}
+
+
+def test_recommendations_are_recorded(tmp_path, monkeypatch):
+    path = tmp_path / "events.db"
+    monkeypatch.setattr(main_module, "_event_sink", EventSink(str(path), flush_interval=60))
+    measurements = {"calf_circumference_cm": 40, "ankle_circumference_cm": 24}
+    with TestClient(main_module.app) as client:
+        client.post(
+            "/api/v1/size-recommendation",
+            json={"product_type": "socks", "measurements": measurements},
+        )
+        client.get("/api/v1/size-recommendation", params={"product_type": "socks", **measurements})
+    # Shutdown wrote out what the sink still held
+    rows = _rows(path)
+    assert [row[0] for row in rows] == [
+        "POST /api/v1/size-recommendation",
+        "GET /api/v1/size-recommendation",
+    ]
+    assert {row[4] for row in rows} == {"L"}
+    assert {row[6] for row in rows} == {main_module._dataset_version("data")}
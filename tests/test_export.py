@@ -0,0 +1,172 @@
+"""Chart export tests, including the widget parity harness.
+
+The harness sweeps a dense grid of measurements over every chart, evaluates each
+point with the widget's own JavaScript evaluator (run under Node) against the
+chart's export, and requires the exact same result as ``recommend_size``.
+"""
+
+import itertools
+import json
+import math
+import random
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from app.sizing import export
+from app.sizing.chart import compile_chart
+from app.sizing.engine import recommend_size
+from app.sizing.export import EXPORT_FORMAT, export_chart, export_version
+from app.sizing.loader import compile_sizing_data, load_sizing_data
+
+COMPILED_DATA = compile_sizing_data(load_sizing_data("data"))
+WIDGET = Path("widget/sizing-widget.js").resolve()
+
+NODE_RUNNER = """
+const { evaluateChart } = require(process.argv[1]);
+let input = "";
+process.stdin.on("data", (chunk) => (input += chunk));
+process.stdin.on("end", () => {
+  const { charts, cases } = JSON.parse(input);
+  const results = cases.map(([productType, m]) => evaluateChart(charts[productType], m));
+  process.stdout.write(JSON.stringify(results));
+});
+"""
+
+
+def _awkward_chart(n_sizes: int, seed: int, sparse: bool = False) -> list[dict]:
+    """Overlapping, nested and zero-span ranges with fractional bounds; ties are common."""
+    rng = random.Random(seed)
+    chart = []
+    for row in range(n_sizes):
+        measurements = {}
+        for field in ("a_cm", "b_cm", "c_kg"):
+            if sparse and rng.random() < 0.25:
+                continue
+            low = rng.randint(0, 60) + row // 2 + rng.choice([0, 0.1, 0.5])
+            width = rng.choice([0, 0.3, 1, 2, 5, 10, 40])
+            measurements[field] = {"min": low, "max": low + width}
+        if not measurements:
+            measurements["a_cm"] = {"min": 1, "max": 2}
+        chart.append({"size": f"S{row}", "measurements": measurements})
+    return chart
+
+
+def _sweep_values(chart, col: int) -> list[float]:
+    """Every boundary, points just inside/outside it, midpoints, and values beyond the chart."""
+    values = set()
+    cells = range(col, chart.n_sizes * chart.n_fields, chart.n_fields)
+    bounds = [(chart.mins[c], chart.maxs[c]) for c in cells if chart.present[c]]
+    for low, high in bounds:
+        for v in (low, high, (low + high) / 2, low - 0.05, high + 0.05, low - 1, high + 3):
+            values.add(round(v, 2))
+    low = min(b[0] for b in bounds)
+    high = max(b[1] for b in bounds)
+    values.update({round(low * 0.5, 2), round(high * 1.5, 2), 0.1})
+    return sorted(values)
+
+
+def _sweep(product_type: str, chart, rng: random.Random, limit: int = 1500) -> list:
+    per_field = [_sweep_values(chart, col) for col in range(chart.n_fields)]
+    if math.prod(len(values) for values in per_field) <= limit:
+        grid = list(itertools.product(*per_field))
+    else:
+        grid = [tuple(rng.choice(values) for values in per_field) for _ in range(limit)]
+    cases = []
+    for point in grid:
+        measurements = dict(zip(chart.fields, point, strict=True))
+        cases.append([product_type, measurements])
+        # Partial measurement sets, and keys the chart doesn't know about
+        subset = {k: v for k, v in measurements.items() if rng.random() < 0.5}
+        if subset:
+            cases.append([product_type, {**subset, "unrelated_cm": 10}])
+    cases.append([product_type, {"unrelated_cm": 10, "another_kg": 3}])
+    return cases
+
+
+def _run_widget(charts: dict, cases: list) -> list:
+    completed = subprocess.run(
+        ["node", "-e", NODE_RUNNER, str(WIDGET)],
+        input=json.dumps({"charts": charts, "cases": cases}),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(completed.stdout)
+
+
+class TestExport:
+    def test_export_layout(self):
+        chart = COMPILED_DATA["socks"]
+        exported = export_chart(chart)
+        assert exported["format"] == EXPORT_FORMAT
+        assert exported["version"] == export_version(chart)
+        assert exported["fields"] == list(chart.fields)
+        assert len(exported["min"]) == len(exported["max"]) == chart.n_sizes * chart.n_fields
+        assert exported["thresholds"]["interpolated_max_penalty"] == 0.5
+
+    def test_version_covers_format_thresholds_and_notes(self, monkeypatch):
+        chart = COMPILED_DATA["socks"]
+        before = export_version(chart)
+        for name, value in (
+            ("EXPORT_FORMAT", EXPORT_FORMAT + 1),
+            ("INTERPOLATED_MAX_PENALTY", 0.25),
+            ("NOTE_CLOSE", "Changed wording for {best}."),
+        ):
+            with monkeypatch.context() as patch:
+                patch.setattr(export, name, value)
+                patch.setattr(export, "RULES_DIGEST", export._rules_digest(export._rules()))
+                assert export_version(chart) != before, name
+        assert export_version(chart) == before
+
+    def test_undefined_ranges_are_null(self):
+        chart = compile_chart(
+            "sparse",
+            [
+                {"size": "S", "measurements": {"a_cm": {"min": 1, "max": 2}}},
+                {"size": "M", "measurements": {"b_cm": {"min": 3.5, "max": 4}}},
+            ],
+        )
+        exported = export_chart(chart)
+        assert exported["min"] == [1, None, None, 3.5]
+        assert exported["max"] == [2, None, None, 4]
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="Node.js is required to run the widget")
+class TestWidgetParity:
+    def test_widget_matches_engine_on_real_charts(self):
+        rng = random.Random(11)
+        cases = [c for pt, chart in COMPILED_DATA.items() for c in _sweep(pt, chart, rng)]
+        charts = {pt: export_chart(chart) for pt, chart in COMPILED_DATA.items()}
+        local = _run_widget(charts, cases)
+        for (product_type, measurements), result in zip(cases, local, strict=True):
+            assert result == recommend_size(product_type, measurements, COMPILED_DATA), (
+                product_type,
+                measurements,
+            )
+
+    def test_widget_matches_engine_on_awkward_charts(self):
+        # Large charts take the engine's indexed path; sparse ones the linear scan
+        raw = {
+            "big": _awkward_chart(60, seed=1),
+            "sparse": _awkward_chart(20, seed=2, sparse=True),
+            "small": _awkward_chart(5, seed=3),
+        }
+        compiled = compile_sizing_data(raw)
+        assert compiled["big"].size_index is not None
+        rng = random.Random(12)
+        cases = [c for pt, chart in compiled.items() for c in _sweep(pt, chart, rng, 1000)]
+        local = _run_widget({pt: export_chart(c) for pt, c in compiled.items()}, cases)
+        for (product_type, measurements), result in zip(cases, local, strict=True):
+            assert result == recommend_size(product_type, measurements, compiled), (
+                product_type,
+                measurements,
+            )
+
+    def test_widget_declines_unknown_format(self):
+        exported = {**export_chart(COMPILED_DATA["socks"]), "format": EXPORT_FORMAT + 1}
+        assert _run_widget({"socks": exported}, [["socks", {"calf_circumference_cm": 30}]]) == [
+            None
+        ]
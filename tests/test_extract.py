@@ -0,0 +1,88 @@
+"""Unit tests for email measurement extraction."""
+
+import pytest
+
+from app.sizing.extract import detect_product_type, extract_measurements, extract_request
+
+
+class TestProductDetection:
+    @pytest.mark.parametrize(
+        ("text", "expected"),
+        [
+            ("What size leggings should I get?", "leggings"),
+            ("Arm sleeve sizing help", "arm_sleeves"),
+            ("Bra size question", "bras"),
+            ("knee-high compression", "socks"),
+            ("Do you have size XL in blue?", None),
+            # Whole words only: "brand" and "embrace" are not bras
+            ("Which brand should I embrace?", None),
+        ],
+    )
+    def test_core_products(self, text, expected):
+        assert detect_product_type(text) == expected
+
+    def test_discovered_products_by_name(self):
+        assert detect_product_type("sizing for maternity tights", ["maternity_tights"]) == (
+            "maternity_tights"
+        )
+
+
+class TestMeasurementExtraction:
+    def test_labelled_metric_values(self):
+        assert extract_measurements("Bust: 95cm, underbust: 77cm") == {
+            "bust_circumference_cm": 95.0,
+            "underbust_circumference_cm": 77.0,
+        }
+
+    def test_sentences(self):
+        text = "I'm 170cm tall and weigh 65kg. My waist is 70cm and hips are 93cm."
+        assert extract_measurements(text) == {
+            "height_cm": 170.0,
+            "weight_kg": 65.0,
+            "waist_circumference_cm": 70.0,
+            "hip_circumference_cm": 93.0,
+        }
+
+    def test_imperial_units_are_converted(self):
+        text = "I'm 5'6\" and 140 lbs. Calf 14 inches, ankle: 9 in"
+        assert extract_measurements(text) == {
+            "height_cm": 167.6,
+            "weight_kg": 63.5,
+            "calf_circumference_cm": 35.6,
+            "ankle_circumference_cm": 22.9,
+        }
+
+    def test_feet_height_beats_a_bare_number(self):
+        assert extract_measurements("height 5 ft 4, weight: 130 pounds")["height_cm"] == 162.6
+
+    def test_unitless_values_follow_the_email(self):
+        assert extract_measurements("height: 165, weight 60, hips 95") == {
+            "height_cm": 165.0,
+            "weight_kg": 60.0,
+            "hip_circumference_cm": 95.0,
+        }
+        inches = extract_measurements("my band is 30 inches and my bust is 36, height 64")
+        assert inches == {
+            "underbust_circumference_cm": 76.2,
+            "bust_circumference_cm": 91.4,
+            "height_cm": 162.6,
+        }
+
+    def test_feet_height_and_pounds_make_unitless_values_inches(self):
+        text = "I'm 5'6\" and weigh 140 lbs, hips 38, waist 30"
+        assert extract_measurements(text) == {
+            "height_cm": 167.6,
+            "weight_kg": 63.5,
+            "hip_circumference_cm": 96.5,
+            "waist_circumference_cm": 76.2,
+        }
+        # Any metric unit keeps unitless values in centimetres
+        assert extract_measurements("5'6\", 60 kg, hips 95")["hip_circumference_cm"] == 95.0
+
+    def test_no_measurements(self):
+        assert extract_measurements("I usually wear a medium in other brands.") == {}
+
+
+def test_extract_request_uses_subject_for_product_only():
+    found = extract_request("Sock sizing, calf 40", "My ankle is 22 cm")
+    assert found == {"product_type": "socks", "measurements": {"ankle_circumference_cm": 22.0}}
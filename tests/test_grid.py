@@ -0,0 +1,78 @@
+"""Unit tests for precomputed decision grids."""
+
+import random
+
+from app.sizing.chart import compile_chart
+from app.sizing.engine import recommend_size
+from app.sizing.grid import attach_decision_grids, build_decision_grid, verify_decision_grid
+from app.sizing.loader import compile_sizing_data, load_sizing_data
+
+RAW = load_sizing_data("data")
+PLAIN = compile_sizing_data(RAW)
+GRIDDED = compile_sizing_data(RAW, decision_grids=True)
+
+
+class TestBuild:
+    def test_only_two_field_charts_get_grids(self):
+        with_grids = {name for name, chart in GRIDDED.items() if chart.decision_grid is not None}
+        assert with_grids == {"socks", "bras"}
+
+    def test_verification_passes_for_real_charts(self):
+        for product_type in ("socks", "bras"):
+            assert verify_decision_grid(GRIDDED[product_type].decision_grid) == []
+
+    def test_grid_covers_chart_boundaries(self):
+        grid = GRIDDED["socks"].decision_grid
+        calf = grid.points(grid.chart.fields.index("calf_circumference_cm"))
+        assert 29 in calf and 49 in calf
+        assert calf[1] - calf[0] == 0.5
+
+    def test_too_many_cells_skipped(self):
+        assert build_decision_grid(PLAIN["bras"], max_cells=100) is None
+
+    def test_verification_reports_mismatches(self):
+        chart = compile_chart("socks", RAW["socks"])
+        grid = build_decision_grid(chart)
+        grid.confidence[0] = (grid.confidence[0] + 1) % 3
+        mismatches = verify_decision_grid(grid)
+        assert len(mismatches) == 1
+        assert mismatches[0].startswith("socks ")
+
+    def test_failed_verification_leaves_chart_on_engine(self, monkeypatch):
+        charts = compile_sizing_data(RAW)
+        monkeypatch.setattr("app.sizing.grid.verify_decision_grid", lambda grid: ["mismatch"])
+        assert attach_decision_grids(charts) == []
+        assert charts["socks"].decision_grid is None
+
+
+class TestLookup:
+    def test_matches_engine_on_and_off_lattice(self):
+        rng = random.Random(7)
+        for product_type in ("socks", "bras"):
+            fields = GRIDDED[product_type].fields
+            for _ in range(500):
+                measurements = {
+                    name: rng.choice([rng.randint(10, 180), rng.uniform(10, 180)])
+                    for name in fields
+                }
+                measurements[fields[0]] = round(measurements[fields[0]] * 2) / 2
+                assert recommend_size(product_type, measurements, GRIDDED) == recommend_size(
+                    product_type, measurements, PLAIN
+                ), measurements
+
+    def test_lattice_point_answered_from_grid(self):
+        grid = GRIDDED["socks"].decision_grid
+        measurements = {"calf_circumference_cm": 40.5, "ankle_circumference_cm": 24}
+        assert grid.lookup(GRIDDED["socks"].columns_for(measurements)) is not None
+
+    def test_off_lattice_and_partial_fall_through(self):
+        chart = GRIDDED["socks"]
+        grid = chart.decision_grid
+        cases = [
+            {"calf_circumference_cm": 40.25, "ankle_circumference_cm": 24},
+            {"calf_circumference_cm": 40},
+            {"calf_circumference_cm": 400, "ankle_circumference_cm": 24},
+            {"calf_circumference_cm": float("nan"), "ankle_circumference_cm": 24},
+        ]
+        for measurements in cases:
+            assert grid.lookup(chart.columns_for(measurements)) is None
@@ -0,0 +1,143 @@
+"""Unit tests for rate limiting and load shedding."""
+
+import asyncio
+
+import pytest
+
+from app.limits import LoadShedder, RateLimiter, _client_key
+from app.metrics import Counter
+
+
+def _scope(path: str = "/api/v1/size-recommendation", client: str = "1.2.3.4", headers=()):
+    return {"type": "http", "path": path, "client": (client, 1234), "headers": list(headers)}
+
+
+async def _call(shedder: LoadShedder, app, scope) -> int:
+    status = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+
+    await shedder.handle(app, scope, receive, send)
+    return status[0]
+
+
+async def _ok_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+class TestRateLimiter:
+    def test_burst_then_refill(self):
+        limiter = RateLimiter(rate=2, burst=3)
+        assert [limiter.acquire("a", now=0.0) for _ in range(3)] == [0, 0, 0]
+        assert limiter.acquire("a", now=0.0) == pytest.approx(0.5)
+        assert limiter.acquire("b", now=0.0) == 0
+        assert limiter.acquire("a", now=0.5) == 0
+
+    def test_forgets_least_recent_clients(self):
+        limiter = RateLimiter(rate=1, burst=1, max_clients=2)
+        for key in ("a", "b", "c"):
+            limiter.acquire(key, now=0.0)
+        assert len(limiter) == 2
+        # "a" was dropped, so it starts with a full bucket again
+        assert limiter.acquire("a", now=0.0) == 0
+
+    def test_client_key(self):
+        headers = [(b"origin", b"https://shop.example"), (b"x-forwarded-for", b"9.9.9.9, 10.0.0.1")]
+        scope = _scope(headers=headers)
+        assert _client_key(scope, "client", trust_proxy=False) == "1.2.3.4"
+        assert _client_key(scope, "client", trust_proxy=True) == "10.0.0.1"
+        assert _client_key(scope, "client", trust_proxy=True, proxy_hops=2) == "9.9.9.9"
+        # Fewer entries than trusted proxies: the header can't be trusted
+        assert _client_key(scope, "client", trust_proxy=True, proxy_hops=3) == "1.2.3.4"
+        assert _client_key(scope, "origin", trust_proxy=False) == "https://shop.example"
+
+
+class TestLoadShedder:
+    def test_rate_limited_client_gets_429_but_health_is_exempt(self):
+        rejections = Counter("rejections", "", ("reason",))
+        shedder = LoadShedder(rejections, rate=1, burst=2)
+
+        async def run():
+            statuses = [await _call(shedder, _ok_app, _scope()) for _ in range(3)]
+            other = await _call(shedder, _ok_app, _scope(client="5.6.7.8"))
+            health = [await _call(shedder, _ok_app, _scope("/health")) for _ in range(5)]
+            return statuses, other, health
+
+        statuses, other, health = asyncio.run(run())
+        assert statuses == [200, 200, 429]
+        assert other == 200
+        assert health == [200] * 5
+        assert rejections.value("rate_limited") == 1
+
+    def test_spoofed_forwarded_hops_share_the_proxy_seen_bucket(self):
+        rejections = Counter("rejections", "", ("reason",))
+        shedder = LoadShedder(rejections, rate=1, burst=2, trust_proxy=True)
+
+        async def run():
+            statuses = []
+            for i in range(4):
+                forwarded = f"203.0.113.{i}, 198.51.100.7".encode()
+                scope = _scope(client="10.0.0.1", headers=[(b"x-forwarded-for", forwarded)])
+                statuses.append(await _call(shedder, _ok_app, scope))
+            return statuses
+
+        assert asyncio.run(run()) == [200, 200, 429, 429]
+        assert len(shedder.limiter) == 1
+
+    def test_sheds_when_queue_is_full_or_wait_times_out(self):
+        rejections = Counter("rejections", "", ("reason",))
+        shedder = LoadShedder(rejections, max_concurrent=1, max_queued=1, queue_timeout=0.05)
+        release = asyncio.Event()
+
+        async def slow_app(scope, receive, send):
+            await release.wait()
+            await _ok_app(scope, receive, send)
+
+        async def run():
+            holder = asyncio.create_task(_call(shedder, slow_app, _scope()))
+            await asyncio.sleep(0)
+            assert shedder.stats()["in_flight"] == 1
+            waiter = asyncio.create_task(_call(shedder, slow_app, _scope()))
+            await asyncio.sleep(0)
+            assert shedder.stats()["queued"] == 1
+            overflow = await _call(shedder, slow_app, _scope())
+            health = await _call(shedder, _ok_app, _scope("/health"))
+            timed_out = await waiter
+            release.set()
+            return await holder, overflow, health, timed_out
+
+        holder, overflow, health, timed_out = asyncio.run(run())
+        assert (holder, overflow, health, timed_out) == (200, 503, 200, 503)
+        assert rejections.value("queue_full") == 1
+        assert rejections.value("queue_timeout") == 1
+        assert shedder.stats() == {"in_flight": 0, "queued": 0, "tracked_clients": 0}
+
+    def test_queued_request_runs_when_a_slot_frees(self):
+        rejections = Counter("rejections", "", ("reason",))
+        shedder = LoadShedder(rejections, max_concurrent=1, max_queued=4, queue_timeout=1)
+        release = asyncio.Event()
+
+        async def slow_app(scope, receive, send):
+            await release.wait()
+            await _ok_app(scope, receive, send)
+
+        async def run():
+            first = asyncio.create_task(_call(shedder, slow_app, _scope()))
+            await asyncio.sleep(0)
+            second = asyncio.create_task(_call(shedder, _ok_app, _scope()))
+            await asyncio.sleep(0.01)
+            release.set()
+            return await first, await second
+
+        assert asyncio.run(run()) == (200, 200)
+        assert rejections.value("queue_full") == rejections.value("queue_timeout") == 0
+
+    def test_rejects_unknown_key_mode(self):
+        with pytest.raises(ValueError, match="key_by"):
+            LoadShedder(Counter("r", "", ("reason",)), key_by="cookie")
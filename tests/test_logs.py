@@ -0,0 +1,92 @@
+"""Unit tests for the queue-based logging pipeline and access log."""
+
+import asyncio
+import json
+import logging
+import queue
+
+import pytest
+
+from app.logs import AccessLogMiddleware, DroppingQueueHandler, JsonFormatter
+
+
+def _record(msg: str, *args, **extra) -> logging.LogRecord:
+    record = logging.LogRecord("app.test", logging.INFO, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+async def _app(scope, receive, send):
+    scope["state"]["product_type"] = "socks"
+    scope["state"]["confidence"] = "exact"
+    await send({"type": "http.response.start", "status": scope["status"], "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+def _request(middleware: AccessLogMiddleware, status: int = 200) -> None:
+    scope = {"type": "http", "method": "POST", "path": "/x", "status": status}
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    asyncio.run(middleware(scope, receive, send))
+
+
+class TestJsonFormatter:
+    def test_includes_extra_fields(self):
+        line = JsonFormatter().format(_record("scored %s", "socks", product_type="socks"))
+        entry = json.loads(line)
+        assert entry["message"] == "scored socks"
+        assert entry["level"] == "info"
+        assert entry["product_type"] == "socks"
+        assert "args" not in entry and "msecs" not in entry
+
+
+class TestDroppingQueueHandler:
+    def test_drops_when_full_instead_of_blocking(self):
+        handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+        for i in range(5):
+            handler.handle(_record("record %d", i))
+        assert handler.dropped == 3
+        first = handler.queue.get_nowait()
+        assert (first.msg, first.args) == ("record 0", None)
+
+
+class TestAccessLogMiddleware:
+    def test_logs_structured_record(self, caplog):
+        middleware = AccessLogMiddleware(_app, data_version=lambda: "abc123")
+        with caplog.at_level(logging.INFO, logger="app.access"):
+            _request(middleware)
+        (record,) = caplog.records
+        assert record.event == "access"
+        assert (record.status, record.product_type, record.confidence) == (200, "socks", "exact")
+        assert record.data_version == "abc123"
+        assert record.latency_ms >= 0
+        assert record.sample_rate == 1.0
+
+    def test_tenant_and_its_data_version(self, caplog):
+        async def tenant_app(scope, receive, send):
+            scope["state"].update(tenant="acme", data_version="tenant123")
+            await _app(scope, receive, send)
+
+        middleware = AccessLogMiddleware(tenant_app, data_version=lambda: "abc123")
+        with caplog.at_level(logging.INFO, logger="app.access"):
+            _request(middleware)
+        (record,) = caplog.records
+        assert (record.tenant, record.data_version) == ("acme", "tenant123")
+
+    def test_samples_successes_but_always_logs_server_errors(self, caplog):
+        middleware = AccessLogMiddleware(_app, data_version=lambda: None, sample_rate=0)
+        with caplog.at_level(logging.INFO, logger="app.access"):
+            for _ in range(5):
+                _request(middleware)
+            _request(middleware, status=503)
+        assert [r.status for r in caplog.records] == [503]
+        assert caplog.records[0].levelno == logging.ERROR
+
+    def test_rejects_bad_sample_rate(self):
+        with pytest.raises(ValueError, match="sample_rate"):
+            AccessLogMiddleware(_app, data_version=lambda: None, sample_rate=2)
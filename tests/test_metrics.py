@@ -0,0 +1,40 @@
+"""Unit tests for the in-process metrics registry."""
+
+from app.metrics import Registry
+
+
+class TestRegistry:
+    def test_counter_renders_labels(self):
+        registry = Registry()
+        counter = registry.counter("reloads_total", "Reloads", ("result",))
+        counter.inc("success")
+        counter.inc("success")
+        counter.inc("failure")
+        text = registry.render()
+        assert "# TYPE reloads_total counter" in text
+        assert 'reloads_total{result="success"} 2' in text
+        assert 'reloads_total{result="failure"} 1' in text
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = Registry()
+        histogram = registry.histogram("latency_seconds", "Latency", ("route",))
+        histogram.observe(0.0002, "/a")
+        histogram.observe(0.003, "/a")
+        histogram.observe(10.0, "/a")
+        text = registry.render()
+        assert 'latency_seconds_bucket{route="/a",le="0.00025"} 1' in text
+        assert 'latency_seconds_bucket{route="/a",le="0.005"} 2' in text
+        assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3' in text
+        assert 'latency_seconds_count{route="/a"} 3' in text
+
+    def test_label_values_are_escaped(self):
+        registry = Registry()
+        registry.counter("c_total", "C", ("name",)).inc('a"b')
+        assert 'c_total{name="a\\"b"} 1' in registry.render()
+
+    def test_gauge_callbacks_run_at_render(self):
+        registry = Registry()
+        value = {"n": 1}
+        registry.add_gauge_callback(lambda: {"things": ("Things", value["n"])})
+        value["n"] = 5
+        assert "things 5" in registry.render()
@@ -0,0 +1,78 @@
+"""Unit tests for opt-in request profiling."""
+
+import asyncio
+import json
+import pstats
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.profiling import Profiler, ProfilingMiddleware, phase
+
+PAYLOAD = {"product_type": "socks", "measurements": {"calf_circumference_cm": 38}}
+
+
+@pytest.fixture(scope="module")
+def loaded_app():
+    """The app with its lifespan run, so sizing data is loaded."""
+    with TestClient(app):
+        yield app
+
+
+def _post(asgi_app, headers=None) -> httpx.Response:
+    async def run():
+        transport = httpx.ASGITransport(app=asgi_app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            return await ac.post("/api/v1/size-recommendation", json=PAYLOAD, headers=headers)
+
+    return asyncio.run(run())
+
+
+class TestProfiler:
+    def test_disabled_by_default(self, tmp_path):
+        assert not Profiler(str(tmp_path)).enabled
+        assert Profiler(str(tmp_path), sample_percent=0.5).enabled
+        assert Profiler(str(tmp_path), token="secret").enabled
+
+    def test_rejects_bad_percentage(self, tmp_path):
+        with pytest.raises(ValueError, match="sample_percent"):
+            Profiler(str(tmp_path), sample_percent=150)
+
+    def test_selects_by_token_or_sample(self, tmp_path):
+        by_token = Profiler(str(tmp_path), token="secret")
+        assert by_token.wants({"headers": [(b"x-profile-token", b"secret")]})
+        assert not by_token.wants({"headers": [(b"x-profile-token", b"guess")]})
+        assert not by_token.wants({"headers": []})
+        assert Profiler(str(tmp_path), sample_percent=100).wants({"headers": []})
+
+    def test_phase_is_a_no_op_outside_a_profiled_request(self):
+        with phase("anything"):
+            pass
+
+
+class TestProfilingMiddleware:
+    def test_profiled_request_writes_dumps(self, loaded_app, tmp_path):
+        profiled = ProfilingMiddleware(loaded_app, Profiler(str(tmp_path), token="secret"))
+        response = _post(profiled, headers={"X-Profile-Token": "secret"})
+        assert response.status_code == 200
+
+        profile_id = response.headers["x-profile-id"]
+        summary = json.loads((tmp_path / f"{profile_id}.json").read_text())
+        assert summary["route"] == "/api/v1/size-recommendation"
+        assert summary["status"] == 200
+        names = [p["name"] for p in summary["phases"]]
+        assert "serialize" in names
+        assert {"cache_lookup", "recommend"} & set(names)
+        for p in summary["phases"]:
+            # Each figure is rounded to the microsecond
+            assert p["offset_ms"] + p["duration_ms"] <= summary["total_ms"] + 0.002
+        assert pstats.Stats(str(tmp_path / f"{profile_id}.prof")).total_calls > 0
+
+    def test_unselected_request_is_untouched(self, loaded_app, tmp_path):
+        profiled = ProfilingMiddleware(loaded_app, Profiler(str(tmp_path), token="secret"))
+        response = _post(profiled)
+        assert response.status_code == 200
+        assert "x-profile-id" not in response.headers
+        assert list(tmp_path.iterdir()) == []
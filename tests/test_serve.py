@@ -0,0 +1,82 @@
+"""Tests for the pre-fork multi-process server."""
+
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+from app.serve import available_cpus
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(os, "fork") or not Path("/proc/self/task").is_dir(), reason="needs fork and /proc"
+)
+
+
+class TestAvailableCpus:
+    def test_capped_by_cgroup_quota(self, tmp_path):
+        cpu_max = tmp_path / "cpu.max"
+        cpu_max.write_text("50000 100000\n")
+        assert available_cpus(str(cpu_max)) == 1
+        cpu_max.write_text("max 100000\n")
+        assert available_cpus(str(cpu_max)) == len(os.sched_getaffinity(0))
+        assert available_cpus(str(tmp_path / "missing")) == len(os.sched_getaffinity(0))
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _children(pid: int) -> set[int]:
+    return {int(child) for child in Path(f"/proc/{pid}/task/{pid}/children").read_text().split()}
+
+
+def _wait_for(condition, timeout: float = 20) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out")
+        time.sleep(0.05)
+
+
+def test_workers_restart_and_shut_down(tmp_path):
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}"
+    env = {**os.environ, "APP_LOG_LEVEL": "warning"}
+    master = subprocess.Popen(
+        [sys.executable, "-m", "app.serve", "--port", str(port), "--workers", "2"], env=env
+    )
+    try:
+        _wait_for(lambda: len(_children(master.pid)) == 2)
+        workers = _children(master.pid)
+        body = {"product_type": "socks", "measurements": {"calf_circumference_cm": 40}}
+        _wait_for(lambda: httpx.get(f"{url}/health").status_code == 200)
+        assert httpx.post(f"{url}/api/v1/size-recommendation", json=body).status_code == 200
+
+        # A dead worker is replaced
+        crashed = workers.pop()
+        os.kill(crashed, signal.SIGKILL)
+        _wait_for(lambda: crashed not in _children(master.pid) and len(_children(master.pid)) == 2)
+
+        # A rolling restart replaces every worker while requests keep succeeding
+        before = _children(master.pid)
+        master.send_signal(signal.SIGHUP)
+        deadline = time.monotonic() + 20
+        while _children(master.pid) & before and time.monotonic() < deadline:
+            assert httpx.get(f"{url}/health").status_code == 200
+        _wait_for(lambda: len(_children(master.pid)) == 2)
+        assert not _children(master.pid) & before
+
+        master.send_signal(signal.SIGTERM)
+        assert master.wait(timeout=20) == 0
+    finally:
+        if master.poll() is None:
+            master.kill()
+            master.wait()
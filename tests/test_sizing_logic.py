@@ -1,10 +1,23 @@
 """Unit tests for the sizing engine."""
 
-from app.sizing.engine import recommend_size
-from app.sizing.loader import load_sizing_data
+import itertools
+import random
+
+from app.sizing import engine
+from app.sizing.chart import compile_chart
+from app.sizing.engine import (
+    _rank_top_two,
+    _rank_top_two_indexed,
+    _score_size,
+    recommend_size,
+    recommend_size_batch,
+    recommend_sizes,
+)
+from app.sizing.loader import compile_sizing_data, load_sizing_data
 
 # Load real data once for all tests
 SIZING_DATA = load_sizing_data("data")
+COMPILED_DATA = compile_sizing_data(SIZING_DATA)
 
 
 # --- Arm Sleeves ---
@@ -313,3 +326,154 @@ class TestEdgeCases:
         )
         assert result["recommended_size"] == "XL"
         assert result["confidence"] == "exact"
+
+
+# --- Compiled charts ---
+
+
+def _reference_recommend(product_type: str, measurements: dict[str, float]) -> tuple[str, str]:
+    return _reference_recommend_chart(SIZING_DATA[product_type], measurements)
+
+
+def _reference_recommend_chart(
+    entries: list[dict], measurements: dict[str, float]
+) -> tuple[str, str]:
+    """Dict-walking scoring with a full sort, as recommend_size worked before compilation."""
+    scored = [(entry["size"], *_score_size(entry, measurements)) for entry in entries]
+    scored.sort(key=lambda x: (x[1] != "exact", x[2], -x[3]))
+    return scored[0][0], scored[0][1]
+
+
+class TestCompiledCharts:
+    def test_round_trips_to_entries(self):
+        for product_type, chart in COMPILED_DATA.items():
+            assert chart.to_entries() == SIZING_DATA[product_type]
+
+    def test_fields_are_sorted_and_complete(self):
+        chart = COMPILED_DATA["socks"]
+        assert chart.fields == ("ankle_circumference_cm", "calf_circumference_cm")
+        assert chart.sizes == ("S", "M", "L", "XL", "XXL")
+
+    def test_compiled_matches_raw(self):
+        for product_type, entries in SIZING_DATA.items():
+            fields = sorted({f for e in entries for f in e["measurements"]})
+            for value in range(0, 160, 7):
+                measurements = {f: value + i for i, f in enumerate(fields)}
+                assert recommend_size(product_type, measurements, COMPILED_DATA) == (
+                    recommend_size(product_type, measurements, SIZING_DATA)
+                )
+
+    def test_matches_reference_scoring(self):
+        for product_type in ("socks", "bras"):
+            fields = sorted({f for e in SIZING_DATA[product_type] for f in e["measurements"]})
+            for a, b in itertools.product(range(10, 150, 3), range(10, 120, 3)):
+                measurements = dict(zip(fields, (a, b)))
+                result = recommend_size(product_type, measurements, COMPILED_DATA)
+                assert (result["recommended_size"], result["confidence"]) == (
+                    _reference_recommend(product_type, measurements)
+                )
+
+
+# --- Batch scoring ---
+
+
+class TestBatchScoring:
+    def test_matches_single_item_scoring(self):
+        fields = sorted({f for e in SIZING_DATA["leggings"] for f in e["measurements"]})
+        measurement_sets = [
+            {f: value + 13 * i for i, f in enumerate(fields)} for value in range(20, 200, 2)
+        ]
+        measurement_sets.append({"height_cm": 165})
+        measurement_sets.append({"bust_circumference_cm": 90})
+        expected = [recommend_size("leggings", m, COMPILED_DATA) for m in measurement_sets]
+        assert recommend_sizes("leggings", measurement_sets, COMPILED_DATA) == expected
+
+    def test_mixed_products_keep_input_order(self):
+        items = [
+            ("socks", {"calf_circumference_cm": 40, "ankle_circumference_cm": 24}),
+            ("bras", {"bust_circumference_cm": 130, "underbust_circumference_cm": 105}),
+            ("unknown_product", {"height_cm": 170}),
+            ("socks", {"calf_circumference_cm": 31, "ankle_circumference_cm": 20}),
+        ]
+        results = recommend_size_batch(items, COMPILED_DATA)
+        assert [r["recommended_size"] for r in results] == ["L", "XXL", "", "S"]
+        assert "Unknown product type" in results[2]["notes"]
+
+
+# --- Sorted boundary index ---
+
+
+def _awkward_chart(n_sizes: int, seed: int) -> list[dict]:
+    """Overlapping, nested and zero-span integer ranges, so ties are common."""
+    rng = random.Random(seed)
+    chart = []
+    for row in range(n_sizes):
+        measurements = {}
+        for field in ("a_cm", "b_cm", "c_kg"):
+            low = rng.randint(0, 60) + row // 2
+            measurements[field] = {"min": low, "max": low + rng.choice([0, 1, 2, 5, 10, 40])}
+        chart.append({"size": f"S{row}", "measurements": measurements})
+    return chart
+
+
+class TestSizeIndex:
+    def test_small_and_sparse_charts_are_not_indexed(self):
+        assert COMPILED_DATA["leggings"].size_index is None
+        sparse = _awkward_chart(40, seed=1)
+        del sparse[3]["measurements"]["b_cm"]
+        assert compile_chart("sparse", sparse).size_index is None
+
+    def test_indexed_ranking_matches_linear_scan(self):
+        rng = random.Random(7)
+        for seed in range(6):
+            chart = compile_chart("big", _awkward_chart(80, seed))
+            assert chart.size_index is not None
+            for _ in range(300):
+                fields = rng.sample(["a_cm", "b_cm", "c_kg"], rng.randint(1, 3))
+                measurements = {f: rng.randint(-10, 120) / rng.choice([1, 2]) for f in fields}
+                columns = chart.columns_for(measurements)
+                assert _rank_top_two_indexed(chart, chart.size_index, columns) == (
+                    _rank_top_two(chart, columns)
+                )
+
+    def test_falls_back_to_linear_scan_when_pruning_fails(self, monkeypatch):
+        # Graded sizes, each a little larger than the last on every field
+        chart = compile_chart(
+            "graded",
+            [
+                {
+                    "size": f"S{row}",
+                    "measurements": {
+                        field: {"min": 10 + 2 * row, "max": 13 + 2 * row}
+                        for field in ("a_cm", "b_cm", "c_kg")
+                    },
+                }
+                for row in range(300)
+            ],
+        )
+        linear_scans = []
+        monkeypatch.setattr(
+            engine,
+            "_rank_top_two",
+            lambda chart, columns: linear_scans.append(columns) or _rank_top_two(chart, columns),
+        )
+        # Inside one size on every field: pruned after a few rows
+        near = chart.columns_for({"a_cm": 311, "b_cm": 311.5, "c_kg": 312})
+        # Far outside on opposite sides: every size is about as bad
+        scattered = chart.columns_for({"a_cm": -500, "b_cm": 1500, "c_kg": -500})
+        for columns in (near, scattered):
+            assert _rank_top_two_indexed(chart, chart.size_index, columns) == (
+                _rank_top_two(chart, columns)
+            )
+        assert linear_scans == [scattered]
+
+    def test_recommendations_unchanged_for_large_chart(self):
+        raw = _awkward_chart(64, seed=3)
+        compiled = compile_sizing_data({"big": raw})
+        for a in range(0, 110, 4):
+            for b in range(0, 110, 9):
+                measurements = {"a_cm": a, "b_cm": b, "c_kg": (a + b) / 2}
+                result = recommend_size("big", measurements, compiled)
+                assert (result["recommended_size"], result["confidence"]) == (
+                    _reference_recommend_chart(raw, measurements)
+                )
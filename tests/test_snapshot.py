@@ -0,0 +1,121 @@
+"""Unit tests for the shared sizing snapshot."""
+
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+from app.sizing.engine import recommend_size
+from app.sizing.loader import compile_sizing_data, load_sizing_data, source_hash
+from app.sizing.snapshot import (
+    attach_snapshot,
+    attach_verified_snapshot,
+    main,
+    read_snapshot_header,
+    write_snapshot,
+)
+
+SIZING_DATA = load_sizing_data("data")
+COMPILED_DATA = compile_sizing_data(SIZING_DATA)
+
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+    path = tmp_path / "sizing.snapshot"
+    write_snapshot(COMPILED_DATA, str(path), extra_header={"built_by": "test"})
+    return path
+
+
+class TestSnapshot:
+    def test_round_trip_preserves_charts(self, snapshot_path):
+        attached = attach_snapshot(str(snapshot_path))
+        assert list(attached) == list(COMPILED_DATA)
+        for product_type, chart in attached.items():
+            assert chart.to_entries() == SIZING_DATA[product_type]
+
+    def test_attached_charts_score_identically(self, snapshot_path):
+        attached = attach_snapshot(str(snapshot_path))
+        for calf in range(20, 60, 3):
+            for ankle in range(15, 35, 3):
+                measurements = {"calf_circumference_cm": calf, "ankle_circumference_cm": ankle}
+                assert recommend_size("socks", measurements, attached) == recommend_size(
+                    "socks", measurements, COMPILED_DATA
+                )
+
+    def test_attached_arrays_are_read_only(self, snapshot_path):
+        attached = attach_snapshot(str(snapshot_path))
+        with pytest.raises(TypeError):
+            attached["socks"].mins[0] = 1.0
+
+    def test_header_carries_extra_fields(self, snapshot_path):
+        header = read_snapshot_header(str(snapshot_path))
+        assert header["built_by"] == "test"
+        assert [p["product_type"] for p in header["products"]] == list(COMPILED_DATA)
+
+    def test_rejects_bad_magic(self, tmp_path):
+        path = tmp_path / "bogus.snapshot"
+        path.write_bytes(b"x" * 64)
+        with pytest.raises(ValueError, match="magic"):
+            attach_snapshot(str(path))
+
+    def test_rejects_truncated_file(self, snapshot_path):
+        data = snapshot_path.read_bytes()
+        snapshot_path.write_bytes(data[: len(data) // 2])
+        with pytest.raises(ValueError, match="truncated"):
+            attach_snapshot(str(snapshot_path))
+
+    def test_cli_builds_snapshot(self, tmp_path, capsys):
+        output = tmp_path / "cli.snapshot"
+        assert main(["data", str(output)]) == 0
+        assert set(attach_snapshot(str(output))) == set(COMPILED_DATA)
+        assert "Wrote 5 charts" in capsys.readouterr().out
+
+
+@pytest.fixture
+def data_copy(tmp_path):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    for path in Path("data").glob("*.json"):
+        shutil.copy(path, data_dir / path.name)
+    return data_dir
+
+
+class TestVerifiedSnapshot:
+    def test_source_hash_tracks_content_not_timestamps(self, data_copy):
+        before = source_hash(str(data_copy))
+        socks = data_copy / "socks.json"
+        os.utime(socks, (0, 0))
+        assert source_hash(str(data_copy)) == before
+        socks.write_text(socks.read_text().replace('"S"', '"SMALL"', 1))
+        assert source_hash(str(data_copy)) != before
+
+    def test_attaches_when_hash_matches(self, data_copy, tmp_path):
+        output = tmp_path / "sizing.snapshot"
+        main([str(data_copy), str(output)])
+        attached = attach_verified_snapshot(str(output), str(data_copy))
+        assert attached is not None
+        assert attached["socks"].to_entries() == SIZING_DATA["socks"]
+
+    def test_stale_or_unkeyed_snapshot_is_ignored(self, data_copy, tmp_path, snapshot_path):
+        output = tmp_path / "cli.snapshot"
+        main([str(data_copy), str(output)])
+        (data_copy / "extra-gloves.json").write_text(
+            '[{"size": "S", "measurements": {"hand_cm": {"min": 1, "max": 2}}}]'
+        )
+        assert attach_verified_snapshot(str(output), str(data_copy)) is None
+        assert attach_verified_snapshot(str(snapshot_path), "data") is None
+
+    def test_startup_falls_back_to_json_when_stale(self, data_copy, tmp_path, monkeypatch):
+        import app.main as main_module
+
+        output = tmp_path / "sizing.snapshot"
+        main([str(data_copy), str(output)])
+        monkeypatch.setenv("SIZING_SNAPSHOT_PATH", str(output))
+        assert isinstance(main_module._load_startup_data(str(data_copy))["socks"].mins, memoryview)
+
+        socks = data_copy / "socks.json"
+        socks.write_text(socks.read_text().replace('"S"', '"SMALL"', 1))
+        loaded = main_module._load_startup_data(str(data_copy))
+        assert not isinstance(loaded["socks"].mins, memoryview)
+        assert loaded["socks"].sizes[0] == "SMALL"
@@ -0,0 +1,90 @@
+"""Unit tests for chart discovery and the lazy chart store."""
+
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+from app.sizing.engine import recommend_size
+from app.sizing.loader import discover_product_files, load_sizing_data
+from app.sizing.store import LazyChartStore
+
+SIZING_DATA = load_sizing_data("data")
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    for path in Path("data").glob("*.json"):
+        shutil.copy(path, tmp_path / path.name)
+    return tmp_path
+
+
+def _write_chart(path: Path, n_sizes: int) -> None:
+    chart = [
+        {"size": f"S{i}", "measurements": {"hand_cm": {"min": 10 + i * 2, "max": 12 + i * 2}}}
+        for i in range(n_sizes)
+    ]
+    path.write_text(json.dumps(chart))
+
+
+class TestDiscovery:
+    def test_directory_index_includes_extra_charts(self, data_dir):
+        _write_chart(data_dir / "compression-gloves.json", 3)
+        files = discover_product_files(str(data_dir))
+        assert "compression_gloves" in files
+        assert "arm_sleeves" in files
+        assert "schema" not in files
+
+    def test_manifest_is_authoritative(self, data_dir):
+        _write_chart(data_dir / "sku-123.json", 3)
+        (data_dir / "manifest.json").write_text(json.dumps({"sku_123": "sku-123.json"}))
+        assert list(discover_product_files(str(data_dir))) == ["sku_123"]
+        assert list(load_sizing_data(str(data_dir))) == ["sku_123"]
+
+    def test_manifest_with_missing_file_fails(self, data_dir):
+        (data_dir / "manifest.json").write_text(json.dumps({"sku_1": "nope.json"}))
+        with pytest.raises(ValueError, match="Missing sizing data file"):
+            discover_product_files(str(data_dir))
+
+    def test_missing_core_file_fails_without_manifest(self, data_dir):
+        (data_dir / "socks.json").unlink()
+        with pytest.raises(ValueError, match="Missing sizing data file"):
+            discover_product_files(str(data_dir))
+
+
+class TestLazyChartStore:
+    def test_loads_on_first_use(self, data_dir):
+        store = LazyChartStore(str(data_dir))
+        assert "socks" in store
+        assert store.stats()["resident"] == 0
+        result = recommend_size(
+            "socks", {"calf_circumference_cm": 40, "ankle_circumference_cm": 24}, store
+        )
+        assert result == recommend_size(
+            "socks", {"calf_circumference_cm": 40, "ankle_circumference_cm": 24}, SIZING_DATA
+        )
+        assert store.stats()["loads"] == 1
+
+    def test_evicts_least_recently_used_over_budget(self, data_dir):
+        store = LazyChartStore(str(data_dir), memory_budget_bytes=1)
+        store["socks"]
+        store["bras"]
+        stats = store.stats()
+        assert stats["resident"] == 1
+        assert stats["evictions"] == 1
+
+    def test_unknown_product_is_key_error(self, data_dir):
+        store = LazyChartStore(str(data_dir))
+        assert "hats" not in store
+        with pytest.raises(KeyError):
+            store["hats"]
+
+    def test_invalid_chart_raises_on_use(self, data_dir):
+        store = LazyChartStore(str(data_dir))
+        (data_dir / "bras.json").write_text("[]")
+        with pytest.raises(ValueError):
+            store["bras"]
+        assert store.stats()["load_failures"] == 1
+        # Other products are unaffected
+        assert store["socks"].sizes[0] == "S"
@@ -0,0 +1,116 @@
+"""Unit tests for the streaming NDJSON scoring response."""
+
+import asyncio
+import json
+
+from app.models import BatchSizingItem, SizingResponse
+from app.streaming import NDJSONScoringResponse
+
+
+def _echo_scorer(lines):
+    """Score each line as size ``line["size"]``, or an error when it has none."""
+    items = []
+    for i, line in enumerate(lines):
+        if "size" in line:
+            result = SizingResponse(recommended_size=line["size"], confidence="exact", notes="")
+            items.append(BatchSizingItem(index=i, result=result))
+        else:
+            items.append(BatchSizingItem(index=i, error="size: missing"))
+    return items
+
+
+def _run(response, body_parts, on_send=None):
+    """Drive the response with ``body_parts`` as request messages; return (sent, received)."""
+    received = []
+    sent = []
+
+    async def receive():
+        i = len(received)
+        received.append(i)
+        if i < len(body_parts):
+            return {
+                "type": "http.request",
+                "body": body_parts[i],
+                "more_body": i + 1 < len(body_parts),
+            }
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        sent.append(message)
+        if on_send:
+            await on_send(message, received)
+
+    asyncio.run(response({"type": "http"}, receive, send))
+    return sent, received
+
+
+def _lines(sent):
+    body = b"".join(m.get("body", b"") for m in sent if m["type"] == "http.response.body")
+    return [json.loads(line) for line in body.decode().splitlines()]
+
+
+class TestNDJSONScoringResponse:
+    def test_lines_split_across_messages_keep_input_order(self):
+        parts = [b'{"product_type": "p", "si', b'ze": "S"}\n{"product_type": "p"}\n\n', b"oops\n"]
+        sent, _ = _run(NDJSONScoringResponse(_echo_scorer, chunk_lines=2), parts)
+        lines = _lines(sent)
+        assert sent[0]["status"] == 200
+        assert [line.get("index") for line in lines[:-1]] == [0, 1, 2]
+        assert lines[0]["result"]["recommended_size"] == "S"
+        assert lines[1]["error"] == "size: missing"
+        assert "invalid JSON" in lines[2]["error"]
+        assert lines[-1] == {
+            "summary": {
+                "items": 3,
+                "errors": 2,
+                "confidence": {"exact": 1},
+                "sizes": {"p": {"S": 1}},
+            }
+        }
+
+    def test_overlong_line_is_an_error_and_skipped(self):
+        long_line = b'{"size": "' + b"x" * 100 + b'"}\n'
+        parts = [long_line[:60], long_line[60:] + b'{"product_type": "p", "size": "M"}']
+        sent, _ = _run(NDJSONScoringResponse(_echo_scorer, max_line_bytes=50), parts)
+        lines = _lines(sent)
+        assert "longer than 50 bytes" in lines[0]["error"]
+        assert lines[1]["result"]["recommended_size"] == "M"
+        assert lines[-1]["summary"]["items"] == 2
+
+    def test_overlong_line_in_one_message_is_an_error(self):
+        long_line = b'{"product_type": "p", "size": "' + b"x" * 100 + b'"}'
+        parts = [long_line + b'\n{"product_type": "p", "size": "M"}\n']
+        sent, _ = _run(NDJSONScoringResponse(_echo_scorer, max_line_bytes=50), parts)
+        lines = _lines(sent)
+        assert "longer than 50 bytes" in lines[0]["error"]
+        assert lines[1]["result"]["recommended_size"] == "M"
+        assert lines[-1]["summary"]["items"] == 2
+
+    def test_reader_is_bounded_by_queue(self):
+        parts = [b'{"size": "S"}\n'] * 50
+        reads_at_first_body = []
+
+        async def on_send(message, received):
+            if message["type"] == "http.response.body" and not reads_at_first_body:
+                reads_at_first_body.append(len(received))
+
+        sent, received = _run(
+            NDJSONScoringResponse(_echo_scorer, chunk_lines=1, queue_chunks=2), parts, on_send
+        )
+        # One chunk being scored, two queued, one blocked in put, one line being read
+        assert reads_at_first_body[0] <= 5
+        assert len(_lines(sent)) == 51
+
+    def test_client_disconnect_stops_the_stream(self):
+        async def receive():
+            return {"type": "http.disconnect"}
+
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(NDJSONScoringResponse(_echo_scorer)({"type": "http"}, receive, send))
+        assert _lines(sent) == [
+            {"summary": {"items": 0, "errors": 0, "confidence": {}, "sizes": {}}}
+        ]
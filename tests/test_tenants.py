@@ -0,0 +1,252 @@
+"""Unit tests for per-tenant chart sets and tenant routing."""
+
+import asyncio
+import json
+import shutil
+import threading
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main_module
+from app.metrics import Histogram, MetricsMiddleware
+from app.sizing.cache import RecommendationCache
+from app.tenants import TenantRegistry, TenantRoutingMiddleware
+
+SOCKS_L = {"calf_circumference_cm": 40, "ankle_circumference_cm": 24}
+
+
+def _add_tenant(root: Path, tenant_id: str, products=("socks", "bras")) -> Path:
+    directory = root / tenant_id
+    directory.mkdir()
+    manifest = {}
+    for product in products:
+        shutil.copy(Path("data") / f"{product}.json", directory / f"{product}.json")
+        manifest[product] = f"{product}.json"
+    (directory / "manifest.json").write_text(json.dumps(manifest))
+    return directory
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _registry(root: Path, **kwargs) -> TenantRegistry:
+    return TenantRegistry(str(root), cache_factory=lambda: RecommendationCache(16), **kwargs)
+
+
+class TestTenantRegistry:
+    def test_loads_on_first_use_and_reuses(self, tmp_path):
+        _add_tenant(tmp_path, "acme")
+        registry = _registry(tmp_path)
+        assert registry.stats()["resident"] == 0
+
+        tenant = asyncio.run(registry.get("acme"))
+        assert sorted(tenant.charts) == ["bras", "socks"]
+        assert len(tenant.version) == 12
+        assert asyncio.run(registry.get("acme")) is tenant
+        assert registry.stats()["loads"] == 1
+
+    def test_concurrent_first_requests_share_one_load(self, tmp_path):
+        _add_tenant(tmp_path, "acme")
+        registry = _registry(tmp_path)
+
+        async def burst():
+            return await asyncio.gather(*(registry.get("acme") for _ in range(5)))
+
+        tenants = asyncio.run(burst())
+        assert all(tenant is tenants[0] for tenant in tenants)
+        assert registry.loads == 1
+
+    def test_unknown_and_malformed_tenants(self, tmp_path):
+        registry = _registry(tmp_path)
+        for tenant_id in ("missing", "../data", "Acme"):
+            with pytest.raises(KeyError):
+                asyncio.run(registry.get(tenant_id))
+
+    def test_broken_tenant_refused_until_retry(self, tmp_path):
+        broken = _add_tenant(tmp_path, "broken")
+        (broken / "socks.json").write_text("{not json")
+        clock = FakeClock()
+        registry = _registry(tmp_path, retry_after=30, clock=clock)
+
+        with pytest.raises(ValueError):
+            asyncio.run(registry.get("broken"))
+        shutil.copy(Path("data") / "socks.json", broken / "socks.json")
+        with pytest.raises(ValueError):
+            asyncio.run(registry.get("broken"))
+        assert registry.load_failures == 1
+
+        clock.now = 31
+        assert "socks" in asyncio.run(registry.get("broken")).charts
+
+    def test_unreadable_tenant_refused_until_retry(self, tmp_path, monkeypatch):
+        _add_tenant(tmp_path, "locked")
+        registry = _registry(tmp_path, retry_after=30, clock=FakeClock())
+        reads = []
+
+        def unreadable(self, *args, **kwargs):
+            reads.append(self)
+            raise PermissionError(13, "Permission denied", str(self))
+
+        monkeypatch.setattr(Path, "read_bytes", unreadable)
+        monkeypatch.setattr(Path, "read_text", unreadable)
+        for _ in range(2):
+            with pytest.raises(ValueError, match="Permission denied"):
+                asyncio.run(registry.get("locked"))
+        assert registry.load_failures == 1
+        assert len(reads) == 1  # the second request didn't touch the disk
+
+    def test_memory_budget_evicts_least_recently_used(self, tmp_path):
+        for tenant_id in ("a", "b", "c"):
+            _add_tenant(tmp_path, tenant_id)
+        probe = _registry(tmp_path)
+        one_tenant = asyncio.run(probe.get("a")).nbytes
+        registry = _registry(tmp_path, memory_budget_bytes=2 * one_tenant)
+
+        async def touch(*tenant_ids):
+            for tenant_id in tenant_ids:
+                await registry.get(tenant_id)
+
+        asyncio.run(touch("a", "b", "a", "c"))
+        stats = registry.stats()
+        assert (stats["resident"], stats["evictions"]) == (2, 1)
+        assert stats["resident_bytes"] == 2 * one_tenant
+        asyncio.run(touch("a"))
+        assert registry.loads == 3
+
+    def test_idle_tenants_evicted(self, tmp_path):
+        _add_tenant(tmp_path, "a")
+        _add_tenant(tmp_path, "b")
+        clock = FakeClock()
+        registry = _registry(tmp_path, idle_seconds=60, clock=clock)
+        asyncio.run(registry.get("a"))
+        clock.now = 50
+        asyncio.run(registry.get("b"))
+        clock.now = 100
+        asyncio.run(registry.get("b"))
+        assert registry.stats()["resident"] == 1
+        assert registry.evictions == 1
+
+    def test_slow_tenant_does_not_block_others(self, tmp_path, monkeypatch):
+        _add_tenant(tmp_path, "slow")
+        _add_tenant(tmp_path, "fast")
+        registry = _registry(tmp_path, load_timeout=0.2)
+        release = threading.Event()
+        load = registry._load
+
+        def slow_load(tenant_id):
+            if tenant_id == "slow":
+                release.wait(5)
+            return load(tenant_id)
+
+        monkeypatch.setattr(registry, "_load", slow_load)
+
+        async def scenario():
+            slow = asyncio.ensure_future(registry.get("slow"))
+            fast = await registry.get("fast")
+            assert not slow.done()
+            with pytest.raises(TimeoutError):
+                await slow
+            # The timed-out load still finishes and is installed
+            release.set()
+            while registry.stats()["resident"] < 2:
+                await asyncio.sleep(0.01)
+            return fast, await registry.get("slow")
+
+        fast, slow = asyncio.run(scenario())
+        assert "socks" in fast.charts and "socks" in slow.charts
+        assert registry.loads == 2
+
+
+@pytest.fixture
+def tenant_client(tmp_path, monkeypatch):
+    _add_tenant(tmp_path, "acme", products=("socks",))
+    broken = _add_tenant(tmp_path, "broken", products=("socks",))
+    (broken / "socks.json").write_text("[]")
+    monkeypatch.setattr(main_module, "_tenants", _registry(tmp_path))
+    with TestClient(TenantRoutingMiddleware(main_module.app)) as client:
+        yield client
+
+
+class TestTenantRouting:
+    URL = "/api/v1/size-recommendation"
+
+    def test_default_dataset_without_tenant(self, tenant_client):
+        response = tenant_client.post(self.URL, json={"product_type": "bras", "measurements": {}})
+        assert response.status_code == 422  # bras exists by default; measurements invalid
+        response = tenant_client.post(
+            self.URL, json={"product_type": "leggings", "measurements": {"height_cm": 165}}
+        )
+        assert response.status_code == 200
+
+    def test_tenant_by_path_prefix_and_header(self, tenant_client):
+        body = {"product_type": "socks", "measurements": SOCKS_L}
+        by_path = tenant_client.post(f"/t/acme{self.URL}", json=body)
+        by_header = tenant_client.post(self.URL, json=body, headers={"X-Tenant-Id": "acme"})
+        assert by_path.status_code == by_header.status_code == 200
+        assert by_path.json()["recommended_size"] == "L"
+
+        leggings = {"product_type": "leggings", "measurements": {"height_cm": 165}}
+        response = tenant_client.post(f"/t/acme{self.URL}", json=leggings)
+        assert response.status_code == 422
+
+    def test_unknown_broken_and_invalid_tenants(self, tenant_client):
+        body = {"product_type": "socks", "measurements": SOCKS_L}
+        assert tenant_client.post(f"/t/nobody{self.URL}", json=body).status_code == 404
+        assert tenant_client.post(f"/t/broken{self.URL}", json=body).status_code == 503
+        assert tenant_client.post(f"/t/acme{self.URL}", json=body).status_code == 200
+        assert tenant_client.post(f"/t/Bad!{self.URL}", json=body).status_code == 400
+        mismatch = tenant_client.post(
+            f"/t/acme{self.URL}", json=body, headers={"X-Tenant-Id": "other"}
+        )
+        assert mismatch.status_code == 400
+
+    def test_redirects_keep_tenant_prefix(self, tenant_client):
+        response = tenant_client.get("/t/acme/api/v1/charts/socks", follow_redirects=False)
+        assert response.status_code == 307
+        assert response.headers["location"].startswith("/t/acme/api/v1/charts/socks/")
+        assert tenant_client.get(response.headers["location"]).status_code == 200
+
+    def test_header_routed_responses_vary_by_tenant(self, tenant_client):
+        url = f"{self.URL}?product_type=socks&" + "&".join(f"{k}={v}" for k, v in SOCKS_L.items())
+        default = tenant_client.get(url)
+        by_header = tenant_client.get(url, headers={"X-Tenant-Id": "acme"})
+        redirect = tenant_client.get(
+            "/api/v1/charts/socks", headers={"X-Tenant-Id": "acme"}, follow_redirects=False
+        )
+        for response in (default, by_header, redirect):
+            assert "public" in response.headers["cache-control"]
+            assert "x-tenant-id" in response.headers["vary"].lower()
+        # The prefixed URL names the tenant itself
+        prefixed = tenant_client.get(f"/t/acme{url}")
+        assert "x-tenant-id" not in prefixed.headers.get("vary", "").lower()
+
+    def test_browsers_may_send_the_tenant_header(self, tenant_client):
+        preflight = tenant_client.options(
+            self.URL,
+            headers={
+                "Origin": "http://localhost:3000",
+                "Access-Control-Request-Method": "POST",
+                "Access-Control-Request-Headers": "content-type, x-tenant-id",
+            },
+        )
+        assert preflight.status_code == 200
+
+    def test_outer_middlewares_see_the_matched_route(self, tenant_client):
+        http = Histogram("http", "", ("route", "method", "status"))
+        outer = MetricsMiddleware(
+            TenantRoutingMiddleware(main_module.app),
+            http_histogram=http,
+            recommendation_histogram=Histogram("rec", "", ("product_type", "confidence")),
+        )
+        body = {"product_type": "socks", "measurements": SOCKS_L}
+        with TestClient(outer) as client:
+            assert client.post(f"/t/acme{self.URL}", json=body).status_code == 200
+        assert http.count(self.URL, "POST", "200") == 1
+        assert http.count("unmatched", "POST", "200") == 0
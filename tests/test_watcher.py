@@ -0,0 +1,43 @@
+"""Unit tests for the sizing data directory watcher."""
+
+import asyncio
+
+from app.sizing.watcher import data_dir_signature, watch_data_dir
+
+
+class TestDataDirSignature:
+    def test_changes_when_a_file_changes(self, tmp_path):
+        (tmp_path / "socks.json").write_text("[]")
+        before = data_dir_signature(str(tmp_path))
+        (tmp_path / "socks.json").write_text("[1, 2]")
+        assert data_dir_signature(str(tmp_path)) != before
+
+    def test_stable_when_nothing_changes(self, tmp_path):
+        (tmp_path / "socks.json").write_text("[]")
+        assert data_dir_signature(str(tmp_path)) == data_dir_signature(str(tmp_path))
+
+
+class TestWatchDataDir:
+    def test_keeps_watching_after_on_change_raises(self, tmp_path):
+        chart = tmp_path / "socks.json"
+        chart.write_text("[]")
+        calls = []
+
+        async def on_change():
+            calls.append(len(calls))
+            if len(calls) == 1:
+                raise PermissionError("socks.json")
+
+        async def scenario():
+            task = asyncio.create_task(watch_data_dir(str(tmp_path), 0.01, on_change))
+            for content in ("[1]", "[1, 2]"):
+                seen = len(calls)
+                await asyncio.sleep(0.02)
+                chart.write_text(content)
+                while len(calls) == seen:
+                    await asyncio.sleep(0.01)
+            assert not task.done()
+            task.cancel()
+
+        asyncio.run(asyncio.wait_for(scenario(), 5))
+        assert calls == [0, 1]
@@ -6,18 +6,151 @@
  * Configuration (set before loading this script):
  *   window.SolideaSizingConfig = {
  *     apiUrl: 'https://your-api-url.com',  // required
- *     productType: 'leggings'              // optional override
+ *     productType: 'leggings',             // optional override
+ *     localEvaluation: true                // optional; false always calls the API
  *   };
  *
+ * Recommendations are computed in the browser from the product's chart export
+ * (GET /api/v1/charts/<product_type>, cached by the browser). The API is called
+ * instead when the export can't be fetched or uses an unknown format.
+ *
  * ES5-compatible for maximum browser support.
  */
 (function () {
   'use strict';
 
+  // --- Local evaluation of chart exports (mirrors app/sizing/engine.py) ---
+  var EXPORT_FORMAT = 1;
+
+  function formatNote(template, values) {
+    return template.replace(/\{(\w+)\}/g, function (match, key) {
+      return Object.prototype.hasOwnProperty.call(values, key) ? values[key] : match;
+    });
+  }
+
+  function scoreRow(chart, row, columns) {
+    var base = row * chart.fields.length;
+    var common = 0;
+    var penalty = 0;
+    var matched = 0;
+
+    for (var i = 0; i < columns.length; i++) {
+      var cell = base + columns[i][0];
+      var value = columns[i][1];
+      var lo = chart.min[cell];
+      if (lo === null) {
+        continue;
+      }
+      var hi = chart.max[cell];
+      var span = hi - lo;
+      common++;
+      if (lo <= value && value <= hi) {
+        matched++;
+      } else if (value < lo) {
+        penalty += span ? (lo - value) / span : Math.abs(lo - value);
+      } else {
+        penalty += span ? (value - hi) / span : Math.abs(value - hi);
+      }
+    }
+
+    if (!common) {
+      return { status: 'out_of_range', penalty: Infinity, matched: 0 };
+    }
+    var status;
+    if (matched === common) {
+      status = 'exact';
+    } else if (penalty <= chart.thresholds.interpolated_max_penalty) {
+      status = 'interpolated';
+    } else {
+      status = 'out_of_range';
+    }
+    return { status: status, penalty: penalty, matched: matched };
+  }
+
+  // Lexicographic (not exact, penalty, -matched), like the engine's sort key
+  function isBetter(a, b) {
+    var aInexact = a.status !== 'exact' ? 1 : 0;
+    var bInexact = b.status !== 'exact' ? 1 : 0;
+    if (aInexact !== bInexact) return aInexact < bInexact;
+    if (a.penalty !== b.penalty) return a.penalty < b.penalty;
+    return -a.matched < -b.matched;
+  }
+
+  /**
+   * Recommend a size from a chart export; returns the same object as the API.
+   * Returns null if the export's format isn't one this widget understands.
+   */
+  function evaluateChart(chart, measurements) {
+    if (!chart || chart.format !== EXPORT_FORMAT) {
+      return null;
+    }
+
+    var columns = [];
+    for (var f = 0; f < chart.fields.length; f++) {
+      if (Object.prototype.hasOwnProperty.call(measurements, chart.fields[f])) {
+        columns.push([f, measurements[chart.fields[f]]]);
+      }
+    }
+    if (!columns.length) {
+      return {
+        recommended_size: '',
+        confidence: 'out_of_range',
+        notes: formatNote(chart.notes.irrelevant, {
+          provided: Object.keys(measurements).sort().join(', '),
+          product_type: chart.product_type,
+          expected: chart.fields.join(', '),
+        }),
+      };
+    }
+
+    var best = null;
+    var second = null;
+    for (var row = 0; row < chart.sizes.length; row++) {
+      var scored = scoreRow(chart, row, columns);
+      scored.row = row;
+      if (best === null || isBetter(scored, best)) {
+        second = best;
+        best = scored;
+      } else if (second === null || isBetter(scored, second)) {
+        second = scored;
+      }
+    }
+
+    var bestSize = chart.sizes[best.row];
+    var notes = '';
+    if (best.status === 'interpolated') {
+      if (
+        second !== null &&
+        (second.status === 'exact' || second.status === 'interpolated') &&
+        Math.abs(second.penalty - best.penalty) < chart.thresholds.between_sizes_max_gap
+      ) {
+        notes = formatNote(chart.notes.between_sizes, {
+          best: bestSize,
+          second: chart.sizes[second.row],
+        });
+      } else {
+        notes = formatNote(chart.notes.close, { best: bestSize });
+      }
+    } else if (best.status === 'out_of_range') {
+      notes = formatNote(chart.notes.out_of_range, { best: bestSize });
+    }
+    return { recommended_size: bestSize, confidence: best.status, notes: notes };
+  }
+
+  // Outside a browser (the parity tests run this file under Node), only export the evaluator
+  if (typeof window === 'undefined') {
+    if (typeof module !== 'undefined' && module.exports) {
+      module.exports = { evaluateChart: evaluateChart, EXPORT_FORMAT: EXPORT_FORMAT };
+    }
+    return;
+  }
+
   // --- Configuration ---
   var config = window.SolideaSizingConfig || {};
   var API_URL = config.apiUrl || 'http://localhost:8000';
   var ENDPOINT = API_URL + '/api/v1/size-recommendation';
+  var CHARTS_URL = API_URL + '/api/v1/charts/';
+  var LOCAL_EVALUATION = config.localEvaluation !== false;
 
   // --- Product type definitions ---
   var PRODUCT_TYPES = {
@@ -463,22 +596,7 @@
     submitBtn.disabled = true;
     submitBtn.innerHTML = '<span class="solidea-spinner"></span>';
 
-    var payload = JSON.stringify({
-      product_type: productType,
-      measurements: measurements,
-    });
-
-    fetch(ENDPOINT, {
-      method: 'POST',
-      headers: { 'Content-Type': 'application/json' },
-      body: payload,
-    })
-      .then(function (response) {
-        if (!response.ok) {
-          throw new Error('Server returned ' + response.status);
-        }
-        return response.json();
-      })
+    recommend(productType, measurements)
       .then(function (data) {
         showResult(container, data);
       })
@@ -494,6 +612,48 @@
       });
   }
 
+  // One fetch per product type per page view; resolves to null when unavailable
+  var chartRequests = {};
+
+  function loadChart(productType) {
+    if (!chartRequests[productType]) {
+      chartRequests[productType] = fetch(CHARTS_URL + encodeURIComponent(productType))
+        .then(function (response) {
+          return response.ok ? response.json() : null;
+        })
+        .catch(function () {
+          return null;
+        });
+    }
+    return chartRequests[productType];
+  }
+
+  function recommendFromApi(productType, measurements) {
+    return fetch(ENDPOINT, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({
+        product_type: productType,
+        measurements: measurements,
+      }),
+    }).then(function (response) {
+      if (!response.ok) {
+        throw new Error('Server returned ' + response.status);
+      }
+      return response.json();
+    });
+  }
+
+  function recommend(productType, measurements) {
+    if (!LOCAL_EVALUATION) {
+      return recommendFromApi(productType, measurements);
+    }
+    return loadChart(productType).then(function (chart) {
+      var local = evaluateChart(chart, measurements);
+      return local || recommendFromApi(productType, measurements);
+    });
+  }
+
   function showResult(container, data) {
     var resultDiv = document.createElement('div');
     resultDiv.className = 'solidea-result';